@@ -4,6 +4,7 @@ from flask import Flask, jsonify
 from sqlalchemy import text
 
 from app.extensions import db, migrate, cors
+from app.cli import register_cli
 from app.segments.segment_09_users_auth_routes import auth_bp
 from app.segments.segment_20_rides_routes import ride_bp
 from app.segments.segment_payments import payments_bp
@@ -177,18 +178,8 @@ def create_app():
 
 
     # -------------------------
-    # Autopilot: run small tick on requests (throttled)
+    # Autopilot jobs run in the scheduler worker (scheduler.py), never on the request path.
     # -------------------------
-    try:
-        from app.utils.autopilot import tick as _autopilot_tick_hook
-        @app.before_request
-        def _fliptrybe_autopilot_before_request():
-            try:
-                _autopilot_tick_hook()
-            except Exception:
-                pass
-    except Exception:
-        pass
 
     app.register_blueprint(driver_avail_bp)
 
@@ -203,4 +194,6 @@ def create_app():
 
     app.register_blueprint(recon_bp)
 
+    register_cli(app)
+
     return app
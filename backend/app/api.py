@@ -7,6 +7,7 @@ from flask_login import login_required, current_user
 
 from app.extensions import db
 from app.models import Transaction, Wallet, User
+from app.utils.wallets import credit_balance
 
 api = Blueprint("api", __name__, url_prefix="/api")
 
@@ -87,7 +88,7 @@ def paystack_verify(reference: str):
             exists = Transaction.query.filter_by(reference=reference).first()
             if not exists:
                 tx = Transaction(wallet_id=wallet.id, amount=amount_naira, direction="in", reference=reference)
-                wallet.balance = (wallet.balance or 0) + amount_naira
+                credit_balance(wallet.id, amount_naira)
                 db.session.add(tx)
                 db.session.commit()
     except Exception:
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+
+import click
+
+
+def register_cli(app) -> None:
+    """Maintenance commands: `flask listings <command>`, `flask maintenance <command>`."""
+
+    @app.cli.group("listings")
+    def listings_group():
+        """Listing maintenance commands."""
+
+    @listings_group.command("rebuild-location-counts")
+    def rebuild_location_counts_cmd():
+        """Recompute listing_location_counts from the listings table."""
+        from app.utils.location_counts import rebuild_location_counts
+        click.echo(json.dumps(rebuild_location_counts()))
+
+    @listings_group.command("rebuild-search-index")
+    def rebuild_search_index_cmd():
+        """Repopulate the SQLite FTS index from the listings table."""
+        from app.utils.listing_search import ensure_search_index, rebuild_search_index
+        ensure_search_index()
+        click.echo(json.dumps({"ok": True, "indexed": rebuild_search_index()}))
+
+    @app.cli.group("maintenance")
+    def maintenance_group():
+        """Chunked, resumable maintenance jobs (same tasks as the admin endpoints)."""
+
+    @maintenance_group.command("list")
+    def maintenance_list_cmd():
+        """List registered maintenance tasks."""
+        from app.utils.maintenance import task_names
+        click.echo(json.dumps({"ok": True, "tasks": task_names()}))
+
+    @maintenance_group.command("run")
+    @click.argument("task")
+    @click.option("--dry-run", is_flag=True, help="Report changes without writing them.")
+    def maintenance_run_cmd(task, dry_run):
+        """Run TASK in the foreground, resuming an interrupted job from its checkpoint."""
+        from app.utils.maintenance import run_job, start_job, task_names
+        if task not in task_names():
+            raise click.BadParameter(f"unknown task (choose from: {', '.join(task_names())})", param_hint="TASK")
+        job, should_run = start_job(task, dry_run=dry_run)
+        if not should_run:
+            click.echo(json.dumps({"ok": False, "message": "job already running", "job": job.to_dict()}))
+            return
+        job = run_job(int(job.id))
+        click.echo(json.dumps({"ok": job.status == "succeeded", "job": job.to_dict(include_results=True)}))
@@ -2,9 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from app.extensions import db
 from app.models import Order, Listing, WalletTxn
-from app.jobs.escrow_runner import _credit_seller, _credit_driver, _settle_inspection_fee, _event_once, _now
+from app.jobs.escrow_runner import _seller_legs, _driver_legs, _post_legs, _settle_inspection_fee, _event_once, _leave_held, _still_held, _now
 
 
 def _seller_paid(order: Order) -> bool:
@@ -60,32 +59,37 @@ def _inspector_paid(order: Order) -> bool:
     return bool(row)
 
 
-def _maybe_finalize_escrow(order: Order) -> None:
-    # Only auto-finalize for non-inspection flows.
-    if _inspector_needed(order):
-        return
-    if _seller_paid(order) and _driver_paid(order):
-        order.escrow_status = "RELEASED"
-        order.escrow_release_at = _now()
-        order.updated_at = _now()
+def _release_part(order: Order, legs, *, finalize: bool) -> bool:
+    """Post one party's legs while the order is HELD; RELEASED in the same commit when `finalize`."""
+    if finalize:
+        if not _leave_held(order, "RELEASED", escrow_release_at=_now()):
+            return False
+    elif not _still_held(order):
+        return False
+    if not _post_legs(legs):
+        return False
+    if finalize:
         try:
             _event_once(int(order.id), "escrow_released", "Escrow released")
         except Exception:
             pass
-        db.session.add(order)
+    return True
 
 
-def release_seller_payout(order: Order) -> None:
+def release_seller_payout(order: Order) -> bool:
     listing = Listing.query.get(int(order.listing_id)) if order.listing_id else None
     ref = f"order:{int(order.id)}"
-    _credit_seller(order, listing, ref, float(order.amount or 0.0))
-    _maybe_finalize_escrow(order)
+    legs = _seller_legs(order, listing, ref, float(order.amount or 0.0))
+    # Only auto-finalize for non-inspection flows.
+    finalize = not _inspector_needed(order) and _driver_paid(order)
+    return _release_part(order, legs, finalize=finalize)
 
 
-def release_driver_payout(order: Order) -> None:
+def release_driver_payout(order: Order) -> bool:
     ref = f"order:{int(order.id)}"
-    _credit_driver(order, ref, float(order.delivery_fee or 0.0))
-    _maybe_finalize_escrow(order)
+    legs = _driver_legs(order, ref, float(order.delivery_fee or 0.0))
+    finalize = not _inspector_needed(order) and _seller_paid(order)
+    return _release_part(order, legs, finalize=finalize)
 
 
 def release_inspector_payout(order: Order) -> None:
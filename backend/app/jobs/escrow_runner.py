@@ -1,51 +1,139 @@
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import insert, select, update
 
 from app.extensions import db
 import json
 
-from app.models import Order, AuditLog, User, Listing, MerchantProfile, OrderEvent, EscrowUnlock
-from app.utils.wallets import post_txn
+from app.models import Order, AuditLog, User, Listing, MerchantProfile, OrderEvent, EscrowUnlock, EscrowSettlement
+from app.utils import escrow_queue
+from app.utils.wallets import Leg, post_txns_batch
 from app.utils.commission import compute_commission, RATES
 import os
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+CHUNK_SIZE = _env_int("ESCROW_CHUNK_SIZE", 200)
+
+# settle_order outcome -> run_escrow_automation counter
+_TALLY = {"released": "released", "refunded": "refunded", "error": "errors"}
+
+
 def _now():
     return datetime.utcnow()
 
 
+_platform_user_id_cache: int | None = None
+
+
 def _platform_user_id() -> int:
+    """PLATFORM_USER_ID, else the first admin; resolved once per process (1 until one exists)."""
+    global _platform_user_id_cache
+    if _platform_user_id_cache is not None:
+        return _platform_user_id_cache
     raw = (os.getenv("PLATFORM_USER_ID") or "").strip()
     if raw.isdigit():
-        return int(raw)
+        _platform_user_id_cache = int(raw)
+        return _platform_user_id_cache
     try:
-        admin = User.query.filter_by(role="admin").order_by(User.id.asc()).first()
-        if admin:
-            return int(admin.id)
+        admin_id = db.session.scalar(select(User.id).where(User.role == "admin").order_by(User.id.asc()).limit(1))
+        if admin_id:
+            _platform_user_id_cache = int(admin_id)
+            return _platform_user_id_cache
     except Exception:
         pass
     return 1
 
 
-def _seller_role(user_id: int | None) -> str:
+def _normalize_seller_role(role: str | None) -> str:
+    role = (role or "buyer").strip().lower()
+    if role in ("driver", "inspector"):
+        return "merchant"
+    return role
+
+
+@dataclass
+class SettlementBatch:
+    """Lookups the release rules need for a chunk of claimed orders.
+
+    prefetch() fills it with a few IN (...) queries per chunk instead of
+    several per order. Plain values and rows only, so the per-order commits
+    in settle_order do not expire (and reload) any of it.
+    """
+    roles: dict[int, str] = field(default_factory=dict)
+    top_tier: set[int] = field(default_factory=set)
+    unlocked: set[int] = field(default_factory=set)
+    listings: dict[int, object] = field(default_factory=dict)
+
+    @classmethod
+    def prefetch(cls, order_ids) -> "SettlementBatch":
+        batch = cls()
+        ids = sorted({int(i) for i in order_ids})
+        if not ids:
+            return batch
+        keys = db.session.execute(
+            select(Order.merchant_id, Order.listing_id).where(Order.id.in_(ids))
+        ).all()
+        merchant_ids = sorted({int(m) for m, _ in keys if m})
+        listing_ids = sorted({int(li) for _, li in keys if li})
+        if merchant_ids:
+            batch.roles = {
+                int(uid): _normalize_seller_role(role)
+                for uid, role in db.session.execute(select(User.id, User.role).where(User.id.in_(merchant_ids)))
+            }
+            batch.top_tier = set(db.session.scalars(
+                select(MerchantProfile.user_id).where(
+                    MerchantProfile.user_id.in_(merchant_ids), MerchantProfile.is_top_tier.is_(True)
+                )
+            ))
+        if listing_ids:
+            batch.listings = {
+                int(row.id): row
+                for row in db.session.execute(
+                    select(Listing.id, Listing.base_price, Listing.platform_fee, Listing.final_price)
+                    .where(Listing.id.in_(listing_ids))
+                )
+            }
+        batch.unlocked = set(db.session.scalars(
+            select(EscrowUnlock.order_id).where(
+                EscrowUnlock.order_id.in_(ids),
+                EscrowUnlock.step == escrow_queue.INSPECTION_UNLOCK_STEP,
+                EscrowUnlock.unlocked_at.isnot(None),
+            )
+        ))
+        return batch
+
+
+def _seller_role(user_id: int | None, batch: SettlementBatch | None = None) -> str:
     if not user_id:
         return "buyer"
+    if batch is not None:
+        return batch.roles.get(int(user_id), "buyer")
     try:
         u = User.query.get(int(user_id))
     except Exception:
         u = None
     if not u:
         return "buyer"
-    role = (getattr(u, "role", "") or "buyer").strip().lower()
-    if role in ("driver", "inspector"):
-        return "merchant"
-    return role
+    return _normalize_seller_role(getattr(u, "role", ""))
 
 
-def _is_top_tier(merchant_id: int | None) -> bool:
+def _is_top_tier(merchant_id: int | None, batch: SettlementBatch | None = None) -> bool:
     if not merchant_id:
         return False
+    if batch is not None:
+        return int(merchant_id) in batch.top_tier
     try:
         mp = MerchantProfile.query.filter_by(user_id=int(merchant_id)).first()
         if mp:
@@ -55,11 +143,12 @@ def _is_top_tier(merchant_id: int | None) -> bool:
     return False
 
 
-def _credit_seller(order: Order, listing: Listing | None, ref: str, order_amount: float) -> None:
-    seller_role = _seller_role(order.merchant_id)
+def _seller_legs(order: Order, listing: Listing | None, ref: str, order_amount: float, batch: SettlementBatch | None = None) -> list[Leg]:
+    seller_role = _seller_role(order.merchant_id, batch)
     if order_amount <= 0:
-        return
+        return []
 
+    legs: list[Leg] = []
     if seller_role == "merchant":
         base_price = float(getattr(listing, "base_price", 0.0) or 0.0) if listing else 0.0
         if base_price <= 0.0:
@@ -78,92 +167,133 @@ def _credit_seller(order: Order, listing: Listing | None, ref: str, order_amount
             final_price = round(base_price + platform_fee, 2)
 
         if base_price > 0:
-            post_txn(
+            legs.append(Leg(
                 user_id=int(order.merchant_id),
                 direction="credit",
                 amount=float(base_price),
                 kind="order_sale",
                 reference=ref,
                 note=f"Order sale (base) for order #{int(order.id)}",
-            )
+            ))
 
         if platform_fee > 0:
-            if _is_top_tier(order.merchant_id):
+            if _is_top_tier(order.merchant_id, batch):
                 incentive = round(platform_fee * (11.0 / 13.0), 2)
                 platform_share = round(platform_fee - incentive, 2)
                 if incentive > 0:
-                    post_txn(
+                    legs.append(Leg(
                         user_id=int(order.merchant_id),
                         direction="credit",
                         amount=float(incentive),
                         kind="top_tier_incentive",
                         reference=ref,
                         note=f"Top-tier incentive for order #{int(order.id)}",
-                    )
+                    ))
                 if platform_share > 0:
-                    post_txn(
+                    legs.append(Leg(
                         user_id=_platform_user_id(),
                         direction="credit",
                         amount=float(platform_share),
                         kind="platform_fee",
                         reference=ref,
                         note=f"Platform fee for order #{int(order.id)}",
-                    )
+                        deferred=True,
+                    ))
             else:
-                post_txn(
+                legs.append(Leg(
                     user_id=_platform_user_id(),
                     direction="credit",
                     amount=float(platform_fee),
                     kind="platform_fee",
                     reference=ref,
                     note=f"Platform fee for order #{int(order.id)}",
-                )
+                    deferred=True,
+                ))
     else:
         commission_fee = compute_commission(order_amount, float(RATES.get("listing_sale", 0.05)))
         net_amount = round(float(order_amount) - float(commission_fee), 2)
         if net_amount > 0:
-            post_txn(
+            legs.append(Leg(
                 user_id=int(order.merchant_id),
                 direction="credit",
                 amount=float(net_amount),
                 kind="order_sale",
                 reference=ref,
                 note=f"Order sale (net) for order #{int(order.id)}",
-            )
+            ))
         if commission_fee > 0:
-            post_txn(
+            legs.append(Leg(
                 user_id=_platform_user_id(),
                 direction="credit",
                 amount=float(commission_fee),
                 kind="user_listing_commission",
                 reference=ref,
                 note=f"User listing commission for order #{int(order.id)}",
-            )
+                deferred=True,
+            ))
+    return legs
 
 
-def _credit_driver(order: Order, ref: str, delivery_fee: float) -> None:
+def _driver_legs(order: Order, ref: str, delivery_fee: float) -> list[Leg]:
     if delivery_fee <= 0 or not order.driver_id:
-        return
+        return []
+    legs: list[Leg] = []
     delivery_commission = compute_commission(delivery_fee, float(RATES.get("delivery", 0.10)))
     net_delivery = round(float(delivery_fee) - float(delivery_commission), 2)
     if net_delivery > 0:
-        post_txn(
+        legs.append(Leg(
             user_id=int(order.driver_id),
             direction="credit",
             amount=float(net_delivery),
             kind="delivery_fee",
             reference=ref,
             note=f"Delivery fee (net) for order #{int(order.id)}",
-        )
+        ))
     if delivery_commission > 0:
-        post_txn(
+        legs.append(Leg(
             user_id=_platform_user_id(),
             direction="credit",
             amount=float(delivery_commission),
             kind="delivery_commission",
             reference=ref,
             note=f"Delivery commission for order #{int(order.id)}",
-        )
+            deferred=True,
+        ))
+    return legs
+
+
+def _inspection_legs(order: Order) -> list[Leg]:
+    inspection_fee = float(getattr(order, "inspection_fee", 0.0) or 0.0)
+    if inspection_fee <= 0 or not order.inspector_id:
+        return []
+    legs: list[Leg] = []
+    inspection_commission = compute_commission(inspection_fee, float(RATES.get("inspection", 0.10)))
+    net_inspection = round(float(inspection_fee) - float(inspection_commission), 2)
+    if net_inspection > 0:
+        legs.append(Leg(
+            user_id=int(order.inspector_id),
+            direction="credit",
+            amount=float(net_inspection),
+            kind="inspection_fee",
+            reference=f"inspection:{int(order.id)}",
+            note=f"Inspection fee (net) for order #{int(order.id)}",
+        ))
+    if inspection_commission > 0:
+        legs.append(Leg(
+            user_id=_platform_user_id(),
+            direction="credit",
+            amount=float(inspection_commission),
+            kind="inspection_commission",
+            reference=f"inspection:{int(order.id)}",
+            note=f"Inspection commission for order #{int(order.id)}",
+            deferred=True,
+        ))
+    return legs
+
+
+def _post_legs(legs: list[Leg]) -> bool:
+    """Post all legs in one transaction (also commits pending order changes)."""
+    return all(r.ok for r in post_txns_batch(legs))
 
 
 def _hold_order_into_escrow(order: Order) -> None:
@@ -184,49 +314,89 @@ def _hold_order_into_escrow(order: Order) -> None:
     order.updated_at = _now()
 
 
-def _release_escrow(order: Order) -> None:
+def _leave_held(order: Order, escrow_status: str, **values) -> bool:
+    """Move the order out of HELD with a conditional UPDATE, pending in the session.
+
+    It commits with the legs (post_txns_batch), so the status change and the
+    money move together. False when the order was no longer HELD (a worker
+    or an API refund got there first): the caller must not post its legs.
+    The order also leaves the settlement queue (the ORM update hook that
+    normally does this does not see a bulk UPDATE).
+    """
+    res = db.session.execute(
+        update(Order)
+        .where(Order.id == int(order.id), Order.escrow_status == "HELD")
+        .values(escrow_status=escrow_status, updated_at=_now(), next_escrow_eval_at=None, escrow_claimed_by=None, **values)
+    )
+    return bool(res.rowcount)
+
+
+def _still_held(order: Order) -> bool:
+    """Conditional no-op UPDATE that only matches while the order is HELD, pending in the session.
+
+    For payouts that leave the order HELD (one party of several): it commits
+    with their legs, so a refund that got there first makes the caller skip
+    the payout instead of paying out of a refunded escrow.
+    """
+    res = db.session.execute(
+        update(Order)
+        .where(Order.id == int(order.id), Order.escrow_status == "HELD")
+        .values(updated_at=_now())
+    )
+    return bool(res.rowcount)
+
+
+def _release_escrow(order: Order, batch: SettlementBatch | None = None) -> bool:
+    """Pay seller, driver and inspector and mark the order RELEASED, all in one commit."""
     if (order.escrow_status or "NONE") != "HELD":
-        return
+        return False
     ref = f"order:{int(order.id)}"
     order_amount = float(order.amount or 0.0)
     delivery_fee = float(order.delivery_fee or 0.0)
     listing = None
     if order.listing_id:
-        try:
-            listing = Listing.query.get(int(order.listing_id))
-        except Exception:
-            listing = None
+        if batch is not None:
+            listing = batch.listings.get(int(order.listing_id))
+        else:
+            try:
+                listing = Listing.query.get(int(order.listing_id))
+            except Exception:
+                listing = None
 
-    _credit_seller(order, listing, ref, order_amount)
-    _credit_driver(order, ref, delivery_fee)
-    _settle_inspection_fee(order)
+    legs = _seller_legs(order, listing, ref, order_amount, batch) + _driver_legs(order, ref, delivery_fee) + _inspection_legs(order)
 
-    order.escrow_status = "RELEASED"
-    order.escrow_release_at = _now()
-    order.updated_at = _now()
+    if not _leave_held(order, "RELEASED", escrow_release_at=_now()):
+        return False
+    if not _post_legs(legs):
+        # rolled back: the order is still HELD and is retried next run
+        return False
     _event_once(int(order.id), "escrow_released", "Escrow released")
+    return True
 
 
-def _refund_escrow(order: Order) -> None:
+def _refund_escrow(order: Order, *, settle_inspection: bool = False) -> bool:
+    """Refund the buyer (and optionally pay the inspector) and mark the order REFUNDED, in one commit."""
     if (order.escrow_status or "NONE") != "HELD":
-        return
+        return False
     amount = float(order.escrow_hold_amount or 0.0)
-    if amount <= 0:
-        order.escrow_status = "REFUNDED"
-        order.escrow_refund_at = _now()
-        return
-    post_txn(
-        user_id=int(order.buyer_id),
-        direction="credit",
-        amount=amount,
-        kind="escrow_refund",
-        reference=f"order:{int(order.id)}",
-        note=f"Escrow refund for order #{int(order.id)}",
-    )
-    order.escrow_status = "REFUNDED"
-    order.escrow_refund_at = _now()
-    order.updated_at = _now()
+    legs = _inspection_legs(order) if settle_inspection else []
+    if amount > 0:
+        legs.append(Leg(
+            user_id=int(order.buyer_id),
+            direction="credit",
+            amount=amount,
+            kind="escrow_refund",
+            reference=f"order:{int(order.id)}",
+            note=f"Escrow refund for order #{int(order.id)}",
+        ))
+    if not _leave_held(order, "REFUNDED", escrow_refund_at=_now()):
+        return False
+    if not legs:
+        return True
+    if not _post_legs(legs):
+        return False
     _event_once(int(order.id), "escrow_refunded", "Escrow refunded")
+    return True
 
 
 def _event_once(order_id: int, event: str, note: str = "") -> None:
@@ -253,33 +423,13 @@ def _event_once(order_id: int, event: str, note: str = "") -> None:
             pass
 
 
-def _settle_inspection_fee(order: Order) -> None:
-    inspection_fee = float(getattr(order, "inspection_fee", 0.0) or 0.0)
-    if inspection_fee <= 0 or not order.inspector_id:
-        return
-    inspection_commission = compute_commission(inspection_fee, float(RATES.get("inspection", 0.10)))
-    net_inspection = round(float(inspection_fee) - float(inspection_commission), 2)
-    if net_inspection > 0:
-        post_txn(
-            user_id=int(order.inspector_id),
-            direction="credit",
-            amount=float(net_inspection),
-            kind="inspection_fee",
-            reference=f"inspection:{int(order.id)}",
-            note=f"Inspection fee (net) for order #{int(order.id)}",
-        )
-    if inspection_commission > 0:
-        post_txn(
-            user_id=_platform_user_id(),
-            direction="credit",
-            amount=float(inspection_commission),
-            kind="inspection_commission",
-            reference=f"inspection:{int(order.id)}",
-            note=f"Inspection commission for order #{int(order.id)}",
-        )
+def _settle_inspection_fee(order: Order) -> bool:
+    return _post_legs(_inspection_legs(order))
 
 
-def _inspection_unlock_ready(order_id: int) -> bool:
+def _inspection_unlock_ready(order_id: int, batch: SettlementBatch | None = None) -> bool:
+    if batch is not None:
+        return int(order_id) in batch.unlocked
     try:
         row = EscrowUnlock.query.filter_by(order_id=int(order_id), step="inspection_inspector").first()
         return bool(row and row.unlocked_at)
@@ -287,106 +437,161 @@ def _inspection_unlock_ready(order_id: int) -> bool:
         return False
 
 
-def run_escrow_automation(*, limit: int = 500) -> dict:
-    """Run escrow automation for HELD orders.
+def _evaluate(o: Order, batch: SettlementBatch | None = None) -> str:
+    """Apply the release rules to one HELD order.
 
-    Rules:
-      - If inspection_outcome == PASS: release when release_condition allows.
-      - If inspection_outcome in (FAIL, FRAUD): refund.
-      - If inspection_outcome == PASS and release_condition == TIMEOUT: release after timeout.
-      - Otherwise: do nothing.
+    Returns "released", "refunded", "disputed", "parked" (still HELD, nothing
+    to do yet) or "error" (settlement failed; still HELD).
     """
-
-    processed = 0
-    released = 0
-    refunded = 0
-    skipped = 0
-    errors = 0
-
-    rows = (
-        Order.query.filter_by(escrow_status="HELD")
-        .order_by(Order.id.asc())
-        .limit(int(limit))
-        .all()
-    )
-
-    for o in rows:
-        processed += 1
+    status = (o.status or "").strip().lower()
+    if status in ("delivered", "completed", "closed") and (o.escrow_status or "NONE") == "HELD":
+        o.escrow_status = "DISPUTED"
+        o.escrow_disputed_at = _now()
+        o.updated_at = _now()
         try:
-            status = (o.status or "").strip().lower()
-            if status in ("delivered", "completed", "closed") and (o.escrow_status or "NONE") == "HELD":
-                o.escrow_status = "DISPUTED"
-                o.escrow_disputed_at = _now()
-                o.updated_at = _now()
-                _event_once(int(o.id), "escrow_disputed", f"Escrow disputed due to status {status}")
-                try:
-                    db.session.add(
-                        AuditLog(
-                            actor_user_id=None,
-                            action="escrow_violation",
-                            target_type="order",
-                            target_id=int(o.id),
-                            meta=json.dumps({
-                                "order_id": int(o.id),
-                                "status": status,
-                                "escrow_status": "HELD",
-                                "ts": _now().isoformat(),
-                            }),
-                        )
-                    )
-                except Exception:
-                    pass
-                skipped += 1
-                continue
-
-            outcome = (o.inspection_outcome or "NONE").upper()
-            cond = (o.release_condition or "INSPECTION_PASS").upper()
-
-            # Refund is immediate on FAIL/FRAUD.
-            if outcome in ("FAIL", "FRAUD"):
-                _settle_inspection_fee(o)
-                _refund_escrow(o)
-                refunded += 1
-                continue
-
-            if outcome == "PASS":
-                if cond == "INSPECTION_PASS":
-                    if not _inspection_unlock_ready(int(o.id)):
-                        skipped += 1
-                        continue
-                    _settle_inspection_fee(o)
-                    _release_escrow(o)
-                    released += 1
-                    continue
-                _settle_inspection_fee(o)
-                if cond == "TIMEOUT":
-                    held_at = o.escrow_held_at or o.created_at
-                    timeout = timedelta(hours=int(o.release_timeout_hours or 48))
-                    if held_at and _now() >= (held_at + timeout):
-                        _release_escrow(o)
-                        released += 1
-                        continue
-                # BUYER_CONFIRM / ADMIN are not auto.
-                skipped += 1
-                continue
-
-            skipped += 1
+            db.session.add(
+                AuditLog(
+                    actor_user_id=None,
+                    action="escrow_violation",
+                    target_type="order",
+                    target_id=int(o.id),
+                    meta=json.dumps({
+                        "order_id": int(o.id),
+                        "status": status,
+                        "escrow_status": "HELD",
+                        "ts": _now().isoformat(),
+                    }),
+                )
+            )
         except Exception:
-            errors += 1
-            db.session.rollback()
+            pass
+        db.session.commit()
+        _event_once(int(o.id), "escrow_disputed", f"Escrow disputed due to status {status}")
+        return "disputed"
+
+    outcome = (o.inspection_outcome or "NONE").upper()
+    cond = (o.release_condition or "INSPECTION_PASS").upper()
 
+    # Refund is immediate on FAIL/FRAUD.
+    if outcome in ("FAIL", "FRAUD"):
+        if not _refund_escrow(o, settle_inspection=True):
+            return "error"
+        db.session.commit()
+        return "refunded"
+
+    if outcome == "PASS":
+        if cond == "INSPECTION_PASS":
+            if not _inspection_unlock_ready(int(o.id), batch):
+                return "parked"
+            return "released" if _release_escrow(o, batch) else "error"
+        if cond == "TIMEOUT":
+            held_at = o.escrow_held_at or o.created_at
+            timeout = timedelta(hours=int(o.release_timeout_hours or 48))
+            if held_at and _now() >= (held_at + timeout):
+                return "released" if _release_escrow(o, batch) else "error"
+        _settle_inspection_fee(o)
+        # BUYER_CONFIRM / ADMIN are not auto.
+        return "parked"
+
+    return "parked"
+
+
+def settle_order(order_id: int, claimed_until: datetime, *, worker: str = "", batch: SettlementBatch | None = None) -> dict:
+    """Evaluate one claimed order in its own transaction(s); returns its outcome row.
+
+    A settlement that fails rolls back only this order, which goes back on
+    the queue after RETRY_MINUTES. Orders left HELD are parked (see
+    escrow_queue.park_until); either way the claim is released. Pass the
+    chunk's SettlementBatch to skip the per-order lookups.
+    """
+    t0 = time.perf_counter()
+    error = None
+    now = _now()
     try:
+        o = Order.query.populate_existing().filter(Order.id == int(order_id)).first()
+        if o is None or (o.escrow_status or "NONE") != "HELD":
+            result = "skipped"
+        else:
+            result = _evaluate(o, batch)
+    except Exception as e:
+        db.session.rollback()
+        result, error = "error", (str(e) or "exception")[:240]
+    try:
+        if result == "parked":
+            escrow_queue.reschedule([{"b_id": int(order_id), "b_seen": claimed_until, "b_next": escrow_queue.park_until(o, now)}])
+        elif result == "error":
+            escrow_queue.reschedule([{"b_id": int(order_id), "b_seen": claimed_until, "b_next": escrow_queue.retry_at(now)}])
         db.session.commit()
     except Exception:
+        # The claim's lease lapses on its own and the order comes back.
         db.session.rollback()
-        errors += 1
+    return {
+        "order_id": int(order_id),
+        "worker": (worker or "")[:64],
+        "outcome": result,
+        "duration_ms": int((time.perf_counter() - t0) * 1000),
+        "error": error,
+        "created_at": now,
+    }
+
+
+def record_settlements(rows: list[dict]) -> None:
+    """Write per-order outcomes (escrow_settlements) in one INSERT."""
+    if not rows:
+        return
+    try:
+        db.session.execute(insert(EscrowSettlement), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+def run_escrow_automation(*, limit: int | None = None, chunk_size: int | None = None, worker: str | None = None) -> dict:
+    """Run escrow automation for HELD orders that are due (see app.utils.escrow_queue).
+
+    Rules:
+      - If inspection_outcome == PASS: release when release_condition allows.
+      - If inspection_outcome in (FAIL, FRAUD): refund.
+      - If inspection_outcome == PASS and release_condition == TIMEOUT: release after timeout.
+      - Otherwise: do nothing (the order is parked until something changes).
+
+    Claims CHUNK_SIZE due orders at a time and settles them one by one, each
+    in its own transaction, until none are left or `limit` orders were
+    processed. Safe to run next to app.jobs.escrow_worker processes: every
+    order is claimed by exactly one of them. HELD orders that never got a
+    due time (written outside the ORM) are queued first.
+    """
+
+    counts = {"released": 0, "refunded": 0, "skipped": 0, "errors": 0}
+    processed = 0
+    chunks = 0
+    size = int(chunk_size or CHUNK_SIZE)
+    worker = worker or f"inline:{os.getpid()}"
+    escrow_queue.schedule_unqueued()
+    while True:
+        n = size if limit is None else min(size, int(limit) - processed)
+        if n <= 0:
+            break
+        token = f"{worker}:{uuid4().hex[:12]}"[:64]
+        claimed = escrow_queue.claim_due(token, limit=n)
+        if not claimed:
+            break
+        chunks += 1
+        batch = SettlementBatch.prefetch(i for i, _ in claimed)
+        outcomes = []
+        for order_id, claimed_until in claimed:
+            processed += 1
+            row = settle_order(order_id, claimed_until, worker=worker, batch=batch)
+            outcomes.append(row)
+            counts[_TALLY.get(row["outcome"], "skipped")] += 1
+        record_settlements(outcomes)
+        if len(claimed) < n:
+            break
 
     return {
         "ok": True,
         "processed": processed,
-        "released": released,
-        "refunded": refunded,
-        "skipped": skipped,
-        "errors": errors,
+        **counts,
+        "chunks": chunks,
         "ts": _now().isoformat(),
     }
@@ -0,0 +1,191 @@
+"""Escrow settlement workers, safe to run as several processes at once.
+
+Each pass claims up to BATCH_SIZE due HELD orders (escrow_queue.claim_due:
+`FOR UPDATE SKIP LOCKED` on Postgres plus a guarded, token-tagged UPDATE),
+then settles them one at a time with escrow_runner.settle_order, each order
+in its own transaction, and writes the per-order outcomes and timings to
+escrow_settlements. A crash loses at most the order in hand, which comes
+back once its claim's lease (ESCROW_LEASE_SECONDS) lapses; ledger postings
+are idempotent per order, so a re-run never pays twice. Every
+ESCROW_BACKFILL_SECONDS a worker also queues HELD orders that were written
+without a due time (escrow_queue.schedule_unqueued).
+
+`python escrow_worker.py --workers N` runs N worker processes under
+supervise(), which restarts any that die. run_escrow_automation() (the
+admin/cron endpoint) claims from the same queue and can run alongside.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import case, func
+
+from app.extensions import db
+from app.jobs.escrow_runner import SettlementBatch, record_settlements, settle_order
+from app.models import EscrowSettlement, Order
+from app.utils import escrow_queue
+
+
+log = logging.getLogger("fliptrybe.escrow")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+BATCH_SIZE = _env_int("ESCROW_CLAIM_BATCH", 50)
+LOOP_SECONDS = _env_int("ESCROW_LOOP_SECONDS", 5)
+WORKERS = _env_int("ESCROW_WORKERS", 2)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"[:48]
+
+
+def run_once(*, worker: str | None = None, batch_size: int | None = None) -> dict:
+    """Claim one batch and settle it. Returns outcome counts for the batch."""
+    worker = worker or worker_id()
+    token = f"{worker}:{uuid4().hex[:12]}"[:64]
+    claimed = escrow_queue.claim_due(token, limit=batch_size or BATCH_SIZE)
+    counts: dict[str, int] = {}
+    t0 = time.perf_counter()
+    batch = SettlementBatch.prefetch(i for i, _ in claimed)
+    outcomes = []
+    for order_id, claimed_until in claimed:
+        row = settle_order(order_id, claimed_until, worker=worker, batch=batch)
+        outcomes.append(row)
+        counts[row["outcome"]] = counts.get(row["outcome"], 0) + 1
+    record_settlements(outcomes)
+    return {"claimed": len(claimed), "outcomes": counts, "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def run_forever(app, *, stop=None, once: bool = False) -> None:
+    stop = stop or threading.Event()
+    worker = worker_id()
+    log.info("escrow worker starting id=%s batch=%d", worker, BATCH_SIZE)
+    backfill_at = 0.0
+    while not stop.is_set():
+        claimed = 0
+        with app.app_context():
+            try:
+                if time.monotonic() >= backfill_at:
+                    queued = escrow_queue.schedule_unqueued()
+                    if queued:
+                        log.info("escrow queued %d unscheduled HELD orders", queued)
+                    backfill_at = time.monotonic() + escrow_queue.BACKFILL_SECONDS
+                res = run_once(worker=worker)
+                claimed = res["claimed"]
+                if claimed:
+                    log.info("escrow claimed=%d outcomes=%s seconds=%.2f", claimed, res["outcomes"], res["seconds"])
+            except Exception:
+                log.exception("escrow worker pass failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        if once:
+            break
+        # A full batch means there is probably more due: go again right away.
+        if claimed < BATCH_SIZE:
+            stop.wait(LOOP_SECONDS)
+    log.info("escrow worker stopped id=%s", worker)
+
+
+def _child_main(stop, once: bool) -> None:
+    # Runs in a fresh (spawned) process: own app, engine and connection pool.
+    from app import create_app
+    from app.jobs.scheduler import install_signal_handlers
+
+    logging.basicConfig(
+        level=os.getenv("ESCROW_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    install_signal_handlers(stop)
+    run_forever(create_app(), stop=stop, once=once)
+
+
+def supervise(workers: int = WORKERS, *, stop=None, once: bool = False, restart_delay: float = 2.0) -> None:
+    """Run `workers` worker processes until `stop` is set, restarting any that exit early."""
+    ctx = multiprocessing.get_context("spawn")
+    shared_stop = ctx.Event()
+    stop = stop or threading.Event()
+    procs: list = [None] * max(1, int(workers))
+
+    def start(i: int):
+        p = ctx.Process(target=_child_main, args=(shared_stop, once), name=f"escrow-worker-{i}", daemon=False)
+        p.start()
+        return p
+
+    for i in range(len(procs)):
+        procs[i] = start(i)
+    log.info("escrow supervisor started %d workers", len(procs))
+    try:
+        while not stop.is_set():
+            if once and not any(p.is_alive() for p in procs):
+                break
+            for i, p in enumerate(procs):
+                if p.is_alive() or once:
+                    continue
+                log.warning("escrow worker %s exited with %s; restarting", p.name, p.exitcode)
+                procs[i] = start(i)
+            stop.wait(restart_delay)
+    finally:
+        shared_stop.set()
+        for p in procs:
+            p.join(timeout=30)
+            if p.is_alive():
+                p.terminate()
+        log.info("escrow supervisor stopped")
+
+
+def settlement_stats(window_minutes: int = 15) -> dict:
+    """Due backlog and recent per-order outcomes/timings, from the tables (all workers)."""
+    now = datetime.utcnow()
+    since = now - timedelta(minutes=int(window_minutes))
+    due = (
+        db.session.query(func.count(Order.id), func.min(Order.next_escrow_eval_at))
+        .filter(Order.escrow_status == "HELD", Order.next_escrow_eval_at <= now)
+        .one()
+    )
+    outcomes = {}
+    for outcome, n, avg_ms, max_ms in (
+        db.session.query(
+            EscrowSettlement.outcome,
+            func.count(EscrowSettlement.id),
+            func.avg(EscrowSettlement.duration_ms),
+            func.max(EscrowSettlement.duration_ms),
+        )
+        .filter(EscrowSettlement.created_at >= since)
+        .group_by(EscrowSettlement.outcome)
+        .all()
+    ):
+        outcomes[outcome] = {"count": int(n or 0), "avg_ms": round(float(avg_ms or 0.0), 1), "max_ms": int(max_ms or 0)}
+    workers = (
+        db.session.query(
+            EscrowSettlement.worker,
+            func.count(EscrowSettlement.id),
+            func.sum(case((EscrowSettlement.outcome == "error", 1), else_=0)),
+        )
+        .filter(EscrowSettlement.created_at >= since)
+        .group_by(EscrowSettlement.worker)
+        .all()
+    )
+    settled = sum(v["count"] for v in outcomes.values())
+    return {
+        "window_minutes": int(window_minutes),
+        "due": int(due[0] or 0),
+        "oldest_due_seconds": int((now - due[1]).total_seconds()) if due[1] else 0,
+        "settled": settled,
+        "per_min": round(settled / float(window_minutes), 1),
+        "outcomes": outcomes,
+        "workers": {w or "": {"settled": int(n or 0), "errors": int(e or 0)} for w, n, e in workers},
+    }
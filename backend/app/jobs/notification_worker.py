@@ -0,0 +1,350 @@
+"""Notification queue consumer, safe to run as several workers at once.
+
+Each pass:
+  1. returns rows whose claim lease lapsed (worker died mid-batch) to "queued";
+  2. claims up to BATCH_SIZE due rows: `SELECT ... FOR UPDATE SKIP LOCKED` on
+     Postgres, then a guarded UPDATE to status="sending" with this batch's
+     token and a lease long enough for the whole batch to time out (see
+     lease_seconds). On SQLite (no SKIP LOCKED) the guarded UPDATE alone
+     decides which worker wins a row;
+  3. sends on a per-channel thread pool (NOTIFY_<CHANNEL>_CONCURRENCY) over
+     termii_client's pooled session; send threads never touch the DB;
+  4. collects outcomes as sends finish and writes them back as one bulk
+     UPDATE + commit per COMMIT_EVERY rows. Each write only touches rows
+     still held under this batch's token (a row whose lease lapsed and was
+     re-claimed elsewhere keeps the other worker's result) and renews the
+     lease on the rows still in flight.
+
+The poll is `status = 'queued' AND next_attempt_at <= now`, a range scan on
+ix_notification_queue_status_next_attempt.
+
+Run it standalone with `python notification_worker.py`; the scheduler's
+"notifications" job calls run_once() too, and the two can coexist.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from app.extensions import db
+from app.models import NotificationQueue
+from app.utils.termii_client import request_timeout, send_termii_message
+
+
+log = logging.getLogger("fliptrybe.notifications")
+
+PROVIDER_CHANNELS = ("sms", "whatsapp")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+BATCH_SIZE = _env_int("NOTIFY_BATCH_SIZE", 200)
+COMMIT_EVERY = _env_int("NOTIFY_COMMIT_EVERY", 50)
+LEASE_SECONDS = _env_int("NOTIFY_LEASE_SECONDS", 120)
+LOOP_SECONDS = _env_int("NOTIFY_LOOP_SECONDS", 2)
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def channel_concurrency(channel: str) -> int:
+    return _env_int(f"NOTIFY_{channel.upper()}_CONCURRENCY", 4)
+
+
+def _get_executor(channel: str) -> ThreadPoolExecutor:
+    with _executors_lock:
+        ex = _executors.get(channel)
+        if ex is None:
+            ex = ThreadPoolExecutor(max_workers=channel_concurrency(channel), thread_name_prefix=f"notify-{channel}")
+            _executors[channel] = ex
+        return ex
+
+
+def lease_seconds(batch_size: int = BATCH_SIZE) -> int:
+    """Claim lease for a batch: every send on the slowest channel timing out, plus a pass of slack.
+
+    NOTIFY_LEASE_SECONDS is the floor. The lease is also renewed on each
+    outcome commit, so it only has to cover the gap between two commits.
+    """
+    per_send = sum(request_timeout())
+    narrowest = min(channel_concurrency(ch) for ch in PROVIDER_CHANNELS)
+    rounds = -(-max(int(batch_size), 1) // narrowest)
+    return max(LEASE_SECONDS, int(rounds * per_send) + LOOP_SECONDS)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"[:48]
+
+
+def reclaim_expired(now: datetime | None = None) -> int:
+    """Put rows claimed by a worker that never finished back in the queue."""
+    now = now or datetime.utcnow()
+    try:
+        res = db.session.execute(
+            update(NotificationQueue)
+            .where(NotificationQueue.status == "sending", NotificationQueue.locked_until < now)
+            .values(status="queued", locked_by=None, locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return int(res.rowcount or 0)
+    except Exception:
+        db.session.rollback()
+        return 0
+
+
+def claim_batch(worker: str, limit: int = BATCH_SIZE) -> list[NotificationQueue]:
+    """Atomically take up to `limit` due rows for this worker."""
+    now = datetime.utcnow()
+    token = f"{worker}:{uuid4().hex[:12]}"
+    try:
+        ids = db.session.scalars(
+            select(NotificationQueue.id)
+            .where(NotificationQueue.status == "queued", NotificationQueue.next_attempt_at <= now)
+            .order_by(NotificationQueue.next_attempt_at.asc())
+            .limit(int(limit))
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            db.session.rollback()
+            return []
+        db.session.execute(
+            update(NotificationQueue)
+            .where(NotificationQueue.id.in_(ids), NotificationQueue.status == "queued")
+            .values(status="sending", locked_by=token, locked_until=now + timedelta(seconds=lease_seconds(limit)))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return []
+    return (
+        NotificationQueue.query
+        .filter(NotificationQueue.locked_by == token, NotificationQueue.status == "sending")
+        .order_by(NotificationQueue.next_attempt_at.asc())
+        .all()
+    )
+
+
+def send(channel: str, to: str, message: str) -> tuple[bool, str]:
+    """Deliver one message. No DB access."""
+    if channel in ("sms", "whatsapp"):
+        termii_channel = "whatsapp" if channel == "whatsapp" else "generic"
+        return send_termii_message(channel=termii_channel, to=to, message=message)
+    if channel == "in_app":
+        # frontend pulls
+        return True, ""
+    return False, f"Unsupported channel: {channel}"
+
+
+def _send_safe(channel: str, to: str, message: str) -> tuple[bool, str]:
+    try:
+        return send(channel, to, message)
+    except Exception as e:
+        return False, (str(e) or "exception")
+
+
+def _backoff(attempt_count: int, *, base_seconds: int = 15, max_seconds: int = 3600) -> timedelta:
+    # Same curve as NotificationQueue.schedule_next_attempt.
+    return timedelta(seconds=min(int(base_seconds * (2 ** max(int(attempt_count), 0))), int(max_seconds)))
+
+
+def _outcome(job: dict, ok: bool, detail: str, now: datetime) -> tuple[str, dict]:
+    """(tally key, column values) for one finished send."""
+    values = {"id": job["id"], "locked_by": None, "locked_until": None}
+    if ok:
+        values.update(status="sent", sent_at=now, last_error=None)
+        return "sent", values
+
+    attempts = job["attempt_count"] + 1
+    values.update(attempt_count=attempts, last_error=(detail or "send_failed")[:240])
+    if attempts >= job["max_attempts"]:
+        values.update(status="dead", dead_lettered_at=now, next_attempt_at=None)
+        return "dead", values
+    # back in the queue for a later retry
+    values.update(status="queued", next_attempt_at=now + _backoff(attempts))
+    return "failed", values
+
+
+def _flush(values: list[dict], token: str, lease: int) -> None:
+    """Write outcomes for rows this batch still holds, and renew its lease on the rest."""
+    if not values:
+        return
+    table = NotificationQueue.__table__
+    held = (table.c.status == "sending", table.c.locked_by == token)
+    # One executemany per outcome shape (sent / retry / dead set different columns).
+    shapes: dict[tuple, list[dict]] = {}
+    for v in values:
+        shapes.setdefault(tuple(sorted(k for k in v if k != "id")), []).append(v)
+    written = 0
+    try:
+        for cols, group in shapes.items():
+            res = db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"), *held)
+                .values({c: bindparam(c) for c in cols}),
+                [{"b_id": v["id"], **{c: v[c] for c in cols}} for v in group],
+            )
+            written += max(int(res.rowcount or 0), 0)
+        db.session.execute(
+            update(table).where(*held).values(locked_until=datetime.utcnow() + timedelta(seconds=lease))
+        )
+        db.session.commit()
+    except Exception:
+        # Rows stay "sending" and come back once their lease lapses.
+        db.session.rollback()
+        log.exception("notification outcome commit failed")
+        return
+    if written < len(values):
+        log.warning("dropped %d notification outcomes: claim lapsed and was taken over", len(values) - written)
+
+
+def process_batch(rows: list[NotificationQueue]) -> dict:
+    """Send claimed rows and record outcomes, committing every COMMIT_EVERY rows."""
+    token = rows[0].locked_by if rows else ""
+    lease = lease_seconds(len(rows))
+    jobs = [
+        {
+            "id": int(r.id),
+            "channel": (r.channel or "").strip().lower(),
+            "to": r.to,
+            "message": r.message,
+            "attempt_count": int(r.attempt_count or 0),
+            "max_attempts": int(r.max_attempts or 5),
+        }
+        for r in rows
+    ]
+    per_channel: dict[str, dict] = {}
+    pending: list[dict] = []
+    t0 = time.perf_counter()
+
+    def record(job: dict, ok: bool, detail: str) -> None:
+        key, values = _outcome(job, ok, detail, datetime.utcnow())
+        c = per_channel.setdefault(job["channel"], {"sent": 0, "failed": 0, "dead": 0})
+        c[key] += 1
+        pending.append(values)
+        if len(pending) >= COMMIT_EVERY:
+            _flush(pending, token, lease)
+            pending.clear()
+
+    futures = {}
+    for job in jobs:
+        if job["channel"] in PROVIDER_CHANNELS:
+            futures[_get_executor(job["channel"]).submit(_send_safe, job["channel"], job["to"], job["message"])] = job
+        else:
+            record(job, *_send_safe(job["channel"], job["to"], job["message"]))
+    for fut in as_completed(futures):
+        record(futures[fut], *fut.result())
+    _flush(pending, token, lease)
+
+    seconds = max(time.perf_counter() - t0, 1e-6)
+    for c in per_channel.values():
+        c["per_sec"] = round((c["sent"] + c["failed"] + c["dead"]) / seconds, 1)
+    return {
+        "claimed": len(rows),
+        "sent": sum(c["sent"] for c in per_channel.values()),
+        "failed": sum(c["failed"] for c in per_channel.values()),
+        "dead": sum(c["dead"] for c in per_channel.values()),
+        "seconds": round(seconds, 3),
+        "channels": per_channel,
+    }
+
+
+def run_once(*, worker: str | None = None, batch_size: int | None = None) -> dict:
+    reclaim_expired()
+    rows = claim_batch(worker or worker_id(), batch_size or BATCH_SIZE)
+    if not rows:
+        return {"claimed": 0, "sent": 0, "failed": 0, "dead": 0, "seconds": 0.0, "channels": {}}
+    return process_batch(rows)
+
+
+def queue_stats(window_minutes: int = 5) -> dict:
+    """Backlog depth and recent throughput per channel, from the table (all workers)."""
+    now = datetime.utcnow()
+    since = now - timedelta(minutes=int(window_minutes))
+    channels: dict[str, dict] = {}
+
+    def slot(ch) -> dict:
+        return channels.setdefault((ch or "").strip().lower(), {
+            "queued_due": 0, "queued_later": 0, "sending": 0, "sent_recent": 0, "sent_per_min": 0.0,
+        })
+
+    due = func.sum(case((NotificationQueue.next_attempt_at <= now, 1), else_=0))
+    for ch, total, n_due in (
+        db.session.query(NotificationQueue.channel, func.count(NotificationQueue.id), due)
+        .filter(NotificationQueue.status == "queued")
+        .group_by(NotificationQueue.channel)
+        .all()
+    ):
+        s = slot(ch)
+        s["queued_due"] += int(n_due or 0)
+        s["queued_later"] += int(total or 0) - int(n_due or 0)
+    for ch, n in (
+        db.session.query(NotificationQueue.channel, func.count(NotificationQueue.id))
+        .filter(NotificationQueue.status == "sending")
+        .group_by(NotificationQueue.channel)
+        .all()
+    ):
+        slot(ch)["sending"] += int(n or 0)
+    for ch, n in (
+        db.session.query(NotificationQueue.channel, func.count(NotificationQueue.id))
+        .filter(NotificationQueue.status == "sent", NotificationQueue.sent_at >= since)
+        .group_by(NotificationQueue.channel)
+        .all()
+    ):
+        s = slot(ch)
+        s["sent_recent"] += int(n or 0)
+        s["sent_per_min"] = round(s["sent_recent"] / float(window_minutes), 1)
+
+    oldest = (
+        db.session.query(func.min(NotificationQueue.next_attempt_at))
+        .filter(NotificationQueue.status == "queued", NotificationQueue.next_attempt_at <= now)
+        .scalar()
+    )
+    return {
+        "window_minutes": int(window_minutes),
+        "backlog": sum(c["queued_due"] for c in channels.values()),
+        "oldest_due_seconds": int((now - oldest).total_seconds()) if oldest else 0,
+        "channels": channels,
+    }
+
+
+def run_forever(app, *, stop: threading.Event | None = None, once: bool = False) -> None:
+    stop = stop or threading.Event()
+    worker = worker_id()
+    log.info("notification worker starting id=%s batch=%d", worker, BATCH_SIZE)
+    while not stop.is_set():
+        claimed = 0
+        with app.app_context():
+            try:
+                res = run_once(worker=worker)
+                claimed = res["claimed"]
+                if claimed:
+                    log.info(
+                        "notifications claimed=%d sent=%d failed=%d dead=%d seconds=%.2f channels=%s",
+                        claimed, res["sent"], res["failed"], res["dead"], res["seconds"], res["channels"],
+                    )
+            except Exception:
+                log.exception("notification worker pass failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        if once:
+            break
+        # A full batch means there is probably more waiting: go again right away.
+        if claimed < BATCH_SIZE:
+            stop.wait(LOOP_SECONDS)
+    log.info("notification worker stopped id=%s", worker)
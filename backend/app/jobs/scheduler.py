@@ -0,0 +1,274 @@
+"""Autopilot scheduler worker.
+
+Runs each autopilot job on its own interval in a dedicated process
+(`python scheduler.py`), instead of piggy-backing on user requests.
+
+Leader election: every replica loops, but only the one holding the
+`scheduler_leases` row (renewed every loop, expires after LEASE_TTL) runs
+jobs; if the leader dies its lease lapses and another replica takes over.
+While a job runs, a heartbeat thread keeps renewing the lease every
+HEARTBEAT_SECONDS, so a job longer than the TTL does not hand leadership to
+another replica mid-run.
+
+Each run is recorded in `scheduler_job_stats` (runs, failures, durations,
+last result) and logged as one line.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import SchedulerJobStat, SchedulerLease
+from app.utils import autopilot
+
+
+log = logging.getLogger("fliptrybe.scheduler")
+
+LEASE_NAME = "autopilot"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+LEASE_TTL_SECONDS = _env_int("SCHEDULER_LEASE_TTL", 90)
+LOOP_SECONDS = _env_int("SCHEDULER_LOOP_SECONDS", 5)
+HEARTBEAT_SECONDS = max(1, LEASE_TTL_SECONDS // 3)
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    interval_seconds: int
+    fn: Callable[[], dict]
+
+
+def default_jobs() -> list[ScheduledJob]:
+    """Autopilot jobs; intervals are overridable with SCHEDULER_<NAME>_SECONDS."""
+    return [
+        ScheduledJob("payouts", _env_int("SCHEDULER_PAYOUTS_SECONDS", 30), autopilot.process_payouts),
+        ScheduledJob("notifications", _env_int("SCHEDULER_NOTIFICATIONS_SECONDS", 10), autopilot.process_notification_queue),
+        ScheduledJob("driver_assignment", _env_int("SCHEDULER_DRIVER_ASSIGNMENT_SECONDS", 30), autopilot.auto_assign_drivers),
+        ScheduledJob("platform_fee_rollup", _env_int("SCHEDULER_PLATFORM_FEE_ROLLUP_SECONDS", 60), autopilot.rollup_platform_fees),
+        ScheduledJob("wallet_reconcile", _env_int("SCHEDULER_WALLET_RECONCILE_SECONDS", 3600), autopilot.nightly_wallet_reconcile),
+    ]
+
+
+def holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+def acquire_lease(name: str, holder: str, ttl_seconds: int = LEASE_TTL_SECONDS) -> bool:
+    """Take or renew the named lease. True when `holder` owns it afterwards."""
+    now = datetime.utcnow()
+    expires = now + timedelta(seconds=int(ttl_seconds))
+    try:
+        res = db.session.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == name)
+            .where(or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now))
+            .values(holder=holder, expires_at=expires, renewed_at=now)
+        )
+        if res.rowcount:
+            db.session.commit()
+            return True
+        db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        return False
+
+    # No row yet (or held by someone else: the insert below then conflicts).
+    try:
+        db.session.add(SchedulerLease(name=name, holder=holder, expires_at=expires, acquired_at=now, renewed_at=now))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    except Exception:
+        db.session.rollback()
+        return False
+
+
+def release_lease(name: str, holder: str) -> None:
+    try:
+        SchedulerLease.query.filter_by(name=name, holder=holder).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+class LeaseHeartbeat:
+    """Renew a lease from a background thread for the duration of a `with` block.
+
+    The thread uses its own app context (and so its own session). A failed
+    renewal is retried on the next beat; `lost` is set only once no renewal
+    has succeeded for a whole TTL, i.e. another replica may have taken over.
+    """
+
+    def __init__(self, app, name: str, holder: str, *, every: int = HEARTBEAT_SECONDS, ttl_seconds: int = LEASE_TTL_SECONDS):
+        self.app = app
+        self.name = name
+        self.holder = holder
+        self.every = every
+        self.ttl_seconds = ttl_seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-heartbeat-{name}", daemon=True)
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        renewed = time.monotonic()
+        while not self._stop.wait(self.every):
+            with self.app.app_context():
+                try:
+                    ok = acquire_lease(self.name, self.holder, self.ttl_seconds)
+                finally:
+                    db.session.remove()
+            if ok:
+                renewed = time.monotonic()
+            elif time.monotonic() - renewed >= self.ttl_seconds:
+                log.warning("scheduler holder=%s lost lease %s during a job", self.holder, self.name)
+                self.lost.set()
+                return
+
+
+def _record(name: str, *, started: datetime, duration_ms: int, result: dict | None, error: str | None) -> None:
+    try:
+        stat = db.session.get(SchedulerJobStat, name)
+        if stat is None:
+            stat = SchedulerJobStat(name=name, runs=0, failures=0, total_duration_ms=0)
+            db.session.add(stat)
+        stat.runs = int(stat.runs or 0) + 1
+        stat.total_duration_ms = int(stat.total_duration_ms or 0) + int(duration_ms)
+        stat.last_started_at = started
+        stat.last_finished_at = datetime.utcnow()
+        stat.last_duration_ms = int(duration_ms)
+        if error is None:
+            stat.last_status = "ok"
+            stat.last_error = None
+            stat.last_result_json = json.dumps(result, default=str)[:4000] if result is not None else None
+        else:
+            stat.last_status = "error"
+            stat.failures = int(stat.failures or 0) + 1
+            stat.last_error = error[:240]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+def run_job(job: ScheduledJob) -> dict:
+    """Run one job, publish its metrics, and return {"ok", "duration_ms", "result"|"error"}."""
+    started = datetime.utcnow()
+    t0 = time.perf_counter()
+    result = None
+    error = None
+    try:
+        result = job.fn()
+    except Exception as e:
+        db.session.rollback()
+        error = str(e) or e.__class__.__name__
+    duration_ms = int((time.perf_counter() - t0) * 1000)
+    _record(job.name, started=started, duration_ms=duration_ms, result=result, error=error)
+    log.info("scheduler job=%s status=%s duration_ms=%d result=%s", job.name, "ok" if error is None else "error", duration_ms, result if error is None else error)
+    out = {"ok": error is None, "duration_ms": duration_ms}
+    if error is None:
+        out["result"] = result
+    else:
+        out["error"] = error
+    return out
+
+
+def run_due(jobs: list[ScheduledJob], next_due: dict[str, float], *, holder: str) -> dict:
+    """Run every job whose interval has elapsed, heartbeating the lease while each one runs."""
+    ran = {}
+    settings = autopilot.get_settings()
+    if not settings.enabled:
+        return ran
+    app = current_app._get_current_object()
+    for job in jobs:
+        now = time.monotonic()
+        if now < next_due.get(job.name, 0.0):
+            continue
+        with LeaseHeartbeat(app, LEASE_NAME, holder) as heartbeat:
+            ran[job.name] = run_job(job)
+        next_due[job.name] = time.monotonic() + job.interval_seconds
+        if heartbeat.lost.is_set() or not acquire_lease(LEASE_NAME, holder):
+            break
+    if ran:
+        try:
+            settings = autopilot.get_settings()
+            settings.last_run_at = datetime.utcnow()
+            db.session.add(settings)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+    return ran
+
+
+def run_forever(app, *, jobs: list[ScheduledJob] | None = None, stop: threading.Event | None = None, once: bool = False) -> None:
+    jobs = jobs or default_jobs()
+    stop = stop or threading.Event()
+    holder = holder_id()
+    next_due: dict[str, float] = {}
+    leader = False
+
+    log.info("scheduler starting holder=%s jobs=%s", holder, ",".join(f"{j.name}/{j.interval_seconds}s" for j in jobs))
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                got = acquire_lease(LEASE_NAME, holder)
+                if got != leader:
+                    log.info("scheduler holder=%s leader=%s", holder, got)
+                    leader = got
+                    next_due.clear()
+                if leader:
+                    run_due(jobs, next_due, holder=holder)
+            except Exception:
+                log.exception("scheduler loop failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        if once:
+            break
+        stop.wait(LOOP_SECONDS)
+
+    if leader:
+        with app.app_context():
+            release_lease(LEASE_NAME, holder)
+            db.session.remove()
+    log.info("scheduler stopped holder=%s", holder)
+
+
+def install_signal_handlers(stop: threading.Event) -> None:
+    def _handle(signum, frame):
+        stop.set()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            signal.signal(sig, _handle)
+        except Exception:
+            pass
@@ -1,76 +1,175 @@
+"""Wallet reconciliation: ledger (wallet_txns) vs stored balance.
+
+A pass walks wallets in id order, CHUNK_SIZE at a time. Per chunk:
+  - one grouped query sums, per wallet, only the txns after that wallet's
+    checkpoint (wallet_reconcile_checkpoints: "credits - debits up to txn id
+    X is Y"), so later passes read just the new txns;
+  - computed = checkpoint sum + new txns, compared with wallets.balance
+    plus fee credits still pending in platform_fee_shards;
+  - checkpoints advance and anomalies are written as bulk statements, one
+    commit per chunk.
+
+Checkpoints only advance over txns older than SETTLE_SECONDS: txn ids are
+assigned at insert, so a recent lower id may still commit after a higher one.
+
+This does NOT auto-correct balances. Anomalies go to AuditLog
+(action="wallet_anomaly") so they are visible.
+"""
 from __future__ import annotations
 
 import json
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, insert, select, update
 
 from app.extensions import db
-from sqlalchemy import func
-from app.models import Wallet, WalletTxn, AuditLog
+from app.models import AuditLog, Wallet, WalletReconcileCheckpoint, WalletTxn
+from app.utils.platform_fees import pending_by_wallet
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+CHUNK_SIZE = _env_int("WALLET_RECONCILE_CHUNK", 5000)
+SETTLE_SECONDS = _env_int("WALLET_RECONCILE_SETTLE_SECONDS", 300)
 
 
-def _sum_ledger(wallet_id: int) -> float:
-    credits = db.session.query(func.coalesce(func.sum(WalletTxn.amount), 0.0)).filter(
-        WalletTxn.wallet_id == int(wallet_id),
-        WalletTxn.direction == "credit",
-    ).scalar() or 0.0
-    debits = db.session.query(func.coalesce(func.sum(WalletTxn.amount), 0.0)).filter(
-        WalletTxn.wallet_id == int(wallet_id),
-        WalletTxn.direction == "debit",
-    ).scalar() or 0.0
-    return float(credits) - float(debits)
+def _settled_txn_id(now: datetime) -> int:
+    """Highest txn id old enough that no lower id can still be in flight."""
+    return int(
+        db.session.query(func.coalesce(func.max(WalletTxn.id), 0))
+        .filter(WalletTxn.created_at < now - timedelta(seconds=SETTLE_SECONDS))
+        .scalar() or 0
+    )
 
 
-def reconcile_wallets(*, limit: int = 500, tolerance: float = 0.01) -> dict:
-    """Detect wallet anomalies (ledger vs stored balance).
+def _ledger_deltas(lo: int, hi: int, settled_id: int) -> dict[int, tuple[float, float, int]]:
+    """wallet_id -> (sum after checkpoint, settled part of it, last settled txn id) for wallets lo..hi."""
+    signed = case((WalletTxn.direction == "credit", WalletTxn.amount), else_=-WalletTxn.amount)
+    settled = WalletTxn.id <= settled_id
+    cp = WalletReconcileCheckpoint
+    rows = db.session.execute(
+        select(
+            WalletTxn.wallet_id,
+            func.sum(signed),
+            func.sum(case((settled, signed), else_=0.0)),
+            func.max(case((settled, WalletTxn.id), else_=0)),
+        )
+        .outerjoin(cp, cp.wallet_id == WalletTxn.wallet_id)
+        .where(
+            WalletTxn.wallet_id.between(lo, hi),
+            WalletTxn.direction.in_(("credit", "debit")),
+            WalletTxn.id > func.coalesce(cp.verified_txn_id, 0),
+        )
+        .group_by(WalletTxn.wallet_id)
+    ).all()
+    return {int(wid): (float(total or 0.0), float(part or 0.0), int(last or 0)) for wid, total, part, last in rows}
 
-    This does NOT auto-correct balances. It logs anomalies into AuditLog so they are visible.
+
+def reconcile_wallets(*, limit: int | None = None, after_id: int = 0, tolerance: float = 0.01) -> dict:
+    """Detect wallet anomalies (ledger vs stored balance) for wallets with id > after_id.
+
+    limit=None runs a full pass; otherwise stop after `limit` wallets and
+    resume from the returned next_after_id (None once the pass is complete).
     """
     checked = 0
     anomalies = 0
+    checkpoints = 0
     now = datetime.utcnow()
+    settled_id = _settled_txn_id(now)
+    cursor = int(after_id or 0)
+    done = False
 
-    wallets = Wallet.query.order_by(Wallet.id.asc()).limit(int(limit)).all()
-
-    for w in wallets:
-        checked += 1
+    while not done:
+        size = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, int(limit) - checked)
+        if size <= 0:
+            break
+        wallets = db.session.execute(
+            select(Wallet.id, Wallet.user_id, Wallet.balance, Wallet.reserved_balance, Wallet.currency)
+            .where(Wallet.id > cursor)
+            .order_by(Wallet.id.asc())
+            .limit(size)
+        ).all()
+        if len(wallets) < size:
+            done = True
+        if not wallets:
+            break
+        lo, hi = int(wallets[0][0]), int(wallets[-1][0])
         try:
-            computed = _sum_ledger(int(w.id))
-            stored = float(w.balance or 0.0)
-            reserved = float(w.reserved_balance or 0.0)
-
-            issues = []
-            if abs(computed - stored) > float(tolerance):
-                issues.append("ledger_mismatch")
-            if reserved < -0.0001:
-                issues.append("negative_reserved")
-            if reserved - stored > float(tolerance):
-                issues.append("reserved_exceeds_balance")
-
-            if not issues:
-                continue
-
-            anomalies += 1
-            meta = {
-                "issues": issues,
-                "wallet_id": int(w.id),
-                "user_id": int(w.user_id),
-                "computed_balance": round(computed, 4),
-                "stored_balance": round(stored, 4),
-                "reserved_balance": round(reserved, 4),
-                "currency": w.currency or "NGN",
-                "at": now.isoformat(),
+            cps = {
+                int(c.wallet_id): (int(c.verified_txn_id or 0), float(c.verified_sum or 0.0))
+                for c in db.session.execute(
+                    select(WalletReconcileCheckpoint.wallet_id, WalletReconcileCheckpoint.verified_txn_id, WalletReconcileCheckpoint.verified_sum)
+                    .where(WalletReconcileCheckpoint.wallet_id.between(lo, hi))
+                )
             }
-            log = AuditLog(
-                actor_user_id=None,
-                action="wallet_anomaly",
-                target_type="wallet",
-                target_id=int(w.id),
-                meta=json.dumps(meta),
-                created_at=now,
-            )
-            db.session.add(log)
+            deltas = _ledger_deltas(lo, hi, settled_id)
+            # Fee credits not yet rolled up are in the ledger but not in wallets.balance.
+            pending = pending_by_wallet([int(w[0]) for w in wallets])
+
+            logs, cp_new, cp_moved = [], [], []
+            for wid, user_id, balance, reserved, currency in wallets:
+                wid = int(wid)
+                base_id, base_sum = cps.get(wid, (0, 0.0))
+                total, settled_part, last_settled = deltas.get(wid, (0.0, 0.0, 0))
+                computed = base_sum + total
+                stored = float(balance or 0.0) + pending.get(wid, 0.0)
+                reserved = float(reserved or 0.0)
+
+                if last_settled > base_id:
+                    row = {"wallet_id": wid, "verified_txn_id": last_settled, "verified_sum": base_sum + settled_part, "checked_at": now}
+                    (cp_moved if wid in cps else cp_new).append(row)
+
+                issues = []
+                if abs(computed - stored) > float(tolerance):
+                    issues.append("ledger_mismatch")
+                if reserved < -0.0001:
+                    issues.append("negative_reserved")
+                if reserved - stored > float(tolerance):
+                    issues.append("reserved_exceeds_balance")
+                if not issues:
+                    continue
+                logs.append({
+                    "actor_user_id": None,
+                    "action": "wallet_anomaly",
+                    "target_type": "wallet",
+                    "target_id": wid,
+                    "meta": json.dumps({
+                        "issues": issues,
+                        "wallet_id": wid,
+                        "user_id": int(user_id),
+                        "computed_balance": round(computed, 4),
+                        "stored_balance": round(stored, 4),
+                        "reserved_balance": round(reserved, 4),
+                        "currency": currency or "NGN",
+                        "at": now.isoformat(),
+                    }),
+                    "created_at": now,
+                })
+
+            if cp_new:
+                db.session.execute(insert(WalletReconcileCheckpoint), cp_new)
+            if cp_moved:
+                # ORM bulk UPDATE by primary key
+                db.session.execute(update(WalletReconcileCheckpoint), cp_moved)
+            if logs:
+                db.session.execute(insert(AuditLog), logs)
             db.session.commit()
+            anomalies += len(logs)
+            checkpoints += len(cp_new) + len(cp_moved)
         except Exception:
             db.session.rollback()
+        checked += len(wallets)
+        cursor = hi
 
-    return {"checked": checked, "anomalies": anomalies}
+    return {
+        "checked": checked,
+        "anomalies": anomalies,
+        "checkpoints": checkpoints,
+        "next_after_id": None if done else cursor,
+    }
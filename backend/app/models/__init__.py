@@ -1,5 +1,8 @@
 from .user import User  # noqa: F401
 from .listing import Listing  # noqa: F401
+from .listing_location_count import ListingLocationCount  # noqa: F401
+from .cache_generation import CacheGeneration  # noqa: F401
+from .background_job import BackgroundJob  # noqa: F401
 from .merchant import MerchantProfile  # noqa: F401
 from .order import Order  # noqa: F401
 from .order_event import OrderEvent  # noqa: F401
@@ -16,11 +19,15 @@ from .kyc import KycRequest  # noqa: F401
 from .otp_attempt import OTPAttempt  # noqa: F401
 from .availability_confirmation import AvailabilityConfirmation  # noqa: F401
 from .escrow_unlock import EscrowUnlock  # noqa: F401
+from .escrow_settlement import EscrowSettlement  # noqa: F401
 from .qr_challenge import QRChallenge  # noqa: F401
 from .inspection_ticket import InspectionTicket  # noqa: F401
 
 from .wallet import Wallet  # noqa: F401
 from .wallet_txn import WalletTxn  # noqa: F401
+from .platform_fee_shard import PlatformFeeShard  # noqa: F401
+from .wallet_reconcile_checkpoint import WalletReconcileCheckpoint  # noqa: F401
+from .risk_daily_counter import RiskDailyCounter  # noqa: F401
 from .payout import PayoutRequest  # noqa: F401
 from .commission_rule import CommissionRule  # noqa: F401
 from .moneybox import MoneyBoxAccount, MoneyBoxLedger  # noqa: F401
@@ -30,6 +37,7 @@ from .account_flag import AccountFlag  # noqa: F401
 from .notification_queue import NotificationQueue  # noqa: F401
 
 from .autopilot_settings import AutopilotSettings  # noqa: F401
+from .scheduler import SchedulerLease, SchedulerJobStat  # noqa: F401
 
 from .audit_log import AuditLog  # noqa: F401
 
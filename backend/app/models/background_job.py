@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+
+from app.extensions import db
+
+
+class BackgroundJob(db.Model):
+    """A long-running operation clients poll by id (bulk imports, maintenance tasks)."""
+    __tablename__ = "background_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False, index=True)
+    owner_id = db.Column(db.Integer, nullable=True, index=True)
+
+    # queued -> running -> succeeded / failed
+    status = db.Column(db.String(16), nullable=False, default="queued")
+
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    succeeded = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+
+    # JSON list of per-item results
+    results_json = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(240), nullable=True)
+
+    # Chunked maintenance jobs: JSON params (e.g. dry_run) and the last primary key committed.
+    params_json = db.Column(db.Text, nullable=True)
+    checkpoint = db.Column(db.String(64), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    # Heartbeat: bumped on every committed chunk; a stale running job is resumable.
+    updated_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def results(self) -> list:
+        try:
+            data = json.loads(self.results_json or "[]")
+            return data if isinstance(data, list) else []
+        except Exception:
+            return []
+
+    def params(self) -> dict:
+        try:
+            data = json.loads(self.params_json or "{}")
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def to_dict(self, *, include_results: bool = False):
+        out = {
+            "id": int(self.id),
+            "kind": self.kind,
+            "owner_id": int(self.owner_id) if self.owner_id is not None else None,
+            "status": self.status,
+            "total": int(self.total or 0),
+            "processed": int(self.processed or 0),
+            "succeeded": int(self.succeeded or 0),
+            "failed": int(self.failed or 0),
+            "error": self.error or "",
+            "params": self.params(),
+            "checkpoint": self.checkpoint,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_results:
+            out["results"] = self.results()
+        return out
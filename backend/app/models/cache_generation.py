@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class CacheGeneration(db.Model):
+    """Monotonic per-scope write counter (e.g. "listings", "shortlets") used to key response caches."""
+    __tablename__ = "cache_generations"
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
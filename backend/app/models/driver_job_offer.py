@@ -5,6 +5,11 @@ from app.extensions import db
 
 class DriverJobOffer(db.Model):
     __tablename__ = "driver_job_offers"
+    __table_args__ = (
+        db.Index("ix_driver_job_offers_order_id", "order_id"),
+        db.Index("ix_driver_job_offers_driver_status", "driver_id", "status"),
+        db.Index("ix_driver_job_offers_status_created", "status", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, nullable=False)
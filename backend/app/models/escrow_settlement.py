@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class EscrowSettlement(db.Model):
+    """One escrow runner pass over one order: who ran it, what happened, how long it took."""
+    __tablename__ = "escrow_settlements"
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
+
+    worker = db.Column(db.String(64), nullable=True)
+    outcome = db.Column(db.String(16), nullable=False)  # released/refunded/disputed/parked/error
+    duration_ms = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(240), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            "id": int(self.id),
+            "order_id": int(self.order_id),
+            "worker": self.worker or "",
+            "outcome": self.outcome,
+            "duration_ms": int(self.duration_ms or 0),
+            "error": self.error or "",
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
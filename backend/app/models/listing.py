@@ -1,10 +1,21 @@
 from datetime import datetime
 
+from sqlalchemy import event
+
 from app.extensions import db
+from app.utils.geo import geohash_or_none
+from app.utils.images import variant_urls
 
 
 class Listing(db.Model):
     __tablename__ = "listings"
+    __table_args__ = (
+        # Keyset pagination: newest-first pages served as index range scans.
+        db.Index("ix_listings_active_created_id", "is_active", "created_at", "id"),
+        db.Index("ix_listings_created_id", "created_at", "id"),
+        # Radius search: geohash prefix ranges, then lat/lng bounding box.
+        db.Index("ix_listings_geohash", "geohash"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -22,6 +33,11 @@ class Listing(db.Model):
     city = db.Column(db.String(64), nullable=True)
     locality = db.Column(db.String(64), nullable=True)
 
+    # Optional pin; geohash is derived on write (see _sync_geohash below)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)
+
     # Keep float for now (matches your current usage)
     price = db.Column(db.Float, nullable=False, default=0.0)
 
@@ -72,6 +88,8 @@ class Listing(db.Model):
             "state": (self.state or ""),
             "city": (self.city or ""),
             "locality": (self.locality or ""),
+            "latitude": float(self.latitude) if self.latitude is not None else None,
+            "longitude": float(self.longitude) if self.longitude is not None else None,
             "title": self.title,
             "description": self.description or "",
             "price": float(final_price),
@@ -80,6 +98,13 @@ class Listing(db.Model):
             "final_price": float(final_price),
             "image": image,            # frontend expects this
             "image_path": stored,      # keep raw stored value for compatibility
+            "image_variants": variant_urls(stored, base_url),  # {} for legacy/external images
             "is_active": bool(getattr(self, "is_active", True)),
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+@event.listens_for(Listing, "before_insert")
+@event.listens_for(Listing, "before_update")
+def _sync_geohash(mapper, connection, target):
+    target.geohash = geohash_or_none(target.latitude, target.longitude)
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class ListingLocationCount(db.Model):
+    """Rollup of active listings per (state, city), maintained on listing writes."""
+    __tablename__ = "listing_location_counts"
+    __table_args__ = (
+        db.UniqueConstraint("state", "city", name="uq_listing_location_counts_state_city"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    state = db.Column(db.String(64), nullable=False)
+    city = db.Column(db.String(64), nullable=False, default="")
+    count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "state": self.state or "",
+            "city": self.city or "",
+            "count": int(self.count or 0),
+        }
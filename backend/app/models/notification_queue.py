@@ -5,22 +5,30 @@ from app.extensions import db
 
 class NotificationQueue(db.Model):
     __tablename__ = "notification_queue"
+    __table_args__ = (
+        # The worker's poll: status = 'queued' AND next_attempt_at <= now.
+        db.Index("ix_notification_queue_status_next_attempt", "status", "next_attempt_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     channel = db.Column(db.String(32), nullable=False)
     to = db.Column(db.String(128), nullable=False)
     message = db.Column(db.Text, nullable=False)
 
-    # queued -> sent / failed / dead
+    # queued -> sending (claimed by a worker) -> sent / queued (retry) / dead
     status = db.Column(db.String(32), nullable=False, default="queued")
     reference = db.Column(db.String(128), nullable=True)
 
     # Reliability fields
     attempt_count = db.Column(db.Integer, nullable=False, default=0)
     max_attempts = db.Column(db.Integer, nullable=False, default=5)
-    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
     last_error = db.Column(db.String(240), nullable=True)
 
+    # Worker claim: a "sending" row whose lease has lapsed is claimable again.
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     sent_at = db.Column(db.DateTime, nullable=True)
     dead_lettered_at = db.Column(db.DateTime, nullable=True)
@@ -5,6 +5,16 @@ from app.extensions import db
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        # escrow runner: due HELD orders
+        db.Index("ix_orders_escrow_status_next_eval", "escrow_status", "next_escrow_eval_at"),
+        # newest-first keyset pages of buyer / merchant / driver order lists
+        db.Index("ix_orders_buyer_id_created_at_id", "buyer_id", "created_at", "id"),
+        db.Index("ix_orders_merchant_id_created_at_id", "merchant_id", "created_at", "id"),
+        db.Index("ix_orders_driver_id_created_at_id", "driver_id", "created_at", "id"),
+        # available driver jobs (status = 'merchant_accepted')
+        db.Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -59,6 +69,10 @@ class Order(db.Model):
     escrow_release_at = db.Column(db.DateTime, nullable=True)
     escrow_refund_at = db.Column(db.DateTime, nullable=True)
     escrow_disputed_at = db.Column(db.DateTime, nullable=True)
+    # When the escrow runner should next look at a HELD order (see app.utils.escrow_queue).
+    next_escrow_eval_at = db.Column(db.DateTime, nullable=True)
+    # Claim token of the escrow worker that last took the order off the queue.
+    escrow_claimed_by = db.Column(db.String(64), nullable=True)
 
     # Release policy
     release_condition = db.Column(
@@ -97,6 +111,34 @@ class Order(db.Model):
     inspection_evidence_urls = db.Column(db.Text, nullable=True)
     inspection_note = db.Column(db.String(400), nullable=True)
 
+    # Columns list views load (load_only); to_summary_dict() reads only these.
+    SUMMARY_COLUMNS = (
+        "id", "buyer_id", "merchant_id", "listing_id", "driver_id",
+        "amount", "delivery_fee", "inspection_fee", "pickup", "dropoff",
+        "status", "fulfillment_mode", "escrow_status", "created_at", "updated_at",
+    )
+
+    def to_summary_dict(self, *, listing_title: str = "") -> dict:
+        """Compact shape for order lists; detail views use to_dict()."""
+        return {
+            "id": int(self.id),
+            "buyer_id": int(self.buyer_id),
+            "merchant_id": int(self.merchant_id),
+            "listing_id": int(self.listing_id) if self.listing_id is not None else None,
+            "listing_title": listing_title or "",
+            "driver_id": int(self.driver_id) if self.driver_id is not None else None,
+            "amount": float(self.amount or 0.0),
+            "delivery_fee": float(self.delivery_fee or 0.0),
+            "inspection_fee": float(self.inspection_fee or 0.0),
+            "pickup": self.pickup or "",
+            "dropoff": self.dropoff or "",
+            "status": self.status,
+            "fulfillment_mode": self.fulfillment_mode or "unselected",
+            "escrow_status": self.escrow_status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
     def to_dict(self) -> dict:
         return {
             "id": int(self.id),
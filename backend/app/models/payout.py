@@ -19,6 +19,11 @@ class PayoutRequest(db.Model):
     account_number = db.Column(db.String(32), nullable=True)
     account_name = db.Column(db.String(120), nullable=True)
 
+    # Set when the transfer is dispatched (autopilot / admin process).
+    provider = db.Column(db.String(32), nullable=True)
+    provider_reference = db.Column(db.String(128), nullable=True, index=True)
+    provider_error = db.Column(db.String(240), nullable=True)
+
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
@@ -34,6 +39,9 @@ class PayoutRequest(db.Model):
             "bank_name": self.bank_name or "",
             "account_number": self.account_number or "",
             "account_name": self.account_name or "",
+            "provider": self.provider or "",
+            "provider_reference": self.provider_reference or "",
+            "provider_error": self.provider_error or "",
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
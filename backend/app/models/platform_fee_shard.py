@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class PlatformFeeShard(db.Model):
+    """Not-yet-rolled-up credits to a hot wallet (the platform wallet), spread over N rows.
+
+    Fee postings add to one shard at random instead of locking the wallet row;
+    app.utils.platform_fees.rollup() moves the shard totals into wallets.balance.
+    """
+    __tablename__ = "platform_fee_shards"
+    __table_args__ = (
+        db.UniqueConstraint("wallet_id", "shard", name="uq_platform_fee_shards_wallet_shard"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    wallet_id = db.Column(db.Integer, db.ForeignKey("wallets.id"), nullable=False, index=True)
+    shard = db.Column(db.Integer, nullable=False)
+
+    pending_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "wallet_id": int(self.wallet_id),
+            "shard": int(self.shard),
+            "pending_amount": float(self.pending_amount or 0.0),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class RiskDailyCounter(db.Model):
+    """Per-user, per-UTC-day ledger activity for the payout risk checks.
+
+    Bumped in the same transaction as the wallet_txns it counts (see
+    app.utils.risk_counters), so payout checks read one row instead of
+    aggregating the ledger.
+    """
+    __tablename__ = "risk_daily_counters"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    payout_total = db.Column(db.Float, nullable=False, default=0.0)
+    payout_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Tumbling velocity window: txns since window_start (reset once it is older than the window).
+    window_start = db.Column(db.DateTime, nullable=True)
+    window_count = db.Column(db.Integer, nullable=False, default=0)
+
+    last_txn_at = db.Column(db.DateTime, nullable=True)
+    last_payout_request_at = db.Column(db.DateTime, nullable=True)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "user_id": int(self.user_id),
+            "day": self.day.isoformat() if self.day else None,
+            "txn_count": int(self.txn_count or 0),
+            "payout_total": float(self.payout_total or 0.0),
+            "payout_count": int(self.payout_count or 0),
+            "window_start": self.window_start.isoformat() if self.window_start else None,
+            "window_count": int(self.window_count or 0),
+            "last_txn_at": self.last_txn_at.isoformat() if self.last_txn_at else None,
+            "last_payout_request_at": self.last_payout_request_at.isoformat() if self.last_payout_request_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
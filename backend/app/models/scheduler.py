@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+
+from app.extensions import db
+
+
+class SchedulerLease(db.Model):
+    """Leader lease: the scheduler process holding an unexpired row is the only one running jobs."""
+    __tablename__ = "scheduler_leases"
+
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    acquired_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    renewed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "holder": self.holder,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "acquired_at": self.acquired_at.isoformat() if self.acquired_at else None,
+            "renewed_at": self.renewed_at.isoformat() if self.renewed_at else None,
+        }
+
+
+class SchedulerJobStat(db.Model):
+    """Per-job run metrics published by the scheduler."""
+    __tablename__ = "scheduler_job_stats"
+
+    name = db.Column(db.String(64), primary_key=True)
+
+    runs = db.Column(db.Integer, nullable=False, default=0)
+    failures = db.Column(db.Integer, nullable=False, default=0)
+    total_duration_ms = db.Column(db.BigInteger, nullable=False, default=0)
+
+    last_status = db.Column(db.String(16), nullable=True)  # ok / error
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_finished_at = db.Column(db.DateTime, nullable=True)
+    last_duration_ms = db.Column(db.Integer, nullable=True)
+    last_result_json = db.Column(db.Text, nullable=True)
+    last_error = db.Column(db.String(240), nullable=True)
+
+    def to_dict(self):
+        try:
+            last_result = json.loads(self.last_result_json) if self.last_result_json else None
+        except Exception:
+            last_result = None
+        runs = int(self.runs or 0)
+        return {
+            "name": self.name,
+            "runs": runs,
+            "failures": int(self.failures or 0),
+            "avg_duration_ms": round(int(self.total_duration_ms or 0) / runs, 1) if runs else None,
+            "last_status": self.last_status,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "last_result": last_result,
+            "last_error": self.last_error or "",
+        }
@@ -1,6 +1,11 @@
 from datetime import datetime, date
 import json
+
+from sqlalchemy import event
+
 from app.extensions import db
+from app.utils.geo import geohash_or_none
+from app.utils.images import variant_urls
 
 
 def _safe_json_list(raw: str | None):
@@ -18,6 +23,9 @@ def _safe_json_list(raw: str | None):
 class Shortlet(db.Model):
 
     __tablename__ = "shortlets"
+    __table_args__ = (
+        db.Index("ix_shortlets_geohash", "geohash"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -34,6 +42,8 @@ class Shortlet(db.Model):
 
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    # Derived from latitude/longitude on write (see _sync_geohash below)
+    geohash = db.Column(db.String(12), nullable=True)
 
     # Shortlet-specific
     nightly_price = db.Column(db.Float, nullable=False, default=0.0)
@@ -114,6 +124,7 @@ class Shortlet(db.Model):
             "available_from": self.available_from.isoformat() if self.available_from else None,
             "available_to": self.available_to.isoformat() if self.available_to else None,
             "image": img,
+            "image_variants": variant_urls(self.image_path, base_url),
             "property_type": (self.property_type or ""),
             "amenities": _safe_json_list(self.amenities),
             "house_rules": _safe_json_list(self.house_rules),
@@ -125,6 +136,12 @@ class Shortlet(db.Model):
         }
 
 
+@event.listens_for(Shortlet, "before_insert")
+@event.listens_for(Shortlet, "before_update")
+def _sync_geohash(mapper, connection, target):
+    target.geohash = geohash_or_none(target.latitude, target.longitude)
+
+
 class ShortletBooking(db.Model):
     __tablename__ = "shortlet_bookings"
 
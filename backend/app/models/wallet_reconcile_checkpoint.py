@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class WalletReconcileCheckpoint(db.Model):
+    """Ledger verified up to a txn id: later reconcile passes only sum txns after it."""
+    __tablename__ = "wallet_reconcile_checkpoints"
+
+    wallet_id = db.Column(db.Integer, db.ForeignKey("wallets.id"), primary_key=True)
+
+    # credits - debits of every txn with id <= verified_txn_id
+    verified_txn_id = db.Column(db.Integer, nullable=False, default=0)
+    verified_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    checked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "wallet_id": int(self.wallet_id),
+            "verified_txn_id": int(self.verified_txn_id or 0),
+            "verified_sum": float(self.verified_sum or 0.0),
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+        }
@@ -5,6 +5,14 @@ from app.extensions import db
 
 class WalletTxn(db.Model):
     __tablename__ = "wallet_txns"
+    __table_args__ = (
+        # reconciliation: a wallet's txns after its checkpoint
+        db.Index("ix_wallet_txns_wallet_id_id", "wallet_id", "id"),
+        # risk checks / counter backfill: a user's txns in a time range
+        db.Index("ix_wallet_txns_user_id_created_at", "user_id", "created_at"),
+        # ledger pages / statement export: a wallet's txns by time
+        db.Index("ix_wallet_txns_wallet_id_created_at_id", "wallet_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     wallet_id = db.Column(db.Integer, db.ForeignKey("wallets.id"), nullable=False, index=True)
@@ -6,7 +6,8 @@ from sqlalchemy.exc import IntegrityError
 
 from app.extensions import db
 from app.models import User, RoleChangeRequest
-from app.utils.jwt_utils import create_token, decode_token
+from app.utils import auth_context
+from app.utils.jwt_utils import create_token
 from app.utils.account_flags import record_account_flag, find_duplicate_phone_users, flag_duplicate_phone
 
 auth_bp = Blueprint("auth_bp", __name__, url_prefix="/api/auth")
@@ -73,13 +74,6 @@ def _create_role_request(*, user: User, requested_role: str, meta: dict | None =
         return None, ({"message": "Failed to create role request", "error": str(e)}, 500)
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "").strip()
-
-
 @auth_bp.post("/register")
 def register():
     # Backwards-compatible: treat as buyer/seller signup
@@ -115,20 +109,18 @@ def login():
 
 @auth_bp.get("/me")
 def me():
-    token = _bearer_token()
-    if not token:
+    if not auth_context.bearer_token():
         return jsonify({"message": "Missing Bearer token"}), 401
 
-    payload = decode_token(token)
+    payload = auth_context.current_claims()
     if not payload or "sub" not in payload:
         return jsonify({"message": "Invalid or expired token"}), 401
 
-    try:
-        user_id = int(payload.get("sub"))
-    except Exception:
+    user_id = auth_context.current_user_id()
+    if user_id is None:
         return jsonify({"message": "Invalid token payload"}), 401
 
-    u = User.query.get(user_id)
+    u = auth_context.get_user(user_id)
     if not u:
         return jsonify({"message": "User not found"}), 404
 
@@ -143,22 +135,7 @@ def set_role():
     allow_override = (os.getenv("ALLOW_DEV_ROLE_SWITCH", "") or "").strip() == "1"
     if env not in ("dev", "development", "local", "test") or not allow_override:
         return jsonify({"message": "Not found"}), 404
-    token = request.headers.get("Authorization", "")
-    if not token.startswith("Bearer "):
-        return jsonify({"message": "Not found"}), 404
-    token = token.replace("Bearer ", "", 1).strip()
-    payload = decode_token(token)
-    if not payload:
-        return jsonify({"message": "Not found"}), 404
-    sub = payload.get("sub")
-    if not sub:
-        return jsonify({"message": "Not found"}), 404
-    try:
-        uid = int(sub)
-    except Exception:
-        return jsonify({"message": "Not found"}), 404
-
-    u = User.query.get(uid)
+    u = auth_context.current_user()
     if not u:
         return jsonify({"message": "Not found"}), 404
     try:
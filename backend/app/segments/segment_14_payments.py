@@ -7,7 +7,6 @@ Do not merge yet.
 """
 
 from datetime import datetime
-import math
 import uuid
 
 from flask import Blueprint, jsonify, request
@@ -15,6 +14,7 @@ from flask_login import login_required
 
 from app.extensions import db
 from app.models import Order, User
+from app.utils.geo import haversine_km, haversine_many
 
 # =====================================================
 # BLUEPRINT
@@ -26,29 +26,6 @@ dispatch_ai = Blueprint(
     url_prefix="/api/dispatch",
 )
 
-# =====================================================
-# GEO HELPERS
-# =====================================================
-
-def haversine(lat1, lon1, lat2, lon2):
-
-    R = 6371
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(dphi / 2) ** 2
-        + math.cos(phi1)
-        * math.cos(phi2)
-        * math.sin(dlambda / 2) ** 2
-    )
-
-    return R * (2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
-
-
 # =====================================================
 # SURGE PRICING
 # =====================================================
@@ -77,20 +54,20 @@ def match_driver(order, pickup):
 
     drivers = User.query.filter_by(is_driver=True, is_frozen=False).all()
 
+    drivers = [d for d in drivers if hasattr(d, "lat") and hasattr(d, "lng")]
+
     best_driver = None
     best_score = float("inf")
 
-    for d in drivers:
-
-        if not hasattr(d, "lat") or not hasattr(d, "lng"):
-            continue
+    # one vectorised pass; drivers without coordinates come back NaN and never win
+    distances = haversine_many(
+        pickup["lat"],
+        pickup["lng"],
+        [d.lat for d in drivers],
+        [d.lng for d in drivers],
+    )
 
-        distance = haversine(
-            pickup["lat"],
-            pickup["lng"],
-            d.lat,
-            d.lng,
-        )
+    for d, distance in zip(drivers, distances):
 
         score = distance - d.pilot_score
 
@@ -146,7 +123,7 @@ def assign_driver(order_id):
 
     db.session.commit()
 
-    distance = haversine(
+    distance = haversine_km(
         pickup["lat"],
         pickup["lng"],
         driver.lat,
@@ -6,7 +6,6 @@ AI MARKETPLACE DISCOVERY ENGINE
 Do not merge yet.
 """
 
-from math import radians, cos, sin, asin, sqrt
 from datetime import datetime
 
 from flask import Blueprint, request, jsonify
@@ -14,6 +13,7 @@ from flask_login import login_required, current_user
 
 from app.extensions import db
 from app.models import Listing, User
+from app.utils.geo import haversine_km
 
 # =====================================================
 # BLUEPRINT
@@ -56,17 +56,7 @@ class ListingMetric(db.Model):
 
 def haversine(lat1, lon1, lat2, lon2):
 
-    lon1, lat1, lon2, lat2 = map(radians, [
-        lon1, lat1, lon2, lat2
-    ])
-
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-
-    return 6371 * c
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 
 # =====================================================
@@ -7,13 +7,13 @@ Do not merge yet.
 """
 
 from datetime import datetime, timedelta
-import math
 
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 
 from app.extensions import db
 from app.models import User, Order
+from app.utils.geo import haversine_km
 from app.realtime.socket import broadcast_room_event
 from app.comms_and_payments_live import send_sms   # merged later
 
@@ -83,22 +83,6 @@ BASE_RATES = {
 }
 
 
-def haversine(lat1, lng1, lat2, lng2):
-
-    R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlng = math.radians(lng2 - lng1)
-
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(math.radians(lat1))
-        * math.cos(math.radians(lat2))
-        * math.sin(dlng / 2) ** 2
-    )
-
-    return 2 * R * math.asin(math.sqrt(a))
-
-
 def price_guidance(vehicle, km):
 
     base = BASE_RATES.get(vehicle, 200)
@@ -116,7 +100,7 @@ def request_ride():
 
     data = request.json
 
-    km = haversine(
+    km = haversine_km(
         data["pickup_lat"],
         data["pickup_lng"],
         data["drop_lat"],
@@ -191,7 +175,7 @@ def submit_offer():
 
 def detect_route_deviation(order_id, lat, lng, target_lat, target_lng):
 
-    dist = haversine(lat, lng, target_lat, target_lng)
+    dist = haversine_km(lat, lng, target_lat, target_lng)
 
     if dist > 5:  # km off-route
 
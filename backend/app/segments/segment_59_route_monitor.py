@@ -10,11 +10,12 @@ requests reroute approval.
 =====================================================
 """
 
-import math
 import time
 from dataclasses import dataclass, field
 from typing import List, Tuple
 
+from app.utils.geo import haversine_km, min_distance_km
+
 
 # =====================================================
 # DATA MODELS
@@ -44,22 +45,7 @@ class ActiveRoute:
 
 def haversine(a, b):
 
-    R = 6371
-
-    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
-    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
-
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    h = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(lat1)
-        * math.cos(lat2)
-        * math.sin(dlon / 2) ** 2
-    )
-
-    return 2 * R * math.asin(math.sqrt(h))
+    return haversine_km(a[0], a[1], b[0], b[1])
 
 
 # =====================================================
@@ -68,7 +54,12 @@ def haversine(a, b):
 
 def min_distance_to_path(point, path):
 
-    return min(haversine(point, p) for p in path)
+    return min_distance_km(
+        point[0],
+        point[1],
+        [p[0] for p in path],
+        [p[1] for p in path],
+    )
 
 
 def deviation_score(route: ActiveRoute):
@@ -3,8 +3,8 @@ from __future__ import annotations
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import User, AuditLog
-from app.utils.jwt_utils import decode_token
+from app.models import AuditLog
+from app.utils import auth_context
 from app.jobs.wallet_reconciler import reconcile_wallets
 
 admin_wallets_bp = Blueprint("admin_wallets_bp", __name__, url_prefix="/api/admin/wallets")
@@ -24,28 +24,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u):
@@ -68,7 +48,12 @@ def run_reconcile():
         limit = int((request.args.get("limit") or 500))
     except Exception:
         limit = 500
-    res = reconcile_wallets(limit=limit, tolerance=0.01)
+    try:
+        after_id = int((request.args.get("after_id") or 0))
+    except Exception:
+        after_id = 0
+    # resume with ?after_id=<next_after_id> until it comes back null
+    res = reconcile_wallets(limit=max(1, limit), after_id=after_id, tolerance=0.01)
     return jsonify({"ok": True, "result": res}), 200
 
 
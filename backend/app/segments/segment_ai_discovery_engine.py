@@ -9,7 +9,6 @@ Do not merge yet.
 """
 
 from datetime import datetime, timedelta
-import math
 
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
@@ -18,6 +17,7 @@ from sqlalchemy import func, desc
 
 from app.extensions import db
 from app.models import Listing, Order, User
+from app.utils.geo import haversine_km, haversine_many
 
 from app.segments.segment_growth_intelligence import ListingMetric, Watchlist
 from app.segments.segment_notifications_engine import dispatch_notification
@@ -70,37 +70,24 @@ ai = Blueprint(
 
 def distance_km(lat1, lon1, lat2, lon2):
 
-    R = 6371
-
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(dphi / 2) ** 2
-        + math.cos(phi1)
-        * math.cos(phi2)
-        * math.sin(dlambda / 2) ** 2
-    )
-
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 
 # =====================================================
 # RANKING FORMULA
 # =====================================================
 
-def score_listing(listing, metric, user=None, lat=None, lng=None):
+def score_listing(listing, metric, user=None, lat=None, lng=None, dist=None):
 
     score = 0
 
     score += (metric.views * 0.2)
     score += (metric.saves * 0.6)
 
-    if lat and lng:
-        dist = distance_km(lat, lng, listing.lat, listing.lng)
+    if dist is None and lat and lng and listing.latitude is not None and listing.longitude is not None:
+        dist = distance_km(lat, lng, listing.latitude, listing.longitude)
+
+    if dist is not None and dist == dist:
         score += max(0, 50 - dist)
 
     if user:
@@ -136,16 +123,29 @@ def search():
         Listing.title.ilike(f"%{q}%")
     ).all()
 
+    dists = [None] * len(listings)
+
+    if lat and lng:
+        dists = [
+            float(d)
+            for d in haversine_many(
+                lat,
+                lng,
+                [l.latitude for l in listings],
+                [l.longitude for l in listings],
+            )
+        ]
+
     results = []
 
-    for l in listings:
+    for l, dist in zip(listings, dists):
 
         metric = ListingMetric.query.filter_by(listing_id=l.id).first()
 
         if not metric:
             continue
 
-        score = score_listing(l, metric, current_user, lat, lng)
+        score = score_listing(l, metric, current_user, lat, lng, dist)
 
         results.append(
             {
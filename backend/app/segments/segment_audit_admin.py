@@ -3,8 +3,8 @@ from __future__ import annotations
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import User, AuditLog
-from app.utils.jwt_utils import decode_token
+from app.models import AuditLog
+from app.utils import auth_context
 
 audit_bp = Blueprint("audit_bp", __name__, url_prefix="/api/admin/audit")
 
@@ -23,28 +23,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u):
@@ -3,9 +3,11 @@ from __future__ import annotations
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import User
-from app.utils.jwt_utils import decode_token
+from app.models import SchedulerJobStat, SchedulerLease
+from app.utils import auth_context
 from app.utils.autopilot import get_settings, tick
+from app.utils.paystack_client import latency_stats
+from app.jobs.scheduler import LEASE_NAME as SCHEDULER_LEASE_NAME
 
 autopilot_bp = Blueprint("autopilot_bp", __name__, url_prefix="/api/admin/autopilot")
 
@@ -24,28 +26,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u):
@@ -65,7 +47,20 @@ def get_status():
     if not _is_admin(u):
         return jsonify({"message": "Forbidden"}), 403
     s = get_settings()
-    return jsonify({"ok": True, "settings": s.to_dict()}), 200
+    try:
+        jobs = [j.to_dict() for j in SchedulerJobStat.query.order_by(SchedulerJobStat.name.asc()).all()]
+        lease = db.session.get(SchedulerLease, SCHEDULER_LEASE_NAME)
+    except Exception:
+        db.session.rollback()
+        jobs, lease = [], None
+    return jsonify({
+        "ok": True,
+        "settings": s.to_dict(),
+        "jobs": jobs,
+        "lease": lease.to_dict() if lease else None,
+        # This process only; the scheduler worker's figures are in jobs[].last_result.
+        "provider_latency": latency_stats(),
+    }), 200
 
 
 @autopilot_bp.post("/toggle")
@@ -9,13 +9,13 @@ Do not merge yet.
 
 from datetime import datetime, timedelta
 from uuid import uuid4
-import math
 
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 
 from app.extensions import db
 from app.models import User, Order
+from app.utils.geo import haversine_km
 from app.realtime.socket import broadcast_room_event
 from app.segments.segment_notifications_engine import dispatch_notification
 from app.segments.segment_payments_finance_engine import release_order_funds
@@ -85,22 +85,7 @@ VEHICLE_MULTIPLIERS = {
 
 def haversine(lat1, lon1, lat2, lon2):
 
-    R = 6371
-
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(dphi / 2) ** 2
-        + math.cos(phi1)
-        * math.cos(phi2)
-        * math.sin(dlambda / 2) ** 2
-    )
-
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 
 def guide_price(distance_km, vehicle):
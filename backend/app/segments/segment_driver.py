@@ -6,9 +6,11 @@ from flask import Blueprint, jsonify, request
 
 from app.extensions import db
 from app.models import User, Order, OrderEvent
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.escrow_unlocks import ensure_unlock, set_code_if_missing
 from app.utils.notify import queue_sms, queue_whatsapp
+from app.utils.order_lists import ORDER_LIST_MAX_PAGE_SIZE, envelope, filter_statuses, parse_statuses, summary_only
+from app.utils.pagination import keyset_merge_page, parse_limit, wants_page
 
 drivers_bp = Blueprint("drivers_bp", __name__, url_prefix="/api/driver")
 
@@ -27,28 +29,8 @@ def _ensure_tables_once():
     _INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _role(u: User | None) -> str:
@@ -96,7 +78,12 @@ def _job_dict(o: Order) -> dict:
 
 @drivers_bp.get("/jobs")
 def list_jobs():
-    """Driver jobs: returns a flat list of both available jobs and the driver's assigned jobs."""
+    """Driver jobs: the driver's assigned jobs and the available ones.
+
+    Without ?limit= / ?cursor=, a flat list (up to 100 of each, the driver's
+    own first). With them, one newest-first page over both, continued via
+    next_cursor. ?scope=mine|available narrows it; ?status= filters both.
+    """
     u = _current_user()
     if not u:
         return jsonify([]), 200
@@ -105,21 +92,26 @@ def list_jobs():
     if r not in ("driver", "admin"):
         return jsonify([]), 200
 
-    # Available: merchant accepted and no driver yet
-    available = (
-        Order.query.filter(Order.status == "merchant_accepted", Order.driver_id.is_(None))
-        .order_by(Order.created_at.desc())
-        .limit(100)
-        .all()
-    )
-
-    # Mine: assigned or in-progress
-    mine = (
-        Order.query.filter(Order.driver_id == u.id)
-        .order_by(Order.created_at.desc())
-        .limit(100)
-        .all()
-    )
+    statuses = parse_statuses(request.args)
+    scope = (request.args.get("scope") or "").strip().lower()
+    # Mine: assigned or in-progress (ix_orders_driver_id_created_at_id)
+    mine_q = summary_only(filter_statuses(Order.query.filter(Order.driver_id == int(u.id)), statuses))
+    # Available: merchant accepted and no driver yet (ix_orders_status_created_at_id)
+    available_q = summary_only(filter_statuses(
+        Order.query.filter(Order.status == "merchant_accepted", Order.driver_id.is_(None)), statuses
+    ))
+    queries = {"mine": [mine_q], "available": [available_q]}.get(scope, [mine_q, available_q])
+
+    if wants_page(request.args):
+        limit = parse_limit(request.args.get("limit"), maximum=ORDER_LIST_MAX_PAGE_SIZE)
+        try:
+            rows, next_cursor = keyset_merge_page(queries, Order.created_at, Order.id, cursor_raw=request.args.get("cursor"), limit=limit)
+        except ValueError:
+            return jsonify({"message": "Invalid cursor"}), 400
+        return jsonify(envelope([_job_dict(o) for o in rows], limit, next_cursor)), 200
+
+    available = [] if scope == "mine" else available_q.order_by(Order.created_at.desc(), Order.id.desc()).limit(100).all()
+    mine = [] if scope == "available" else mine_q.order_by(Order.created_at.desc(), Order.id.desc()).limit(100).all()
 
     # Merge without duplicates
     seen = set()
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 
 from app.extensions import db
-from app.models import User, Order, DriverJobOffer, AuditLog
-from app.utils.jwt_utils import decode_token
+from app.models import Order, DriverJobOffer, AuditLog
+from app.utils import auth_context
 from app.utils.escrow_unlocks import ensure_unlock, set_code_if_missing
 from app.utils.notify import queue_sms, queue_whatsapp
 
@@ -27,28 +27,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 @driver_offer_bp.get("")
@@ -6,7 +6,7 @@ from flask import Blueprint, jsonify, request
 
 from app.extensions import db
 from app.models import User, DriverProfile, Order, Listing, MoneyBoxAccount
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.account_flags import flag_duplicate_phone
 from app.utils.moneybox import liquidate_to_wallet
 
@@ -28,28 +28,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u: User | None) -> bool:
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 
 from app.extensions import db
 from app.models import User
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 
 drivers_list_bp = Blueprint("drivers_list_bp", __name__, url_prefix="/api/drivers")
 
@@ -23,28 +23,8 @@ def _ensure_tables_once():
     _INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _role(u: User | None) -> str:
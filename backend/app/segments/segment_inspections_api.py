@@ -9,11 +9,12 @@ from flask import Blueprint, jsonify, request
 
 from app.extensions import db
 from app.models import Order, User, InspectorProfile, InspectionReview, InspectionAudit, OrderEvent, AvailabilityConfirmation, InspectionTicket, EscrowUnlock
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.account_flags import flag_duplicate_phone
 from app.utils.escrow_unlocks import ensure_unlock, set_code_if_missing, verify_code, bump_attempts, mark_unlock_qr_verified
 from app.utils.notify import queue_sms, queue_whatsapp
 from app.jobs.escrow_runner import _hold_order_into_escrow, run_escrow_automation
+from app.jobs.escrow_worker import settlement_stats
 from app.escrow import release_inspector_payout
 from app.utils.bonding import (
     get_or_create_bond,
@@ -28,28 +29,8 @@ from app.utils.bonding import (
 inspections_bp = Blueprint("inspections_bp", __name__, url_prefix="/api")
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _availability_confirmed(order_id: int) -> bool:
@@ -714,7 +695,7 @@ def run_escrow():
     # Option A: Allow Render Cron using a service token.
     # If provided and valid, do NOT require JWT user auth.
     cron_secret = (os.getenv("ESCROW_CRON_TOKEN") or "").strip()
-    bearer = _bearer_token()  # reads Authorization: Bearer <...>
+    bearer = auth_context.bearer_token()  # reads Authorization: Bearer <...>
 
     if cron_secret and bearer and hmac.compare_digest(bearer, cron_secret):
         pass
@@ -734,6 +715,21 @@ def run_escrow():
     return jsonify(run_escrow_automation(limit=limit)), 200
 
 
+@inspections_bp.get("/admin/escrow/stats")
+def escrow_stats():
+    """Due escrow backlog and recent settlement throughput per outcome and worker."""
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        window = int(request.args.get("window_minutes") or 15)
+    except Exception:
+        window = 15
+    return jsonify({"ok": True, **settlement_stats(max(1, min(window, 1440)))}), 200
+
+
 _debug_segments = (os.getenv("FLIPTRYBE_DEBUG_SEGMENTS") or "").strip().lower()
 if _debug_segments in ("1", "true", "yes", "y", "on"):
     print("Segment Loaded: Inspector Agent Mode + Escrow Hooks")
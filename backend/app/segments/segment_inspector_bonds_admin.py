@@ -5,7 +5,7 @@ from datetime import datetime
 
 from app.extensions import db
 from app.models import User, InspectorProfile, BondEvent, MoneyBoxAccount
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.bonding import get_or_create_bond, topup_bond, refresh_bond_required_for_tier
 from app.utils.moneybox import liquidate_to_wallet
 
@@ -27,28 +27,8 @@ def _ensure_tables_once():
     _INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u: User | None) -> bool:
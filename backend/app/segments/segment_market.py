@@ -1,19 +1,32 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime
 
-from sqlalchemy import text, or_
-from flask import Blueprint, jsonify, request, send_from_directory
+from sqlalchemy import or_
+from flask import Blueprint, current_app, jsonify, request
 from werkzeug.utils import secure_filename
 
 from app.extensions import db
 from app.utils.ng_locations import NIGERIA_LOCATIONS
 from app.models import User
 from app.models import Listing
+from app.models import BackgroundJob
 from app.utils.commission import compute_commission, RATES
 from app.utils.listing_caps import enforce_listing_cap
-from app.utils.jwt_utils import decode_token, get_bearer_token
+from app.utils.pagination import parse_limit, wants_all, keyset_page, offset_page, encode_distance_cursor, decode_distance_cursor
+from app.utils.listing_search import apply_search, ensure_search_index
+from app.utils.location_counts import top_locations
+from app.utils.response_cache import cached_public_get, LISTINGS_SCOPE
+from app.utils.images import store_upload, serve_upload
+from app.utils.geo import apply_radius_prefilter, nearest_candidates, nearest_page
+from app.utils import listing_import
+from app.utils import auth_context
+from app.utils.maintenance import (
+    maintenance_task,
+    start_job as start_maintenance_job,
+    submit_job as submit_maintenance_job,
+    resume_job as resume_maintenance_job,
+)
 
 
 market_bp = Blueprint("market_bp", __name__, url_prefix="/api")
@@ -21,6 +34,9 @@ market_bp = Blueprint("market_bp", __name__, url_prefix="/api")
 # One-time init guard (per process)
 _MARKET_INIT_DONE = False
 
+# Cursor distance marking the second phase of a radius feed: listings with no pin yet.
+_PINLESS_CURSOR = -1.0
+
 # Upload folder: backend/uploads (stable path)
 # This file is: backend/app/segments/segment_market.py
 # Go up 3 levels -> backend/
@@ -40,6 +56,10 @@ def _ensure_tables_once():
         db.create_all()
     except Exception:
         pass
+    try:
+        ensure_search_index()
+    except Exception:
+        pass
     _MARKET_INIT_DONE = True
 
 
@@ -56,18 +76,14 @@ def _is_allowed(filename: str) -> bool:
 
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    # Earth radius km
-    r = 6371.0
-    from math import radians, sin, cos, sqrt, atan2
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return r * c
 
 
 
+def _parse_coord(raw) -> float | None:
+    try:
+        return float(raw) if raw is not None and str(raw).strip() != "" else None
+    except Exception:
+        return None
 
 
 def _apply_listing_active_filter(q):
@@ -92,28 +108,15 @@ def _apply_listing_ordering(q):
         pass
     return q.order_by(Listing.id.desc())
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
+def _listing_page(q, *, ranked: bool, limit: int):
+    """One page of listings: relevance-ranked search pages by offset, everything else by keyset."""
+    cursor_raw = request.args.get("cursor")
+    if ranked:
+        return offset_page(q, cursor_raw=cursor_raw, limit=limit)
+    return keyset_page(q, Listing.created_at, Listing.id, cursor_raw=cursor_raw, limit=limit)
 
 def _current_user():
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 def _is_admin(u: User | None) -> bool:
     if not u:
@@ -166,7 +169,7 @@ def _seller_role(user_id: int | None) -> str:
     if not user_id:
         return "guest"
     try:
-        u = User.query.get(int(user_id))
+        u = auth_context.get_user(user_id)
     except Exception:
         u = None
     if not u:
@@ -181,7 +184,7 @@ def _account_role(user_id: int | None) -> str:
     if not user_id:
         return "buyer"
     try:
-        u = User.query.get(int(user_id))
+        u = auth_context.get_user(user_id)
     except Exception:
         u = None
     if not u:
@@ -214,22 +217,7 @@ def _apply_pricing_for_listing(listing: Listing, *, base_price: float, seller_ro
 def popular_locations():
     """Top locations by listing count. Used for investor demo and quick filters."""
     try:
-        rows = db.session.execute(text("""
-            SELECT state, city, COUNT(*) AS c
-            FROM listings
-            WHERE state IS NOT NULL AND TRIM(state) != ''
-            GROUP BY state, city
-            ORDER BY c DESC
-            LIMIT 50
-        """)).fetchall()
-        items = []
-        for r in rows:
-            items.append({
-                "state": (r[0] or "").strip(),
-                "city": (r[1] or "").strip(),
-                "count": int(r[2] or 0),
-            })
-        return jsonify({"ok": True, "items": items}), 200
+        return jsonify({"ok": True, "items": top_locations(50)}), 200
     except Exception:
         return jsonify({"ok": True, "items": []}), 200
 
@@ -248,22 +236,7 @@ def heatmap_compat():
     Returns [{state, city, count}] in an 'items' wrapper.
     """
     try:
-        rows = db.session.execute(text("""
-            SELECT state, city, COUNT(*) AS c
-            FROM listings
-            WHERE state IS NOT NULL AND TRIM(state) != ''
-            GROUP BY state, city
-            ORDER BY c DESC
-            LIMIT 200
-        """)).fetchall()
-        items = []
-        for r in rows:
-            items.append({
-                "state": (r[0] or "").strip(),
-                "city": (r[1] or "").strip(),
-                "count": int(r[2] or 0),
-            })
-        return jsonify({"ok": True, "items": items}), 200
+        return jsonify({"ok": True, "items": top_locations(200)}), 200
     except Exception:
         return jsonify({"ok": True, "items": []}), 200
 
@@ -272,21 +245,7 @@ def heatmap_compat():
 def heat():
     """Heat buckets for simple 'map-like' demo (state/city counts)."""
     try:
-        rows = db.session.execute(text("""
-            SELECT state, city, COUNT(*) AS c
-            FROM listings
-            WHERE state IS NOT NULL AND TRIM(state) != ''
-            GROUP BY state, city
-            ORDER BY c DESC
-        """)).fetchall()
-        buckets = []
-        for r in rows:
-            buckets.append({
-                "state": (r[0] or "").strip(),
-                "city": (r[1] or "").strip(),
-                "count": int(r[2] or 0),
-            })
-        return jsonify({"ok": True, "buckets": buckets}), 200
+        return jsonify({"ok": True, "buckets": top_locations()}), 200
     except Exception:
         return jsonify({"ok": True, "buckets": []}), 200
 
@@ -355,7 +314,7 @@ def listing_price_preview():
 
 @market_bp.get("/uploads/<path:filename>")
 def get_uploaded_file(filename):
-    return send_from_directory(UPLOAD_DIR, filename)
+    return serve_upload(UPLOAD_DIR, filename)
 
 
 # ---------------------------
@@ -363,6 +322,7 @@ def get_uploaded_file(filename):
 # ---------------------------
 
 @market_bp.get("/feed")
+@cached_public_get(LISTINGS_SCOPE)
 def get_feed():
     q = Listing.query
 
@@ -398,9 +358,10 @@ def get_feed():
         q = q.filter(Listing.city.ilike(city_q))
     if locality_q:
         q = q.filter(Listing.locality.ilike(locality_q))
+    ranked = False
     if search_q:
-        like = f"%{search_q}%"
-        q = q.filter(or_(Listing.title.ilike(like), Listing.description.ilike(like)))
+        # Radius results are ordered by distance, so skip relevance ranking there.
+        q, ranked = apply_search(q, search_q, ranked=(lat is None or lng is None))
 
     try:
         q = q.filter(or_(Listing.user_id.isnot(None), Listing.owner_id.isnot(None)))
@@ -408,29 +369,67 @@ def get_feed():
         pass
 
     q = _apply_listing_active_filter(q)
-    q = _apply_listing_ordering(q)
-    items = q.all()
-
-    if lat is not None and lng is not None and hasattr(Listing, 'latitude') and hasattr(Listing, 'longitude'):
-        filtered = []
-        for it in items:
-            lat_val = getattr(it, 'latitude', None)
-            lng_val = getattr(it, 'longitude', None)
-            if lat_val is None or lng_val is None:
-                filtered.append(it)
-                continue
-            try:
-                d = _haversine_km(lat, lng, float(lat_val), float(lng_val))
-            except Exception:
-                filtered.append(it)
-                continue
-            if d <= max(radius_km, 0.1):
-                filtered.append(it)
-        items = filtered
 
     base = _base_url()
+    limit = parse_limit(request.args.get("limit"))
+
+    # Radius search: geohash/bounding-box prefilter in SQL, exact distance on
+    # the survivors, nearest first. Listings without a pin yet (matched by the
+    # other filters only) follow the pinned ones with distance_km null.
+    if lat is not None and lng is not None:
+        after = decode_distance_cursor(request.args.get("cursor"))
+        if (request.args.get("cursor") or "").strip() and after is None:
+            return jsonify({"message": "Invalid cursor"}), 400
+        pinless_after = after[1] if after is not None and after[0] == _PINLESS_CURSOR else None
+
+        payload = []
+        next_after = None
+        if pinless_after is None:
+            pinned = apply_radius_prefilter(
+                q,
+                geohash_col=Listing.geohash,
+                lat_col=Listing.latitude,
+                lng_col=Listing.longitude,
+                lat=lat,
+                lng=lng,
+                radius_km=radius_km,
+            )
+            rows, truncated = nearest_candidates(pinned, lat_col=Listing.latitude, lng_col=Listing.longitude, lat=lat, lng=lng, after=after)
+            page, next_after = nearest_page(rows, lat=lat, lng=lng, radius_km=radius_km, after=after, limit=limit, truncated=truncated)
+            for it, d in page:
+                row = it.to_dict(base_url=base)
+                row["distance_km"] = round(d, 3)
+                payload.append(row)
+        next_cursor = encode_distance_cursor(*next_after) if next_after else None
+
+        if next_after is None:
+            room = limit - len(payload)
+            rest = q.filter(or_(Listing.latitude.is_(None), Listing.longitude.is_(None)))
+            if pinless_after:
+                rest = rest.filter(Listing.id < int(pinless_after))
+            rest = rest.order_by(Listing.id.desc()).limit(room + 1).all()
+            for it in rest[:room]:
+                row = it.to_dict(base_url=base)
+                row["distance_km"] = None
+                payload.append(row)
+            if len(rest) > room:
+                last_id = int(rest[room - 1].id) if room > 0 else int(rest[0].id) + 1
+                next_cursor = encode_distance_cursor(_PINLESS_CURSOR, last_id)
+
+        return jsonify({"ok": True, "items": payload, "count": len(payload), "limit": limit, "next_cursor": next_cursor}), 200
+
+    # Legacy clients can still opt into the full, unpaginated feed with ?all=1.
+    if wants_all(request.args):
+        items = (q if ranked else _apply_listing_ordering(q)).all()
+        payload = [x.to_dict(base_url=base) for x in items]
+        return jsonify({"ok": True, "items": payload, "count": len(payload)}), 200
+
+    try:
+        items, next_cursor = _listing_page(q, ranked=ranked, limit=limit)
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
     payload = [x.to_dict(base_url=base) for x in items]
-    return jsonify({"ok": True, "items": payload, "count": len(payload)}), 200
+    return jsonify({"ok": True, "items": payload, "count": len(payload), "limit": limit, "next_cursor": next_cursor}), 200
 
 
 # ---------------------------
@@ -438,16 +437,26 @@ def get_feed():
 # ---------------------------
 
 @market_bp.get("/listings")
+@cached_public_get(LISTINGS_SCOPE)
 def list_listings():
     q = _apply_listing_active_filter(Listing.query)
     search_q = (request.args.get('q') or request.args.get('search') or '').strip()
+    ranked = False
     if search_q:
-        like = f"%{search_q}%"
-        q = q.filter(or_(Listing.title.ilike(like), Listing.description.ilike(like)))
-    q = _apply_listing_ordering(q)
-    items = q.all()
+        q, ranked = apply_search(q, search_q)
     base = _base_url()
-    return jsonify([x.to_dict(base_url=base) for x in items]), 200
+    if wants_all(request.args):
+        # Legacy shape: bare list of every active listing.
+        items = (q if ranked else _apply_listing_ordering(q)).all()
+        return jsonify([x.to_dict(base_url=base) for x in items]), 200
+
+    limit = parse_limit(request.args.get("limit"))
+    try:
+        items, next_cursor = _listing_page(q, ranked=ranked, limit=limit)
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
+    payload = [x.to_dict(base_url=base) for x in items]
+    return jsonify({"ok": True, "items": payload, "count": len(payload), "limit": limit, "next_cursor": next_cursor}), 200
 
 
 @market_bp.get("/merchant/listings")
@@ -464,6 +473,7 @@ def merchant_listings():
 
 
 @market_bp.get("/listings/<int:listing_id>")
+@cached_public_get(LISTINGS_SCOPE)
 def get_listing(listing_id: int):
     item = Listing.query.get(listing_id)
     if not item:
@@ -518,6 +528,10 @@ def update_listing(listing_id: int):
         item.city = (payload.get("city") or "").strip()
     if "locality" in payload:
         item.locality = (payload.get("locality") or "").strip()
+    if "latitude" in payload:
+        item.latitude = _parse_coord(payload.get("latitude"))
+    if "longitude" in payload:
+        item.longitude = _parse_coord(payload.get("longitude"))
     if "price" in payload:
         try:
             base_price = float(payload.get("price") or 0.0)
@@ -587,6 +601,8 @@ def create_listing():
     state = ""
     city = ""
     locality = ""  # store RELATIVE path: /api/uploads/<filename>
+    latitude = None
+    longitude = None
 
     # 1) Multipart upload
     if request.content_type and "multipart/form-data" in (request.content_type or ""):
@@ -596,6 +612,8 @@ def create_listing():
         state = (request.form.get("state") or "").strip()
         city = (request.form.get("city") or "").strip()
         locality = (request.form.get("locality") or "").strip()
+        latitude = _parse_coord(request.form.get("latitude"))
+        longitude = _parse_coord(request.form.get("longitude"))
 
         raw_price = request.form.get("price")
         try:
@@ -610,14 +628,9 @@ def create_listing():
             if not _is_allowed(original):
                 return jsonify({"message": "Invalid image type. Use jpg/jpeg/png/webp."}), 400
 
-            ts = int(datetime.utcnow().timestamp())
-            safe_name = f"{ts}_{original}" if original else f"{ts}_upload.jpg"
-
-            save_path = os.path.join(UPLOAD_DIR, safe_name)
-            file.save(save_path)
-
+            # Content-addressed: /api/uploads/<h[:2]>/<sha256>.<ext>; variants render in the background.
             # Store RELATIVE path in DB (portable across emulator/localhost/prod)
-            stored_image_path = f"/api/uploads/{safe_name}"
+            stored_image_path = store_upload(file, UPLOAD_DIR, "/api/uploads")
 
     # 2) JSON fallback
     else:
@@ -628,6 +641,8 @@ def create_listing():
         state = (payload.get("state") or "").strip()
         city = (payload.get("city") or "").strip()
         locality = (payload.get("locality") or "").strip()
+        latitude = _parse_coord(payload.get("latitude"))
+        longitude = _parse_coord(payload.get("longitude"))
 
         raw_price = payload.get("price")
         try:
@@ -645,12 +660,8 @@ def create_listing():
         return jsonify({"message": "title is required"}), 400
 
     # Best-effort: attach listing to authenticated user
-    owner_id = None
     try:
-        token = get_bearer_token(request.headers.get("Authorization", ""))
-        payload = decode_token(token) if token else None
-        sub = payload.get("sub") if isinstance(payload, dict) else None
-        owner_id = int(sub) if sub is not None and str(sub).isdigit() else None
+        owner_id = auth_context.current_user_id()
     except Exception:
         owner_id = None
 
@@ -668,6 +679,8 @@ def create_listing():
         state=state,
         city=city,
         locality=locality,
+        latitude=latitude,
+        longitude=longitude,
         description=description,
         price=price,
         image_path=stored_image_path,
@@ -691,24 +704,90 @@ def create_listing():
         return jsonify({"message": "Failed to create listing", "error": str(e)}), 500
 
 
+@market_bp.post("/listings/import")
+def import_listings():
+    """
+    Bulk create listings from CSV or JSONL.
+
+    Body: raw CSV/JSONL (Content-Type text/csv or application/x-ndjson, or ?format=csv|jsonl)
+          or multipart/form-data with the file in "file".
+    Columns/keys: title, description, price, state, city, locality, latitude, longitude, image_path
+
+    Small files are imported inline (200, per-row results). Larger files return 202 with a
+    job id; poll GET /api/listings/import/<job_id> for progress and per-row results.
+    """
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+
+    upload = request.files.get("file") if (request.content_type or "").startswith("multipart/form-data") else None
+    fmt = listing_import.detect_format(
+        request.args.get("format"),
+        upload.mimetype if upload else request.content_type,
+        upload.filename if upload else None,
+    )
+    if fmt is None:
+        return jsonify({"message": "Unsupported format. Send CSV or JSONL (or pass ?format=csv|jsonl)."}), 400
+
+    try:
+        path, size = listing_import.spool(upload.stream if upload else request.stream)
+    except Exception as e:
+        return jsonify({"message": "Failed to read upload", "error": str(e)}), 400
+    if size == 0:
+        listing_import.discard_spool(path)
+        return jsonify({"message": "Empty import"}), 400
+
+    owner_id = int(u.id)
+    kwargs = {
+        "owner_id": owner_id,
+        "account_role": _account_role(owner_id),
+        "seller_role": _seller_role(owner_id),
+        "apply_pricing": _apply_pricing_for_listing,
+    }
+    try:
+        job = listing_import.create_job(owner_id)
+    except Exception as e:
+        db.session.rollback()
+        listing_import.discard_spool(path)
+        return jsonify({"message": "Failed to create import job", "error": str(e)}), 500
+
+    if size > listing_import.SYNC_MAX_BYTES:
+        listing_import.submit_import(current_app._get_current_object(), int(job.id), path, fmt, **kwargs)
+        return jsonify({"ok": True, "job": job.to_dict(), "poll_url": f"/api/listings/import/{int(job.id)}"}), 202
+
+    listing_import.run_import(int(job.id), path, fmt, **kwargs)
+    job = db.session.get(BackgroundJob, int(job.id))
+    return jsonify({"ok": job.status == "succeeded", "job": job.to_dict(include_results=True)}), 200
+
+
+@market_bp.get("/listings/import/<int:job_id>")
+def import_listings_status(job_id: int):
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    job = db.session.get(BackgroundJob, int(job_id))
+    if not job or job.kind != listing_import.JOB_KIND:
+        return jsonify({"message": "Not found"}), 404
+    if not (_is_admin(u) or (job.owner_id is not None and int(job.owner_id) == int(u.id))):
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify({"ok": True, "job": job.to_dict(include_results=job.status in ("succeeded", "failed"))}), 200
+
+
 # ---------------------------
-# Optional: One-time repair tool
+# Maintenance: image path repair (chunked background job)
 # ---------------------------
-# Run once to convert old rows that stored absolute URLs into relative paths.
-# Then REMOVE this endpoint.
+# Converts old rows that stored absolute URLs into relative paths.
 
-@market_bp.post("/admin/repair-images")
-def repair_images():
+@maintenance_task("repair-images", model=Listing)
+def _repair_images_chunk(rows, *, dry_run: bool = False):
     """
     Converts stored absolute URLs like:
       http://127.0.0.1:5000/api/uploads/x.jpg
     into:
       /api/uploads/x.jpg
     """
-    items = Listing.query.all()
-    changed = 0
-
-    for x in items:
+    changes = []
+    for x in rows:
         p = (x.image_path or "").strip()
         if not p:
             continue
@@ -717,12 +796,63 @@ def repair_images():
         if low.startswith("http://") or low.startswith("https://"):
             idx = low.find("/api/uploads/")
             if idx != -1:
-                x.image_path = p[idx:]  # keep original substring from /api/uploads/...
-                changed += 1
+                fixed = p[idx:]  # keep original substring from /api/uploads/...
+                changes.append({"id": int(x.id), "from": p, "to": fixed})
+                if not dry_run:
+                    x.image_path = fixed
+    return changes
 
+
+def _truthy(raw) -> bool:
+    return (str(raw or "")).strip().lower() in ("1", "true", "yes")
+
+
+@market_bp.post("/admin/repair-images")
+@market_bp.post("/admin/listings/repair-images")
+def repair_images():
+    """
+    Starts (or resumes) the repair-images job in the background and returns 202 with the job.
+    ?dry_run=1 reports what would change without writing. Poll GET /api/admin/jobs/<job_id>.
+    """
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    payload = request.get_json(silent=True) or {}
+    dry_run = _truthy(request.args.get("dry_run")) or _truthy(payload.get("dry_run"))
     try:
-        db.session.commit()
-        return jsonify({"ok": True, "changed": changed}), 200
+        job, should_run = start_maintenance_job("repair-images", dry_run=dry_run, owner_id=int(u.id))
+        if should_run:
+            submit_maintenance_job(current_app._get_current_object(), int(job.id))
+        return jsonify({"ok": True, "job": job.to_dict(), "poll_url": f"/api/admin/jobs/{int(job.id)}"}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@market_bp.get("/admin/jobs/<int:job_id>")
+def admin_job_status(job_id: int):
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    job = db.session.get(BackgroundJob, int(job_id))
+    if not job:
+        return jsonify({"message": "Not found"}), 404
+    return jsonify({"ok": True, "job": job.to_dict(include_results=True)}), 200
+
+
+@market_bp.post("/admin/jobs/<int:job_id>/resume")
+def admin_job_resume(job_id: int):
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        job = resume_maintenance_job(int(job_id))
+        if job is None:
+            return jsonify({"message": "Not found"}), 404
+        if job.status == "queued":
+            submit_maintenance_job(current_app._get_current_object(), int(job.id))
+        return jsonify({"ok": True, "job": job.to_dict()}), 202
     except Exception as e:
         db.session.rollback()
         return jsonify({"ok": False, "error": str(e)}), 500
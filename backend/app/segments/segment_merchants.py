@@ -7,7 +7,8 @@ from sqlalchemy import text
 
 from app.extensions import db
 from app.models import User, MerchantProfile, MerchantReview, Wallet, Transaction
-from app.utils.jwt_utils import decode_token
+from app.utils.wallets import credit_balance
+from app.utils import auth_context
 from app.utils.commission import compute_commission, RATES
 from app.utils.receipts import create_receipt
 from app.utils.notify import queue_in_app, queue_sms, queue_whatsapp, mark_sent
@@ -30,28 +31,8 @@ def _ensure_tables_once():
     _MERCHANTS_INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user():
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        user_id = int(sub)
-    except Exception:
-        return None
-    return User.query.get(user_id)
+    return auth_context.current_user()
 
 
 def _get_or_create_profile(user_id: int) -> MerchantProfile:
@@ -335,7 +316,7 @@ def simulate_sale(user_id: int):
 
     # wallet credit
     w = _get_or_create_wallet(user_id)
-    w.balance = float(w.balance or 0.0) + float(net)
+    credit_balance(w.id, float(net))
     _tx(
         w.id,
         amount=abs(float(net)),
@@ -349,6 +330,7 @@ def simulate_sale(user_id: int):
 
     try:
         db.session.commit()
+        db.session.refresh(w)
         return jsonify({"ok": True, "merchant": mp.to_dict(), "wallet_balance": float(w.balance or 0.0), "base_price": base_price, "platform_fee": platform_fee, "final_price": final_price, "net": net}), 200
     except Exception as e:
         db.session.rollback()
@@ -8,7 +8,7 @@ from flask import Blueprint, jsonify, request
 from app.extensions import db
 from sqlalchemy.exc import IntegrityError
 from app.models import User, MoneyBoxAccount, MoneyBoxLedger
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.moneybox import (
     TIER_CONFIG,
     get_or_create_account,
@@ -38,28 +38,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _role(u: User | None) -> str:
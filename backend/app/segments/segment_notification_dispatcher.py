@@ -5,7 +5,7 @@ from flask import Blueprint, jsonify, request
 
 from app.extensions import db
 from app.models import User, Notification
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.notify import mark_sent, mark_failed
 
 dispatcher_bp = Blueprint("dispatcher_bp", __name__, url_prefix="/api/admin")
@@ -25,28 +25,8 @@ def _ensure_tables_once():
     _INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user():
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        user_id = int(sub)
-    except Exception:
-        return None
-    return User.query.get(user_id)
+    return auth_context.current_user()
 
 
 def _is_admin(u: User | None) -> bool:
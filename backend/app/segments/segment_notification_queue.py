@@ -5,8 +5,9 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import User, NotificationQueue
-from app.utils.jwt_utils import decode_token
+from app.models import NotificationQueue
+from app.utils import auth_context
+from app.jobs.notification_worker import queue_stats
 
 notifq_bp = Blueprint("notifq_bp", __name__, url_prefix="/api/admin/notify-queue")
 
@@ -25,28 +26,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer_token():
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u):
@@ -76,6 +57,19 @@ def list_queue():
     return jsonify([x.to_dict() for x in rows]), 200
 
 
+@notifq_bp.get("/stats")
+def stats():
+    """Backlog depth and recent send throughput per channel."""
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        window = int(request.args.get("window_minutes") or 5)
+    except Exception:
+        window = 5
+    return jsonify({"ok": True, **queue_stats(max(1, min(window, 1440)))}), 200
+
+
 @notifq_bp.post("/<int:msg_id>/mark-sent")
 def mark_sent(msg_id: int):
     u = _current_user()
@@ -123,6 +117,8 @@ def retry_now(msg_id: int):
         return jsonify({"message": "Not found"}), 404
     if (row.status or "").lower() == "sent":
         return jsonify({"message": "Already sent"}), 409
+    if (row.status or "").lower() == "sending":
+        return jsonify({"message": "Being sent by a worker"}), 409
 
     row.status = "queued"
     row.next_attempt_at = datetime.utcnow()
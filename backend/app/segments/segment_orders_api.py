@@ -26,11 +26,12 @@ from app.models import (
     InspectionTicket,
     AuditLog,
 )
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.receipts import create_receipt
 from app.utils.commission import compute_commission, resolve_rate, RATES
 from app.utils.messaging import enqueue_sms, enqueue_whatsapp
 from app.utils.notify import queue_in_app, queue_sms, queue_whatsapp
+from app.utils.order_lists import order_list
 from app.utils.escrow_unlocks import (
     ensure_unlock,
     hash_code,
@@ -65,28 +66,8 @@ def _ensure_tables_once():
     _INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _role(u: User | None) -> str:
@@ -236,7 +217,7 @@ def _issue_pickup_unlock(order: Order) -> None:
         unlock.code_hash = hash_code(int(order.id), "pickup_seller", code)
     if code and order.driver_id:
         try:
-            driver = User.query.get(int(order.driver_id))
+            driver = auth_context.get_user(int(order.driver_id))
         except Exception:
             driver = None
         msg = f"FlipTrybe: Pickup code for Order #{int(order.id)} is {code}. Keep private."
@@ -251,7 +232,7 @@ def _issue_delivery_unlock(order: Order) -> None:
         unlock.code_hash = hash_code(int(order.id), "delivery_driver", code)
     if code:
         try:
-            buyer = User.query.get(int(order.buyer_id))
+            buyer = auth_context.get_user(int(order.buyer_id))
         except Exception:
             buyer = None
         msg = f"FlipTrybe: Delivery code for Order #{int(order.id)} is {code}. Share only with the driver."
@@ -370,40 +351,35 @@ def _inspector_details(inspector: User | None) -> dict:
 
 
 def _reveal_for_user(order: Order, viewer: User, listing: Listing | None) -> dict:
-    buyer = User.query.get(int(order.buyer_id)) if order.buyer_id else None
-    seller = User.query.get(int(order.merchant_id)) if order.merchant_id else None
-    driver = User.query.get(int(order.driver_id)) if order.driver_id else None
-    inspector = User.query.get(int(order.inspector_id)) if order.inspector_id else None
-
-    profile = MerchantProfile.query.filter_by(user_id=int(order.merchant_id)).first() if order.merchant_id else None
-
     is_admin = _is_admin(viewer)
     is_buyer = int(order.buyer_id) == int(viewer.id)
     is_seller = int(order.merchant_id) == int(viewer.id)
     is_driver = order.driver_id is not None and int(order.driver_id) == int(viewer.id)
-    is_inspector = order.inspector_id is not None and int(order.inspector_id) == int(viewer.id)
 
     mode = (order.fulfillment_mode or "unselected").lower()
     reveal = {"mode": mode, "order_id": int(order.id)}
 
-    seller_address = _seller_address(order, listing, profile)
-
-    if is_admin or is_buyer:
-        reveal["seller"] = {**_user_contact(seller), "address": seller_address}
-    if is_admin or is_seller:
+    # Only look up the parties (and profiles) this viewer is shown.
+    show_buyer = is_admin or is_seller or is_driver
+    show_seller = is_admin or is_buyer or is_driver
+    show_driver = mode == "delivery" and (is_admin or is_buyer or is_seller)
+    show_inspector = mode == "inspection" and (is_admin or is_buyer or is_seller)
+
+    if show_seller:
+        seller = auth_context.get_user(int(order.merchant_id)) if order.merchant_id else None
+        profile = MerchantProfile.query.filter_by(user_id=int(order.merchant_id)).first() if order.merchant_id else None
+        reveal["seller"] = {**_user_contact(seller), "address": _seller_address(order, listing, profile)}
+    if show_buyer:
+        buyer = auth_context.get_user(int(order.buyer_id)) if order.buyer_id else None
         reveal["buyer"] = _user_contact(buyer)
     if is_admin or is_driver:
-        reveal["buyer"] = _user_contact(buyer)
-        reveal["seller"] = {**_user_contact(seller), "address": seller_address}
         reveal["pickup"] = (order.pickup or "")
         reveal["dropoff"] = (order.dropoff or "")
 
-    if mode == "delivery":
-        if is_admin or is_buyer or is_seller:
-            reveal["driver"] = _driver_details(driver)
-    if mode == "inspection":
-        if is_admin or is_buyer or is_seller:
-            reveal["inspector"] = _inspector_details(inspector)
+    if show_driver:
+        reveal["driver"] = _driver_details(auth_context.get_user(int(order.driver_id)) if order.driver_id else None)
+    if show_inspector:
+        reveal["inspector"] = _inspector_details(auth_context.get_user(int(order.inspector_id)) if order.inspector_id else None)
 
     return reveal
 
@@ -433,8 +409,8 @@ def _mark_paid(order: Order, reference: str | None = None, actor_id: int | None
     _ensure_availability_request(order, listing, int(order.merchant_id), seller_id)
     # Notify buyer & merchant via SMS/WhatsApp (trust layer) when payment is confirmed
     try:
-        buyer = User.query.get(int(order.buyer_id))
-        merchant = User.query.get(int(order.merchant_id))
+        buyer = auth_context.get_user(int(order.buyer_id))
+        merchant = auth_context.get_user(int(order.merchant_id))
         msg_buyer = f"FlipTrybe: Payment confirmed for Order #{int(order.id)}. Delivery code will be sent after pickup."
         msg_merchant = f"FlipTrybe: Sale confirmed for Order #{int(order.id)}. Prepare item for dispatch." 
         if buyer and getattr(buyer, 'phone', None):
@@ -533,7 +509,7 @@ def create_order():
 # If listing provided, prefer listing pricing rules over payload amount
     if listing:
         try:
-            seller = User.query.get(int(merchant_id))
+            seller = auth_context.get_user(int(merchant_id))
             seller_role = (getattr(seller, "role", "") or "buyer").strip().lower()
             if seller_role in ("driver", "inspector"):
                 seller_role = "merchant"
@@ -742,8 +718,8 @@ def my_orders():
     if not u:
         return jsonify({"message": "Unauthorized"}), 401
 
-    rows = Order.query.filter_by(buyer_id=u.id).order_by(Order.created_at.desc()).limit(200).all()
-    return jsonify([o.to_dict() for o in rows]), 200
+    body, status = order_list(Order.query.filter(Order.buyer_id == int(u.id)), request.args)
+    return jsonify(body), status
 
 
 @orders_bp.get("/merchant/orders")
@@ -756,8 +732,8 @@ def merchant_orders():
     if r not in ("merchant", "admin"):
         return jsonify([]), 200
 
-    rows = Order.query.filter_by(merchant_id=u.id).order_by(Order.created_at.desc()).limit(200).all()
-    return jsonify([o.to_dict() for o in rows]), 200
+    body, status = order_list(Order.query.filter(Order.merchant_id == int(u.id)), request.args)
+    return jsonify(body), status
 
 
 @orders_bp.get("/orders/<int:order_id>")
@@ -1086,7 +1062,7 @@ def driver_status(order_id: int):
             ref = f"order:{int(o.id)}"
             seller_role = "buyer"
             try:
-                seller = User.query.get(int(o.merchant_id))
+                seller = auth_context.get_user(int(o.merchant_id))
                 seller_role = (getattr(seller, "role", "") or "buyer").strip().lower()
                 if seller_role in ("driver", "inspector"):
                     seller_role = "merchant"
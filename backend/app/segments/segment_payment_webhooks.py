@@ -8,6 +8,7 @@ from flask import Blueprint, jsonify, request
 
 from app.extensions import db
 from app.models import Wallet, Transaction, User
+from app.utils.wallets import credit_balance
 from app.utils.commission import compute_commission, RATES
 from app.utils.receipts import create_receipt
 from app.utils.notify import queue_in_app, queue_sms, queue_whatsapp, mark_sent
@@ -95,7 +96,7 @@ def paystack_webhook():
         return jsonify({"ok": True, "ignored": True}), 200
 
     w = _get_or_create_wallet(uid)
-    w.balance = float(w.balance or 0.0) + gross
+    credit_balance(w.id, gross)
     _tx(w.id, amount=gross, gross=gross, net=gross, commission=0.0, purpose="topup", direction="credit", reference=f"paystack:{datetime.utcnow().isoformat()}")
 
     rec = create_receipt(
@@ -147,7 +148,7 @@ def stripe_webhook():
         return jsonify({"ok": True, "ignored": True}), 200
 
     w = _get_or_create_wallet(uid)
-    w.balance = float(w.balance or 0.0) + gross
+    credit_balance(w.id, gross)
     _tx(w.id, amount=gross, gross=gross, net=gross, commission=0.0, purpose="topup", direction="credit", reference=f"stripe:{datetime.utcnow().isoformat()}")
 
     rec = create_receipt(
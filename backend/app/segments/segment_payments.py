@@ -7,10 +7,10 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import AuditLog, User, PaymentIntent, WebhookEvent
-from app.utils.jwt_utils import decode_token
+from app.models import AuditLog, PaymentIntent, WebhookEvent
+from app.utils import auth_context
 from app.utils.paystack_client import initialize_transaction, verify_signature
-from app.utils.wallets import post_txn
+from app.utils.wallets import Leg, post_txns_batch
 from app.utils.idempotency import lookup_response, store_response
 
 payments_bp = Blueprint("payments_bp", __name__, url_prefix="/api/payments")
@@ -30,28 +30,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 @payments_bp.post("/initialize")
@@ -107,10 +87,16 @@ def _credit_wallet_from_reference(reference: str):
     pi.status = "paid"
     pi.paid_at = datetime.utcnow()
     db.session.add(pi)
-    db.session.commit()
-
-    post_txn(int(pi.user_id), float(pi.amount or 0.0), kind="topup", direction="credit", reference=f"pay:{reference}")
-    return True
+    # intent status and wallet credit commit together
+    res = post_txns_batch([Leg(
+        user_id=int(pi.user_id),
+        direction="credit",
+        amount=float(pi.amount or 0.0),
+        kind="topup",
+        reference=f"pay:{reference}",
+        note="Wallet topup",
+    )])
+    return res[0].ok
 
 
 @payments_bp.post("/webhook/paystack")
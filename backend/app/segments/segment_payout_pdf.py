@@ -3,11 +3,11 @@ from __future__ import annotations
 import io
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, send_file
 
 from app.extensions import db
-from app.models import User, PayoutRequest
-from app.utils.jwt_utils import decode_token
+from app.models import PayoutRequest
+from app.utils import auth_context
 
 payout_pdf_bp = Blueprint("payout_pdf_bp", __name__, url_prefix="/api/wallet/payouts")
 
@@ -26,28 +26,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 @payout_pdf_bp.get("/<int:payout_id>/pdf")
@@ -7,14 +7,16 @@ from flask import Blueprint, jsonify, request
 from sqlalchemy import or_
 
 from app.extensions import db
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.ng_locations import NIGERIA_LOCATIONS
+from app.utils.order_lists import order_list
 from app.models import User, Listing, Shortlet, ShortletBooking, Order, OrderEvent, DriverProfile, PaymentIntent, DriverJob
 from app.models import InspectorProfile
 from app.models.merchant import MerchantProfile, DisabledUser, DisabledListing
 from app.models.withdrawals import Withdrawal
 from app.models import Wallet, Transaction
-from app.jobs.escrow_runner import _hold_order_into_escrow, _release_escrow
+from app.jobs.escrow_runner import _hold_order_into_escrow, _release_escrow, _platform_user_id
+from app.utils.wallets import Leg, credit_balance, post_txns_batch
 from app.utils.bonding import (
     get_or_create_bond,
     refresh_bond_required_for_tier,
@@ -72,28 +74,8 @@ def _shortlet_is_available(shortlet: Shortlet) -> bool:
     return True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user_from_auth() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _role(u: User | None) -> str:
@@ -269,31 +251,19 @@ def book_shortlet():
 
     try:
         db.session.add(b)
-        db.session.commit()
-        try:
-            if platform_fee > 0:
-                from app.utils.wallets import post_txn
-                from app.models import User as _User
-                import os as _os
-                raw = (_os.getenv("PLATFORM_USER_ID") or "").strip()
-                platform_user_id = int(raw) if raw.isdigit() else 1
-                if not raw:
-                    try:
-                        admin = _User.query.filter_by(role="admin").order_by(_User.id.asc()).first()
-                        if admin:
-                            platform_user_id = int(admin.id)
-                    except Exception:
-                        pass
-                post_txn(
-                    user_id=int(platform_user_id),
-                    direction="credit",
-                    amount=float(platform_fee),
-                    kind="platform_fee",
-                    reference=f"shortlet:{int(st.id)}:{int(b.id)}",
-                    note="Shortlet platform fee",
-                )
-        except Exception:
-            pass
+        db.session.flush()
+        # booking and its platform-fee leg commit together
+        res = post_txns_batch([Leg(
+            user_id=_platform_user_id(),
+            direction="credit",
+            amount=float(platform_fee),
+            kind="platform_fee",
+            reference=f"shortlet:{int(st.id)}:{int(b.id)}",
+            note="Shortlet platform fee",
+            deferred=True,
+        )])
+        if not res[0].ok:
+            return jsonify({"message": "Failed to book shortlet"}), 500
         return jsonify({"ok": True, "booking": _booking_to_api(b)}), 201
     except Exception as e:
         db.session.rollback()
@@ -410,7 +380,7 @@ def payments_verify():
 
             # If it's a withdrawal intent, don't credit wallet. Otherwise credit net.
             if intent.purpose != "withdrawal":
-                wallet.balance = float(wallet.balance or 0.0) + net
+                credit_balance(wallet.id, net)
 
             tx = Transaction(
                 wallet_id=wallet.id,
@@ -667,8 +637,8 @@ def orders_my():
     if not str(buyer_id).isdigit():
         return jsonify({"message": "buyer_id is required"}), 400
 
-    items = Order.query.filter_by(buyer_id=int(buyer_id)).order_by(Order.created_at.desc()).all()
-    return jsonify([x.to_dict() for x in items]), 200
+    body, status = order_list(Order.query.filter(Order.buyer_id == int(buyer_id)), request.args)
+    return jsonify(body), status
 
 
 @platform_bp.post("/orders/<int:order_id>/mark-paid")
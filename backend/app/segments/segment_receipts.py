@@ -3,8 +3,8 @@ from __future__ import annotations
 from flask import Blueprint, jsonify, request, send_file
 
 from app.extensions import db
-from app.models import User, Receipt
-from app.utils.jwt_utils import decode_token
+from app.models import Receipt
+from app.utils import auth_context
 from app.utils.receipts import create_receipt
 from app.utils.commission import compute_commission, RATES
 from app.utils.receipt_pdf import render_receipt_pdf
@@ -26,28 +26,8 @@ def _ensure_tables_once():
     _RECEIPTS_INIT_DONE = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user():
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        user_id = int(sub)
-    except Exception:
-        return None
-    return User.query.get(user_id)
+    return auth_context.current_user()
 
 
 @receipts_bp.get("/receipts")
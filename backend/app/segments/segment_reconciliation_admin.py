@@ -3,34 +3,13 @@ from __future__ import annotations
 from flask import Blueprint, jsonify, request
 
 from app.utils.reconciliation import reconcile_latest
-from app.utils.jwt_utils import decode_token
-from app.models import User
+from app.utils import auth_context
 
 recon_bp = Blueprint("recon_bp", __name__, url_prefix="/api/admin/reconcile")
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 @recon_bp.post("")
@@ -1,21 +1,23 @@
 import os
 from datetime import datetime, date
-from math import radians, sin, cos, sqrt, atan2
 
-from flask import Blueprint, jsonify, request, send_from_directory
-from werkzeug.utils import secure_filename
-from sqlalchemy import text
+from flask import Blueprint, jsonify, request
+from sqlalchemy import or_, text
 
 from app.extensions import db
 from app.models.shortlet import Shortlet, ShortletBooking
 from app.utils.commission import compute_commission, RATES
 from app.utils.receipts import create_receipt
 from app.utils.notify import queue_in_app, queue_sms, queue_whatsapp, mark_sent
-from app.utils.wallets import post_txn
+from app.utils.wallets import Leg, post_txns_batch
 from app.models import User
 import os
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context
 from app.utils.listing_caps import enforce_listing_cap
+from app.utils.geo import apply_radius_prefilter, nearest_candidates, nearest_page
+from app.utils.pagination import encode_distance_cursor, decode_distance_cursor, wants_page
+from app.utils.response_cache import cached_public_get, SHORTLETS_SCOPE
+from app.utils.images import store_upload, serve_upload
 
 shortlets_bp = Blueprint("shortlets_bp", __name__, url_prefix="/api")
 
@@ -26,6 +28,9 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 _SHORTLETS_INIT_DONE = False
 
+# Cursor distance marking the second phase of a radius list: shortlets with no pin yet.
+_PINLESS_CURSOR = -1.0
+
 
 @shortlets_bp.before_app_request
 def _ensure_tables_once():
@@ -56,21 +61,13 @@ def _platform_user_id() -> int:
     return 1
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    r = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return r * c
-
-
 @shortlets_bp.get("/shortlet_uploads/<path:filename>")
 def get_shortlet_upload(filename):
-    return send_from_directory(UPLOAD_DIR, filename)
+    return serve_upload(UPLOAD_DIR, filename)
 
 
 @shortlets_bp.get("/shortlets")
+@cached_public_get(SHORTLETS_SCOPE)
 def list_shortlets():
     # location filters
     state = (request.args.get("state") or "").strip()
@@ -121,23 +118,59 @@ def list_shortlets():
     if lga:
         q = q.filter(Shortlet.lga.ilike(lga))
 
-    items = q.order_by(Shortlet.created_at.desc()).limit(limit).all()
+    base = _base_url()
 
-    # radius filter in python (sqlite)
+    # Radius search: prefilter in SQL (geohash ranges + bounding box), then
+    # exact distance on the nearest RADIUS_SCAN_LIMIT survivors. The limit
+    # applies after the radius filter, nearest first. Shortlets without a pin
+    # yet (matched by the location filters only) follow the pinned ones with
+    # distance_km null. ?limit= / ?cursor= page via next_cursor; otherwise
+    # the bare list, as before.
     if lat is not None and lng is not None:
-        filtered = []
-        for it in items:
-            if it.latitude is None or it.longitude is None:
-                continue
-            try:
-                d = _haversine_km(lat, lng, float(it.latitude), float(it.longitude))
-            except Exception:
-                continue
-            if d <= max(radius_km, 0.1):
-                filtered.append(it)
-        items = filtered
+        after = decode_distance_cursor(request.args.get("cursor"))
+        if (request.args.get("cursor") or "").strip() and after is None:
+            return jsonify({"message": "Invalid cursor"}), 400
+        pinless_after = after[1] if after is not None and after[0] == _PINLESS_CURSOR else None
 
-    base = _base_url()
+        items = []
+        next_after = None
+        if pinless_after is None:
+            pinned = apply_radius_prefilter(
+                q,
+                geohash_col=Shortlet.geohash,
+                lat_col=Shortlet.latitude,
+                lng_col=Shortlet.longitude,
+                lat=lat,
+                lng=lng,
+                radius_km=radius_km,
+            )
+            rows, truncated = nearest_candidates(pinned, lat_col=Shortlet.latitude, lng_col=Shortlet.longitude, lat=lat, lng=lng, after=after)
+            page, next_after = nearest_page(rows, lat=lat, lng=lng, radius_km=radius_km, after=after, limit=limit, truncated=truncated)
+            for it, d in page:
+                row = it.to_dict(base_url=base)
+                row["distance_km"] = round(d, 3)
+                items.append(row)
+        next_cursor = encode_distance_cursor(*next_after) if next_after else None
+
+        if next_after is None:
+            room = limit - len(items)
+            rest = q.filter(or_(Shortlet.latitude.is_(None), Shortlet.longitude.is_(None)))
+            if pinless_after:
+                rest = rest.filter(Shortlet.id < int(pinless_after))
+            rest = rest.order_by(Shortlet.id.desc()).limit(room + 1).all()
+            for it in rest[:room]:
+                row = it.to_dict(base_url=base)
+                row["distance_km"] = None
+                items.append(row)
+            if len(rest) > room:
+                last_id = int(rest[room - 1].id) if room > 0 else int(rest[0].id) + 1
+                next_cursor = encode_distance_cursor(_PINLESS_CURSOR, last_id)
+
+        if not wants_page(request.args):
+            return jsonify(items), 200
+        return jsonify({"ok": True, "items": items, "count": len(items), "limit": limit, "next_cursor": next_cursor}), 200
+
+    items = q.order_by(Shortlet.created_at.desc()).limit(limit).all()
     return jsonify([x.to_dict(base_url=base) for x in items]), 200
 
 
@@ -264,12 +297,7 @@ def create_shortlet():
 
         file = request.files.get("image")
         if file and file.filename:
-            original = secure_filename(os.path.basename(file.filename))
-            ts = int(datetime.utcnow().timestamp())
-            safe_name = f"{ts}_{original}" if original else f"{ts}_shortlet.jpg"
-            save_path = os.path.join(UPLOAD_DIR, safe_name)
-            file.save(save_path)
-            image_rel = f"/api/shortlet_uploads/{safe_name}"
+            image_rel = store_upload(file, UPLOAD_DIR, "/api/shortlet_uploads")
     else:
         payload = request.get_json(silent=True) or {}
         title = (payload.get("title") or "").strip()
@@ -477,19 +505,19 @@ def book_shortlet(shortlet_id: int):
 
     try:
         db.session.add(b)
-        db.session.commit()
-        try:
-            if platform_fee > 0:
-                post_txn(
-                    user_id=_platform_user_id(),
-                    direction="credit",
-                    amount=float(platform_fee),
-                    kind="platform_fee",
-                    reference=f"shortlet:{int(shortlet_id)}:{int(b.id)}",
-                    note="Shortlet platform fee",
-                )
-        except Exception:
-            pass
+        db.session.flush()
+        # booking and its platform-fee leg commit together
+        res = post_txns_batch([Leg(
+            user_id=_platform_user_id(),
+            direction="credit",
+            amount=float(platform_fee),
+            kind="platform_fee",
+            reference=f"shortlet:{int(shortlet_id)}:{int(b.id)}",
+            note="Shortlet platform fee",
+            deferred=True,
+        )])
+        if not res[0].ok:
+            return jsonify({"message": "Booking failed"}), 500
         return jsonify({"ok": True, "booking": b.to_dict(), "quote": {"nights": nights, "subtotal": subtotal, "platform_fee": platform_fee, "total": total}}), 201
     except Exception as e:
         db.session.rollback()
@@ -558,34 +586,12 @@ def shortlets_dashboard_summary():
     except Exception:
         return jsonify({"ok": True, "total_shortlets": 0, "total_bookings": 0, "confirmed_bookings": 0, "pending_bookings": 0}), 200
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user_id() -> int | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        return int(sub)
-    except Exception:
-        return None
+    return auth_context.current_user_id()
 
 
 def _current_user() -> User | None:
-    uid = _current_user_id()
-    if not uid:
-        return None
-    return User.query.get(int(uid))
+    return auth_context.current_user()
 
 
 def _role(u: User | None) -> str:
@@ -5,8 +5,8 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import User, WalletTxn
-from app.utils.jwt_utils import decode_token
+from app.models import WalletTxn
+from app.utils import auth_context
 
 analytics_bp = Blueprint("analytics_bp", __name__, url_prefix="/api/wallet/analytics")
 
@@ -25,28 +25,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer():
-    h = request.headers.get("Authorization", "")
-    if not h.startswith("Bearer "):
-        return None
-    return h.replace("Bearer ", "", 1).strip()
-
-
 def _current_user():
-    tok = _bearer()
-    if not tok:
-        return None
-    payload = decode_token(tok)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 @analytics_bp.get("")
@@ -1,7 +1,9 @@
 """Wallet compatibility helpers.
 
 Some legacy segments import `debit_wallet(...)` / `credit_wallet(...)`.
-This implementation uses the Wallet + Transaction tables.
+This implementation uses the Wallet + Transaction tables. Balances change in
+SQL (app.utils.wallets.credit_balance / debit_balance), never as a Python
+read-modify-write, so concurrent callers cannot lose each other's updates.
 """
 
 from __future__ import annotations
@@ -11,6 +13,7 @@ from typing import Optional
 
 from app.extensions import db
 from app.models import Wallet, Transaction, User
+from app.utils.wallets import credit_balance, debit_balance
 
 
 def _get_or_create_wallet(user_id: int) -> Wallet:
@@ -32,11 +35,10 @@ def debit_wallet(user_id: int, amount: float, *, reason: str = "wallet_debit") -
         raise ValueError("user not found")
 
     w = _get_or_create_wallet(user.id)
-    if (w.balance or 0.0) < amount:
+    if not debit_balance(w.id, float(amount)):
+        db.session.rollback()
         raise ValueError("insufficient wallet balance")
 
-    w.balance = float(w.balance or 0.0) - float(amount)
-
     tx = Transaction(
         wallet_id=w.id,
         amount=-abs(float(amount)),
@@ -62,7 +64,7 @@ def credit_wallet(user_id: int, amount: float, *, reason: str = "wallet_credit")
         raise ValueError("user not found")
 
     w = _get_or_create_wallet(user.id)
-    w.balance = float(w.balance or 0.0) + float(amount)
+    credit_balance(w.id, float(amount))
 
     tx = Transaction(
         wallet_id=w.id,
@@ -2,13 +2,15 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 
 from app.extensions import db
 from app.models import User, Wallet, WalletTxn, PayoutRequest
-from app.utils.jwt_utils import decode_token
+from app.utils import auth_context, payout_dispatch
 from app.utils.wallets import get_or_create_wallet, post_txn, reserve_funds, release_reserved
-from app.utils.risk import can_request_payout, txn_velocity_ok
+from app.utils import risk_counters, wallet_statement
+from app.utils.pagination import keyset_page, parse_limit, wants_page
+from app.utils.risk import payout_request_checks
 from app.models import AuditLog, PayoutRecipient
 from app.utils.commission import resolve_rate
 from app.utils.account_flags import record_account_flag, flag_duplicate_bank
@@ -17,6 +19,8 @@ import os
 
 wallets_bp = Blueprint("wallets_bp", __name__, url_prefix="/api/wallet")
 
+LEDGER_MAX_PAGE_SIZE = 200
+
 _INIT = False
 
 
@@ -32,28 +36,8 @@ def _ensure_tables_once():
     _INIT = True
 
 
-def _bearer_token() -> str | None:
-    header = request.headers.get("Authorization", "")
-    if not header.startswith("Bearer "):
-        return None
-    return header.replace("Bearer ", "", 1).strip() or None
-
-
 def _current_user() -> User | None:
-    token = _bearer_token()
-    if not token:
-        return None
-    payload = decode_token(token)
-    if not payload:
-        return None
-    sub = payload.get("sub")
-    if not sub:
-        return None
-    try:
-        uid = int(sub)
-    except Exception:
-        return None
-    return User.query.get(uid)
+    return auth_context.current_user()
 
 
 def _is_admin(u: User | None) -> bool:
@@ -106,14 +90,67 @@ def my_wallet():
     return jsonify({"ok": True, "wallet": w.to_dict()}), 200
 
 
+def _ledger_wallet_id(u: User) -> int | None:
+    """The caller's wallet, or ?user_id=<id>'s for admins (None if that user has no wallet)."""
+    raw = (request.args.get("user_id") or "").strip()
+    if raw and _is_admin(u):
+        if not raw.isdigit():
+            return None
+        w = Wallet.query.filter_by(user_id=int(raw)).first()
+        return int(w.id) if w else None
+    return int(get_or_create_wallet(int(u.id)).id)
+
+
 @wallets_bp.get("/ledger")
 def my_ledger():
     u = _current_user()
     if not u:
         return jsonify([]), 200
-    w = get_or_create_wallet(int(u.id))
-    rows = WalletTxn.query.filter_by(wallet_id=w.id).order_by(WalletTxn.created_at.desc()).limit(200).all()
-    return jsonify([t.to_dict() for t in rows]), 200
+    paged = wants_page(request.args)
+    wallet_id = _ledger_wallet_id(u)
+    if wallet_id is None:
+        return jsonify({"message": "Wallet not found"}), 404
+    q = WalletTxn.query.filter(WalletTxn.wallet_id == wallet_id)
+    if not paged:
+        # Bare list of the newest 200 for clients that do not page yet.
+        rows = q.order_by(WalletTxn.created_at.desc(), WalletTxn.id.desc()).limit(200).all()
+        return jsonify([t.to_dict() for t in rows]), 200
+
+    # Newest first on ix_wallet_txns_wallet_id_created_at_id; pages continue via next_cursor.
+    limit = parse_limit(request.args.get("limit"), maximum=LEDGER_MAX_PAGE_SIZE)
+    try:
+        rows, next_cursor = keyset_page(q, WalletTxn.created_at, WalletTxn.id, cursor_raw=request.args.get("cursor"), limit=limit)
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
+    items = [t.to_dict() for t in rows]
+    return jsonify({"ok": True, "items": items, "count": len(items), "limit": limit, "next_cursor": next_cursor}), 200
+
+
+@wallets_bp.get("/statement")
+def export_statement():
+    """Stream the ledger for ?from=&to= (ISO dates/datetimes) as ?format=csv (default) or jsonl."""
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    fmt = (request.args.get("format") or "csv").strip().lower()
+    if fmt not in wallet_statement.FORMATS:
+        return jsonify({"message": "format must be csv or jsonl"}), 400
+    try:
+        start = wallet_statement.parse_bound(request.args.get("from"))
+        end = wallet_statement.parse_bound(request.args.get("to"), end=True)
+    except ValueError:
+        return jsonify({"message": "Invalid from/to date"}), 400
+    wallet_id = _ledger_wallet_id(u)
+    if wallet_id is None:
+        return jsonify({"message": "Wallet not found"}), 404
+
+    body = wallet_statement.iter_statement(wallet_id, fmt=fmt, start=start, end=end)
+    name = f"wallet_{wallet_id}_statement.{fmt}"
+    return Response(
+        stream_with_context(body),
+        mimetype=wallet_statement.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
 
 
 @wallets_bp.post("/topup-demo")
@@ -180,10 +217,15 @@ def request_payout():
     if net_amount < 0:
         net_amount = 0.0
 
+    ok, msg, status = payout_request_checks(u, amount)
+    if not ok:
+        return jsonify({"message": msg}), status
+
     w = get_or_create_wallet(int(u.id))
     if float(w.balance or 0.0) < amount:
         return jsonify({"message": "Insufficient wallet balance"}), 400
 
+    now = datetime.utcnow()
     pr = PayoutRequest(
         user_id=int(u.id),
         amount=float(amount),
@@ -194,11 +236,13 @@ def request_payout():
         bank_name=bank_name,
         account_number=account_number,
         account_name=account_name,
-        updated_at=datetime.utcnow(),
+        created_at=now,
+        updated_at=now,
     )
 
     try:
         db.session.add(pr)
+        risk_counters.record(int(u.id), payout_request=True, now=now)
         db.session.commit()
         return jsonify({"ok": True, "payout": pr.to_dict()}), 201
     except Exception as e:
@@ -215,6 +259,39 @@ def list_payouts():
     return jsonify([p.to_dict() for p in rows]), 200
 
 
+def _payout_fees(p: PayoutRequest) -> tuple[float, float, str]:
+    """(fee_amount, net_amount, speed); computes fees for legacy payout requests missing them."""
+    fee_amount = float(getattr(p, "fee_amount", 0.0) or 0.0)
+    net_amount = float(getattr(p, "net_amount", 0.0) or 0.0)
+    speed = (getattr(p, "speed", "standard") or "standard").strip().lower()
+    if fee_amount <= 0.0 and net_amount <= 0.0:
+        try:
+            pay_user = auth_context.get_user(int(p.user_id))
+        except Exception:
+            pay_user = None
+        rate = _withdrawal_fee_rate(_role(pay_user), speed)
+        fee_amount = round(float(p.amount or 0.0) * float(rate), 2)
+        net_amount = round(float(p.amount or 0.0) - float(fee_amount), 2)
+    return fee_amount, net_amount, speed
+
+
+def _credit_withdrawal_fee(p: PayoutRequest, fee_amount: float) -> None:
+    # credit platform fee ledger (non-merchant fees only)
+    try:
+        if fee_amount > 0:
+            post_txn(
+                user_id=_platform_user_id(),
+                direction="credit",
+                amount=float(fee_amount),
+                kind="withdrawal_fee",
+                reference=f"payout:{int(p.id)}",
+                note="Withdrawal fee",
+                deferred=True,
+            )
+    except Exception:
+        pass
+
+
 @wallets_bp.post("/payouts/<int:payout_id>/admin/mark-paid")
 def admin_mark_paid(payout_id: int):
     u = _current_user()
@@ -227,23 +304,19 @@ def admin_mark_paid(payout_id: int):
 
     if p.status == "paid":
         return jsonify({"ok": True, "payout": p.to_dict()}), 200
+    if p.status == "processing":
+        return jsonify({"message": "Payout is being sent"}), 409
 
-    # compute fees if missing (legacy payout requests)
-    fee_amount = float(getattr(p, "fee_amount", 0.0) or 0.0)
-    net_amount = float(getattr(p, "net_amount", 0.0) or 0.0)
-    speed = (getattr(p, "speed", "standard") or "standard").strip().lower()
-    try:
-        pay_user = User.query.get(int(p.user_id))
-    except Exception:
-        pay_user = None
-    if fee_amount <= 0.0 and net_amount <= 0.0:
-        rate = _withdrawal_fee_rate(_role(pay_user), speed)
-        fee_amount = round(float(p.amount or 0.0) * float(rate), 2)
-        net_amount = round(float(p.amount or 0.0) - float(fee_amount), 2)
+    fee_amount, net_amount, speed = _payout_fees(p)
+
+    # Consume the payout's reservation before the debit, as payout_dispatch
+    # does (failed/rejected payouts already gave it back).
+    if p.status not in ("failed", "rejected"):
+        release_reserved(int(p.user_id), float(p.amount or 0.0))
 
     # debit wallet (gross amount)
     ref = f"payout:{int(p.id)}"
-    post_txn(
+    txn = post_txn(
         user_id=int(p.user_id),
         direction="debit",
         amount=float(p.amount or 0.0),
@@ -251,20 +324,10 @@ def admin_mark_paid(payout_id: int):
         reference=ref,
         note="Payout paid",
     )
+    if txn is None:
+        return jsonify({"message": "Insufficient wallet balance", "payout": p.to_dict()}), 409
 
-    # credit platform fee ledger (non-merchant fees only)
-    try:
-        if fee_amount > 0:
-            post_txn(
-                user_id=_platform_user_id(),
-                direction="credit",
-                amount=float(fee_amount),
-                kind="withdrawal_fee",
-                reference=ref,
-                note="Withdrawal fee",
-            )
-    except Exception:
-        pass
+    _credit_withdrawal_fee(p, fee_amount)
 
     p.status = "paid"
     try:
@@ -305,7 +368,7 @@ def admin_approve(payout_id: int):
     p = PayoutRequest.query.get(payout_id)
     if not p:
         return jsonify({"message": "Not found"}), 404
-    if p.status in ("paid", "rejected"):
+    if p.status in ("paid", "rejected", "processing"):
         return jsonify({"ok": True, "payout": p.to_dict()}), 200
     p.status = "approved"
     p.updated_at = datetime.utcnow()
@@ -328,6 +391,8 @@ def admin_reject(payout_id: int):
         return jsonify({"message": "Not found"}), 404
     if p.status == "paid":
         return jsonify({"message": "Already paid"}), 400
+    if p.status == "processing":
+        return jsonify({"message": "Payout is being sent"}), 409
     # Release reserved funds back to available
     try:
         release_reserved(int(p.user_id), float(p.amount or 0.0))
@@ -346,9 +411,20 @@ def admin_reject(payout_id: int):
 
 
 
+def _settle_payout_fees(p: PayoutRequest) -> None:
+    """payout_dispatch on_paid hook: the same fee bookkeeping admin mark-paid does."""
+    fee_amount, net_amount, speed = _payout_fees(p)
+    _credit_withdrawal_fee(p, fee_amount)
+    p.fee_amount = float(fee_amount)
+    p.net_amount = float(net_amount)
+    p.speed = speed
+    db.session.add(p)
+    db.session.commit()
+
+
 @wallets_bp.post("/payouts/<int:payout_id>/admin/process")
 def admin_process_payout(payout_id: int):
-    """Simulated payout processing (demo): approve then mark paid."""
+    """Approve and send one payout through the provider (simulated when no recipient is set up)."""
     u = _current_user()
     if not _is_admin(u):
         return jsonify({"message": "Forbidden"}), 403
@@ -370,9 +446,59 @@ def admin_process_payout(payout_id: int):
     except Exception:
         db.session.rollback()
 
-    # call mark-paid logic by reusing existing function flow
-    # (simple: just flip status and debit wallet)
-    # We'll do the same as admin_mark_paid route expects:
-    # status paid + wallet debit happens there
-    # easiest: set status approved then return and user can mark paid, but for demo we proceed:
-    return admin_mark_paid(payout_id)
+    res = payout_dispatch.dispatch([p], on_paid=_settle_payout_fees)
+    p = PayoutRequest.query.get(payout_id)
+    if res.get("unknown"):
+        return jsonify({"message": "Payout awaiting provider confirmation", "payout": p.to_dict() if p else None}), 202
+    if not res.get("paid"):
+        return jsonify({"message": "Payout failed", "payout": p.to_dict() if p else None}), 502
+    return jsonify({"ok": True, "payout": p.to_dict()}), 200
+
+
+@wallets_bp.post("/admin/payouts/process-batch")
+def admin_process_payouts_batch():
+    """Approve and send many payouts at once (Paystack bulk transfers where possible).
+
+    Body: {"ids": [...]} for specific payouts, or {"limit": N} (default 100, max
+    1000) for the oldest pending/approved ones.
+    """
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    payload = request.get_json(silent=True) or {}
+    qry = PayoutRequest.query.filter(payout_dispatch.claimable(("pending", "approved")))
+    ids = payload.get("ids")
+    if ids is not None:
+        try:
+            ids = [int(i) for i in ids]
+        except Exception:
+            return jsonify({"message": "ids must be a list of payout ids"}), 400
+        if not ids:
+            return jsonify({"message": "ids must not be empty"}), 400
+        if len(ids) > 1000:
+            return jsonify({"message": "at most 1000 ids per batch"}), 400
+        qry = qry.filter(PayoutRequest.id.in_(ids))
+    else:
+        try:
+            limit = int(payload.get("limit") or 100)
+        except Exception:
+            limit = 100
+        qry = qry.order_by(PayoutRequest.created_at.asc()).limit(max(1, min(limit, 1000)))
+
+    rows = qry.all()
+    now = datetime.utcnow()
+    for p in rows:
+        if p.status == "pending":
+            p.status = "approved"
+            p.updated_at = now
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({"message": "Failed"}), 500
+
+    row_ids = [int(p.id) for p in rows]
+    res = payout_dispatch.dispatch(rows, on_paid=_settle_payout_fees)
+    payouts = PayoutRequest.query.filter(PayoutRequest.id.in_(row_ids)).order_by(PayoutRequest.id.asc()).all() if row_ids else []
+    return jsonify({"ok": True, "result": res, "payouts": [p.to_dict() for p in payouts]}), 200
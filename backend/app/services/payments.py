@@ -1,9 +1,10 @@
 from app.models import Wallet, Transaction, Payout
 from app.extensions import db
+from app.utils.wallets import credit_balance
 
 def credit_wallet(user_id, amount, ref):
     wallet = Wallet.query.filter_by(user_id=user_id).first()
-    wallet.balance += amount
+    credit_balance(wallet.id, amount)
     db.session.add(Transaction(
         wallet_id=wallet.id,
         amount=amount,
@@ -0,0 +1,160 @@
+"""Request-scoped caller resolution shared by every blueprint.
+
+- Verified bearer tokens are cached (token -> claims) in a small process-wide
+  LRU with a short TTL that never outlives the token's own `exp`, so repeat
+  requests skip the HS256 verify.
+- The caller is resolved at most once per request and kept on flask.g.
+- get_user(uid) memoizes User rows per request, so role/owner helpers that
+  look the same user up again do not issue another SELECT.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_request_context, request
+
+from app.extensions import db
+from app.models import User
+from app.utils.jwt_utils import decode_token, get_bearer_token
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+TOKEN_CACHE_SIZE = _env_int("AUTH_TOKEN_CACHE_SIZE", 1024)
+TOKEN_CACHE_TTL_SECONDS = _env_int("AUTH_TOKEN_CACHE_TTL", 60)
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Thread-safe LRU whose entries carry their own expiry (monotonic seconds)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = int(max_entries)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires_at, value = hit
+            if expires_at <= time.monotonic():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl_seconds: float) -> None:
+        if self.max_entries <= 0 or ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_claims = _TTLCache(TOKEN_CACHE_SIZE)
+
+
+def decode_token_cached(token: str | None) -> dict | None:
+    """decode_token() behind the TTL cache. Invalid tokens are never cached."""
+    if not token:
+        return None
+    claims = _claims.get(token)
+    if claims is not None:
+        return claims
+    claims = decode_token(token)
+    if not isinstance(claims, dict):
+        return None
+    ttl = float(TOKEN_CACHE_TTL_SECONDS)
+    try:
+        exp = claims.get("exp")
+        if exp is not None:
+            ttl = min(ttl, float(exp) - time.time())
+    except Exception:
+        pass
+    _claims.put(token, claims, ttl)
+    return claims
+
+
+def clear_token_cache() -> None:
+    _claims.clear()
+
+
+def bearer_token() -> str | None:
+    return get_bearer_token(request.headers.get("Authorization", ""))
+
+
+def _request_state() -> dict:
+    """Per-request auth scratch space on flask.g.
+
+    g belongs to the app context, which can outlive one request (tests, CLI
+    pushing a context), so the state is tagged with the request it was built for.
+    """
+    req = request._get_current_object()
+    state = g.get("_auth_state")
+    if state is None or state.get("request") is not req:
+        state = {"request": req, "claims": _MISSING, "users": {}}
+        g._auth_state = state
+    return state
+
+
+def current_claims() -> dict | None:
+    if not has_request_context():
+        return None
+    state = _request_state()
+    if state["claims"] is _MISSING:
+        state["claims"] = decode_token_cached(bearer_token())
+    return state["claims"]
+
+
+def current_user_id() -> int | None:
+    claims = current_claims()
+    if not claims:
+        return None
+    sub = claims.get("sub")
+    if not sub:
+        return None
+    try:
+        return int(sub)
+    except Exception:
+        return None
+
+
+def get_user(user_id) -> User | None:
+    """User by id, memoized for the rest of the request."""
+    try:
+        uid = int(user_id)
+    except Exception:
+        return None
+    if not has_request_context():
+        return db.session.get(User, uid)
+    users = _request_state()["users"]
+    if uid in users:
+        return users[uid]
+    u = db.session.get(User, uid)
+    users[uid] = u
+    return u
+
+
+def current_user() -> User | None:
+    """The authenticated caller (bearer token), resolved once per request."""
+    uid = current_user_id()
+    if uid is None:
+        return None
+    return get_user(uid)
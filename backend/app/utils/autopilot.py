@@ -3,9 +3,9 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 
 from app.extensions import db
-from app.models import AutopilotSettings, PayoutRequest, NotificationQueue, User, Order, DriverJobOffer, PayoutRecipient
-from app.utils.wallets import post_txn, release_reserved
-from app.utils.paystack_client import initiate_transfer
+from app.models import AutopilotSettings, PayoutRequest
+from app.utils import driver_matching, payout_dispatch, platform_fees
+from app.utils.paystack_client import latency_stats
 
 
 def get_settings() -> AutopilotSettings:
@@ -26,213 +26,71 @@ def should_run(settings: AutopilotSettings, min_interval_seconds: int = 25) -> b
 
 
 def _simulate_transfer(payout: PayoutRequest) -> dict:
-    # Try real provider transfer if recipient exists and key is set
-    try:
-        rec = PayoutRecipient.query.filter_by(user_id=int(payout.user_id)).first()
-        if rec and (rec.provider or 'paystack') == 'paystack':
-            ref = f"PO-{int(payout.id)}-{int(datetime.utcnow().timestamp())}"
-            res = initiate_transfer(float(payout.amount or 0.0), rec.recipient_code, ref)
-            if res.get('ok'):
-                return {"ok": True, "provider": "paystack", "reference": res.get('reference', ref)}
-    except Exception:
-        pass
-
-    
-    # Placeholder for Paystack/Flutterwave transfer call.
-    # In a real integration, you'd call provider API and store reference.
-    ref = f"SIM-{int(payout.id)}-{int(datetime.utcnow().timestamp())}"
-    return {"ok": True, "provider": "SIM", "reference": ref}
+    # Real provider transfer when a recipient exists and the key is set, else simulated.
+    items = payout_dispatch.prepare([payout])
+    return payout_dispatch.send_one(items[0])
 
 
 def process_payouts(max_items: int = 30) -> dict:
-    """Autopilot payouts: approve + pay (simulated) automatically."""
-    processed = 0
-    paid = 0
-    failed = 0
-
+    """Autopilot payouts: approve + pay automatically, provider calls run concurrently."""
     rows = (
         PayoutRequest.query
-        .filter(PayoutRequest.status.in_(["requested", "approved"]))
+        .filter(payout_dispatch.claimable())
         .order_by(PayoutRequest.created_at.asc())
         .limit(max_items)
         .all()
     )
+    res = payout_dispatch.dispatch(rows)
+    res["provider_latency"] = latency_stats()
+    return res
 
-    for p in rows:
-        processed += 1
-        try:
-            # Auto-approve
-            if p.status == "requested":
-                p.status = "approved"
-
-            # Consume reserved funds (was reserved at request time)
-            try:
-                release_reserved(int(p.user_id), float(p.amount or 0.0))
-            except Exception:
-                pass
-
-            # Auto-pay
-            transfer = _simulate_transfer(p)
-            if not transfer.get("ok"):
-                p.status = "failed"
-                failed += 1
-                continue
-
-            p.provider = transfer.get("provider", "SIM")
-            p.provider_reference = transfer.get("reference", "")
-            p.status = "paid"
-
-            # Ledger: debit wallet balance to reflect payout
-            post_txn(int(p.user_id), float(p.amount or 0.0), kind="payout", direction="debit", reference=f"payout:{p.id}")
-
-            db.session.add(p)
-            db.session.commit()
-            paid += 1
-        except Exception:
-            db.session.rollback()
-            failed += 1
 
-    return {"processed": processed, "paid": paid, "failed": failed}
+def process_notification_queue(max_items: int = 80) -> dict:
+    """Send one batch of queued notifications (retries + dead-letter).
 
+    Rows are claimed before sending, so this can run next to dedicated
+    notification workers without double-sending; see app.jobs.notification_worker.
+    """
+    from app.jobs.notification_worker import run_once
 
-def process_notification_queue(max_items: int = 80) -> dict:
-    """Send queued notifications with retries + dead-letter.
+    res = run_once(batch_size=max_items)
+    return {"sent": res["sent"], "failed": res["failed"], "dead": res["dead"], "channels": res["channels"]}
 
-    Status flow:
-      queued -> sent
-      queued -> failed (transient) -> queued (scheduled) -> ...
-      queued -> dead (after max attempts)
 
-    Channels:
-      - sms/whatsapp: Termii (when TERMII_API_KEY configured)
-      - in_app: marked sent (frontend pulls)
-    """
+def auto_assign_drivers(max_items: int | None = None) -> dict:
+    """Offer pending orders to available drivers (batched matcher, see app.utils.driver_matching)."""
+    res = driver_matching.run_tick(max_items or driver_matching.MAX_ORDERS)
+    res["assigned"] = res["offered"]
+    return res
 
-    from datetime import datetime
-    from app.utils.termii_client import send_termii_message
 
-    sent = 0
-    failed = 0
-    dead = 0
-    now = datetime.utcnow()
+def rollup_platform_fees() -> dict:
+    """Fold sharded platform-fee credits into the platform wallet balance."""
+    return platform_fees.rollup()
 
-    rows = (
-        NotificationQueue.query
-        .filter(NotificationQueue.status == "queued")
-        .filter((NotificationQueue.next_attempt_at.is_(None)) | (NotificationQueue.next_attempt_at <= now))
-        .order_by(NotificationQueue.created_at.asc())
-        .limit(max_items)
-        .all()
-    )
 
-    for r in rows:
-        try:
-            ch = (r.channel or "").strip().lower()
-            ok = True
-            detail = ""
-
-            if ch in ("sms", "whatsapp"):
-                termii_channel = "whatsapp" if ch == "whatsapp" else "generic"
-                ok, detail = send_termii_message(channel=termii_channel, to=r.to, message=r.message)
-            elif ch == "in_app":
-                ok = True
-            else:
-                ok = False
-                detail = f"Unsupported channel: {ch}"
-
-            if ok:
-                r.status = "sent"
-                r.sent_at = now
-                r.last_error = None
-                db.session.add(r)
-                db.session.commit()
-                sent += 1
-                continue
-
-            # Failure path
-            r.attempt_count = int(r.attempt_count or 0) + 1
-            r.last_error = (detail or "send_failed")[:240]
-            max_attempts = int(r.max_attempts or 5)
-
-            if int(r.attempt_count) >= max_attempts:
-                r.status = "dead"
-                r.dead_lettered_at = now
-                r.next_attempt_at = None
-                db.session.add(r)
-                db.session.commit()
-                dead += 1
-            else:
-                r.schedule_next_attempt(base_seconds=15, max_seconds=3600)
-                # keep status queued so it will retry later
-                db.session.add(r)
-                db.session.commit()
-                failed += 1
-
-        except Exception as e:
-            db.session.rollback()
-            try:
-                r.attempt_count = int(r.attempt_count or 0) + 1
-                r.last_error = (str(e) or "exception")[:240]
-                max_attempts = int(r.max_attempts or 5)
-                if int(r.attempt_count) >= max_attempts:
-                    r.status = "dead"
-                    r.dead_lettered_at = datetime.utcnow()
-                    r.next_attempt_at = None
-                    db.session.add(r)
-                    db.session.commit()
-                    dead += 1
-                else:
-                    r.status = "queued"
-                    r.schedule_next_attempt(base_seconds=15, max_seconds=3600)
-                    db.session.add(r)
-                    db.session.commit()
-                    failed += 1
-            except Exception:
-                db.session.rollback()
-                failed += 1
-
-    return {"sent": sent, "failed": failed, "dead": dead}
-
-def auto_assign_drivers(max_items: int = 30) -> dict:
-    """Assign available driver to orders that need a driver."""
-    assigned = 0
-    # Find orders that are created/paid and not assigned
-    rows = (
-        Order.query
-        .filter(Order.driver_id.is_(None))
-        .filter(Order.status.in_(["created", "paid"]))
-        .order_by(Order.created_at.asc())
-        .limit(max_items)
-        .all()
-    )
-    for o in rows:
-        try:
-            # Try match drivers by city/state in order meta if available
-            state = getattr(o, "state", None)
-            city = getattr(o, "city", None)
-
-            q = User.query.filter(User.role == "driver").filter(getattr(User, 'is_available', True) == True)
-            if state:
-                q = q.filter(User.state == state) if hasattr(User, "state") else q
-            if city:
-                q = q.filter(User.city == city) if hasattr(User, "city") else q
-
-            driver = q.order_by(User.id.asc()).first()
-            if not driver:
-                continue
-            offer = DriverJobOffer(order_id=int(o.id), driver_id=int(driver.id), status='offered')
-            db.session.add(offer)
-            # Driver must accept; do not set driver_id yet
-            o.status = getattr(o, 'status', 'created')
-            db.session.add(o)
-            db.session.commit()
-            assigned += 1
-        except Exception:
-            db.session.rollback()
-    return {"assigned": assigned}
+def nightly_wallet_reconcile(settings: AutopilotSettings | None = None) -> dict:
+    """Wallet reconciliation at most once per UTC day."""
+    settings = settings or get_settings()
+    try:
+        from app.jobs.wallet_reconciler import reconcile_wallets
+
+        last = settings.last_wallet_reconcile_at.date() if settings.last_wallet_reconcile_at else None
+        today = datetime.utcnow().date()
+        if last == today:
+            return {"skipped": True}
+        result = reconcile_wallets(tolerance=0.01)  # full pass; checkpoints keep it incremental
+        settings.last_wallet_reconcile_at = datetime.utcnow()
+        db.session.add(settings)
+        db.session.commit()
+        return result
+    except Exception:
+        db.session.rollback()
+        return {"skipped": False, "error": "wallet_reconcile_failed"}
 
 
 def tick() -> dict:
+    """Run every autopilot job once (admin "run now"; the scheduler worker runs them on their own intervals)."""
     settings = get_settings()
     if not should_run(settings):
         return {"ok": True, "skipped": True}
@@ -240,20 +98,10 @@ def tick() -> dict:
     payouts = process_payouts()
     queue = process_notification_queue()
     drivers = auto_assign_drivers()
+    fees = rollup_platform_fees()
 
     # Nightly wallet reconciliation (UTC)
-    wallet_reconcile = {"skipped": True}
-    try:
-        from datetime import date
-        from app.jobs.wallet_reconciler import reconcile_wallets
-
-        last = settings.last_wallet_reconcile_at.date() if settings.last_wallet_reconcile_at else None
-        today = datetime.utcnow().date()
-        if last != today:
-            wallet_reconcile = reconcile_wallets(limit=500, tolerance=0.01)
-            settings.last_wallet_reconcile_at = datetime.utcnow()
-    except Exception:
-        wallet_reconcile = {"skipped": False, "error": "wallet_reconcile_failed"}
+    wallet_reconcile = nightly_wallet_reconcile(settings)
 
     settings.last_run_at = datetime.utcnow()
     db.session.add(settings)
@@ -265,6 +113,7 @@ def tick() -> dict:
         "payouts": payouts,
         "queue": queue,
         "drivers": drivers,
+        "platform_fees": fees,
         "wallet_reconcile": wallet_reconcile,
     }
 
@@ -300,83 +149,11 @@ def auto_reassign_stale(max_items: int = 30, stale_minutes: int = 10) -> dict:
 
 
 def expire_offers(max_items: int = 60, expiry_minutes: int = 6) -> dict:
-    from datetime import datetime, timedelta
-    expired = 0
-    cutoff = datetime.utcnow() - timedelta(minutes=expiry_minutes)
-    rows = (
-        DriverJobOffer.query
-        .filter(DriverJobOffer.status == "offered")
-        .filter(DriverJobOffer.created_at <= cutoff)
-        .order_by(DriverJobOffer.created_at.asc())
-        .limit(max_items)
-        .all()
-    )
-    for off in rows:
-        try:
-            off.status = "expired"
-            off.decided_at = datetime.utcnow()
-            db.session.add(off)
-            db.session.commit()
-            expired += 1
-        except Exception:
-            db.session.rollback()
-    return {"expired": expired}
+    return {"expired": driver_matching.expire_stale_offers(expiry_minutes)}
 
 
 def offer_next_driver(max_items: int = 60) -> dict:
-    """Escalation: for orders that have only expired/rejected offers, offer next eligible driver."""
-    offered = 0
-    # Find orders that are paid/created but not assigned
-    orders = (
-        Order.query
-        .filter(Order.status.in_(["paid", "created"]))
-        .order_by(Order.created_at.desc())
-        .limit(max_items)
-        .all()
-    )
-    for o in orders:
-        try:
-            # skip if already assigned
-            if getattr(o, "driver_id", None):
-                continue
-
-            # drivers already offered
-            prev = DriverJobOffer.query.filter_by(order_id=int(o.id)).all()
-            prev_driver_ids = set(int(x.driver_id) for x in prev)
-
-            # pick available drivers by locality if possible
-            qs = User.query.filter_by(role="driver")
-            qs = qs.filter(getattr(User, "is_available") == True) if hasattr(User, "is_available") else qs
-
-            # locality filter if fields exist
-            loc = (getattr(o, "delivery_locality", None) or getattr(o, "locality", None) or "").strip()
-            if loc and hasattr(User, "locality"):
-                qs = qs.filter(User.locality == loc)
-
-            drivers = qs.limit(30).all()
-            chosen = None
-            for d in drivers:
-                if int(d.id) in prev_driver_ids:
-                    continue
-                chosen = d
-                break
-            if not chosen:
-                continue
-
-            off = DriverJobOffer(order_id=int(o.id), driver_id=int(chosen.id), status="offered")
-            db.session.add(off)
-            db.session.commit()
-            offered += 1
-
-            try:
-                from app.utils.messaging import enqueue_in_app, enqueue_sms, enqueue_whatsapp
-                enqueue_in_app(int(chosen.id), f"New delivery offer for order #{o.id}", reference=f"order:{o.id}")
-                enqueue_sms(str(chosen.id), f"FlipTrybe: New delivery offer #{o.id}", reference=f"order:{o.id}")
-                enqueue_whatsapp(str(chosen.id), f"FlipTrybe: New delivery offer #{o.id}", reference=f"order:{o.id}")
-            except Exception:
-                pass
-        except Exception:
-            db.session.rollback()
-            continue
-
-    return {"offered_next": offered}
+    """Escalation: orders whose offers were all expired/rejected go to the next eligible driver."""
+    # The matcher skips orders with an open offer and drivers already offered that order.
+    res = driver_matching.run_tick(max_items)
+    return {"offered_next": res["offered"]}
@@ -0,0 +1,259 @@
+"""Batched driver-to-order matching for the autopilot.
+
+One tick:
+  - expires open offers older than OFFER_EXPIRY_MINUTES (one UPDATE), so
+    their orders are offered to someone else;
+  - loads the pending orders (with their listing's location) and the drivers
+    who already had offers for them, then every available driver with their
+    current load, in a few set-based queries;
+  - matches in memory (match()): one new offer per order and per driver,
+    nearest location tier first (locality, city, state, anywhere), and within
+    a tier the least-loaded driver, longest since their last offer;
+  - writes every offer and its notifications in one transaction.
+
+Drivers only have a profile location (state/city/locality, no coordinates),
+so proximity is the location tier.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, exists, func, or_, select, update
+
+from app.extensions import db
+from app.models import DriverJobOffer, DriverProfile, Listing, Order, User
+from app.utils.messaging import build_notification
+
+
+PENDING_ORDER_STATUSES = ("created", "paid")
+ACTIVE_DELIVERY_STATUSES = ("assigned", "driver_assigned", "picked_up")
+
+# Location tiers, nearest first.
+TIER_LOCALITY, TIER_CITY, TIER_STATE, TIER_ANY = 0, 1, 2, 3
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+MAX_ORDERS = _env_int("DRIVER_MATCH_MAX_ORDERS", 500)
+# Drivers already holding this many open offers/deliveries get no new offer.
+MAX_DRIVER_LOAD = _env_int("DRIVER_MATCH_MAX_LOAD", 3)
+OFFER_EXPIRY_MINUTES = _env_int("DRIVER_OFFER_EXPIRY_MINUTES", 6)
+
+
+def _norm(v) -> str:
+    return (v or "").strip().lower()
+
+
+@dataclass
+class PendingOrder:
+    id: int
+    state: str = ""
+    city: str = ""
+    locality: str = ""
+    excluded: set = field(default_factory=set)
+
+
+@dataclass
+class Candidate:
+    id: int
+    state: str = ""
+    city: str = ""
+    locality: str = ""
+    load: int = 0
+    last_offer_at: datetime | None = None
+    phone: str = ""
+
+
+def _keys(state: str, city: str, locality: str) -> list[tuple[int, tuple]]:
+    """(tier, bucket key) pairs a location belongs to, nearest first."""
+    out = []
+    if state and city and locality:
+        out.append((TIER_LOCALITY, (state, city, locality)))
+    if state and city:
+        out.append((TIER_CITY, (state, city)))
+    if state:
+        out.append((TIER_STATE, (state,)))
+    return out
+
+
+def match(orders: list[PendingOrder], drivers: list[Candidate], *, max_load: int = MAX_DRIVER_LOAD) -> list[tuple[int, int, int]]:
+    """One-to-one order -> driver assignment. Returns [(order_id, driver_id, tier)].
+
+    `orders` should be oldest first; within each tier older orders choose first.
+    Drivers with no profile location can take any order; orders with no
+    location can go to any driver.
+    """
+    buckets: dict[tuple, list] = {}
+    unplaced: list = []
+    everyone: list = []
+    for d in drivers:
+        if d.load >= max_load:
+            continue
+        # Least loaded first, then whoever waited longest for an offer.
+        entry = (d.load, d.last_offer_at.timestamp() if d.last_offer_at else 0.0, d.id)
+        everyone.append(entry)
+        keys = _keys(d.state, d.city, d.locality)
+        if not keys:
+            unplaced.append(entry)
+        for tier, key in keys:
+            buckets.setdefault((tier, key), []).append(entry)
+    for h in buckets.values():
+        heapq.heapify(h)
+    heapq.heapify(unplaced)
+    heapq.heapify(everyone)
+
+    used: set[int] = set()
+
+    def take(heap: list, excluded: set) -> int | None:
+        skipped = []
+        chosen = None
+        while heap:
+            entry = heapq.heappop(heap)
+            did = entry[2]
+            if did in used:
+                continue
+            if did in excluded:
+                skipped.append(entry)
+                continue
+            chosen = did
+            break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    result = []
+    remaining = list(orders)
+    for tier in (TIER_LOCALITY, TIER_CITY, TIER_STATE, TIER_ANY):
+        if not remaining:
+            break
+        left = []
+        for o in remaining:
+            if tier == TIER_ANY:
+                heap = unplaced if _keys(o.state, o.city, o.locality) else everyone
+            else:
+                key = dict(_keys(o.state, o.city, o.locality)).get(tier)
+                heap = buckets.get((tier, key)) if key else None
+            did = take(heap, o.excluded) if heap else None
+            if did is None:
+                left.append(o)
+                continue
+            used.add(did)
+            result.append((o.id, did, tier))
+        remaining = left
+    return result
+
+
+def expire_stale_offers(minutes: int = OFFER_EXPIRY_MINUTES) -> int:
+    now = datetime.utcnow()
+    try:
+        res = db.session.execute(
+            update(DriverJobOffer)
+            .where(DriverJobOffer.status == "offered", DriverJobOffer.created_at <= now - timedelta(minutes=int(minutes)))
+            .values(status="expired", decided_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return int(res.rowcount or 0)
+    except Exception:
+        db.session.rollback()
+        return 0
+
+
+def load_pending_orders(max_orders: int = MAX_ORDERS) -> list[PendingOrder]:
+    """Unassigned orders with no open offer, oldest first, with drivers already tried."""
+    open_offer = exists().where(DriverJobOffer.order_id == Order.id, DriverJobOffer.status == "offered")
+    rows = db.session.execute(
+        select(Order.id, Listing.state, Listing.city, Listing.locality)
+        .outerjoin(Listing, Listing.id == Order.listing_id)
+        .where(Order.driver_id.is_(None), Order.status.in_(PENDING_ORDER_STATUSES), ~open_offer)
+        .order_by(Order.created_at.asc(), Order.id.asc())
+        .limit(int(max_orders))
+    ).all()
+    orders = [PendingOrder(id=int(r[0]), state=_norm(r[1]), city=_norm(r[2]), locality=_norm(r[3])) for r in rows]
+    if orders:
+        by_id = {o.id: o for o in orders}
+        for oid, did in db.session.execute(
+            select(DriverJobOffer.order_id, DriverJobOffer.driver_id).where(DriverJobOffer.order_id.in_(list(by_id)))
+        ):
+            by_id[int(oid)].excluded.add(int(did))
+    return orders
+
+
+def load_candidates() -> list[Candidate]:
+    """Every available driver with profile location and current load, in one query."""
+    offers = (
+        select(
+            DriverJobOffer.driver_id.label("driver_id"),
+            func.sum(case((DriverJobOffer.status == "offered", 1), else_=0)).label("open_offers"),
+            func.max(DriverJobOffer.created_at).label("last_offer_at"),
+        )
+        .group_by(DriverJobOffer.driver_id)
+        .subquery()
+    )
+    active = (
+        select(Order.driver_id.label("driver_id"), func.count(Order.id).label("active"))
+        .where(Order.driver_id.isnot(None), Order.status.in_(ACTIVE_DELIVERY_STATUSES))
+        .group_by(Order.driver_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(
+            User.id, User.phone, DriverProfile.phone, DriverProfile.state, DriverProfile.city, DriverProfile.locality,
+            offers.c.open_offers, offers.c.last_offer_at, active.c.active,
+        )
+        .outerjoin(DriverProfile, DriverProfile.user_id == User.id)
+        .outerjoin(offers, offers.c.driver_id == User.id)
+        .outerjoin(active, active.c.driver_id == User.id)
+        .where(
+            User.role == "driver",
+            User.is_available.is_(True),
+            or_(DriverProfile.id.is_(None), DriverProfile.is_active.is_(True)),
+        )
+    ).all()
+    return [
+        Candidate(
+            id=int(r[0]),
+            phone=(r[2] or r[1] or "").strip(),
+            state=_norm(r[3]),
+            city=_norm(r[4]),
+            locality=_norm(r[5]),
+            load=int(r[6] or 0) + int(r[8] or 0),
+            last_offer_at=r[7],
+        )
+        for r in rows
+    ]
+
+
+def run_tick(max_orders: int = MAX_ORDERS) -> dict:
+    """Expire stale offers, match pending orders to drivers, write all offers in one commit."""
+    expired = expire_stale_offers()
+    orders = load_pending_orders(max_orders)
+    if not orders:
+        return {"orders": 0, "drivers": 0, "offered": 0, "expired": expired, "by_tier": {}}
+    drivers = load_candidates()
+    pairs = match(orders, drivers)
+
+    phones = {d.id: d.phone for d in drivers}
+    by_tier: dict[str, int] = {}
+    tier_names = {TIER_LOCALITY: "locality", TIER_CITY: "city", TIER_STATE: "state", TIER_ANY: "any"}
+    try:
+        for oid, did, tier in pairs:
+            db.session.add(DriverJobOffer(order_id=oid, driver_id=did, status="offered"))
+            ref = f"order:{oid}"
+            db.session.add(build_notification("in_app", str(did), f"New delivery offer for order #{oid}", ref))
+            if phones.get(did):
+                db.session.add(build_notification("sms", phones[did], f"FlipTrybe: New delivery offer #{oid}", ref))
+            by_tier[tier_names[tier]] = by_tier.get(tier_names[tier], 0) + 1
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return {"orders": len(orders), "drivers": len(drivers), "offered": 0, "expired": expired, "by_tier": {}, "error": "write failed"}
+    return {"orders": len(orders), "drivers": len(drivers), "offered": len(pairs), "expired": expired, "by_tier": by_tier}
@@ -0,0 +1,185 @@
+"""Due-time queue for escrow automation.
+
+orders.next_escrow_eval_at is when the escrow runner should next look at a
+HELD order; runners claim from `escrow_status = 'HELD' AND next_escrow_eval_at
+<= now` (a range scan on ix_orders_escrow_status_next_eval) instead of
+reading every HELD order.
+
+  - an order becomes due the moment it is HELD, and again whenever a column
+    the release rules read changes (ORM events below), or its inspection
+    unlock completes;
+  - after a pass that leaves it HELD the runner parks it: until the release
+    time for TIMEOUT orders, otherwise for RECHECK_HOURS (a safety net for
+    changes made outside the ORM); failed settlements retry after
+    RETRY_MINUTES;
+  - while a worker holds it, it is parked for the claim's lease (claim_due);
+  - it leaves the queue (NULL) once it is no longer HELD.
+
+HELD rows written outside the ORM (bulk/Core inserts, raw SQL, imports)
+skip the events and would sit at NULL, never due; schedule_unqueued()
+puts them on the queue. run_escrow_automation calls it on every run and
+escrow workers every BACKFILL_SECONDS.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, event, inspect as sa_inspect, select, update
+
+from app.extensions import db
+from app.models import EscrowUnlock, Order
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+RECHECK_HOURS = _env_int("ESCROW_RECHECK_HOURS", 24)
+RETRY_MINUTES = _env_int("ESCROW_RETRY_MINUTES", 5)
+LEASE_SECONDS = _env_int("ESCROW_LEASE_SECONDS", 300)
+BACKFILL_SECONDS = _env_int("ESCROW_BACKFILL_SECONDS", 60)
+
+INSPECTION_UNLOCK_STEP = "inspection_inspector"
+
+# Order columns the runner's release rules depend on.
+_WAKE_COLUMNS = (
+    "escrow_status", "status", "inspection_outcome", "release_condition",
+    "release_timeout_hours", "escrow_held_at",
+)
+
+_orders = Order.__table__
+
+_RESCHEDULE = (
+    update(_orders)
+    .where(_orders.c.id == bindparam("b_id"), _orders.c.next_escrow_eval_at == bindparam("b_seen"))
+    .values(next_escrow_eval_at=bindparam("b_next"), escrow_claimed_by=None)
+)
+
+
+def _held(order) -> bool:
+    return (order.escrow_status or "NONE") == "HELD"
+
+
+@event.listens_for(Order, "before_insert")
+def _due_on_insert(mapper, connection, target):
+    if target.next_escrow_eval_at is None and _held(target):
+        target.next_escrow_eval_at = datetime.utcnow()
+
+
+@event.listens_for(Order, "before_update")
+def _due_on_change(mapper, connection, target):
+    st = sa_inspect(target)
+    if st.attrs.next_escrow_eval_at.history.has_changes():
+        return
+    if not any(st.attrs[a].history.has_changes() for a in _WAKE_COLUMNS):
+        return
+    target.next_escrow_eval_at = datetime.utcnow() if _held(target) else None
+
+
+def _wake_for_unlock(connection, target) -> None:
+    if target.step != INSPECTION_UNLOCK_STEP or target.unlocked_at is None or not target.order_id:
+        return
+    connection.execute(
+        update(_orders)
+        .where(_orders.c.id == int(target.order_id), _orders.c.escrow_status == "HELD")
+        .values(next_escrow_eval_at=datetime.utcnow())
+    )
+
+
+@event.listens_for(EscrowUnlock, "after_insert")
+def _wake_after_unlock_insert(mapper, connection, target):
+    _wake_for_unlock(connection, target)
+
+
+@event.listens_for(EscrowUnlock, "after_update")
+def _wake_after_unlock_update(mapper, connection, target):
+    if sa_inspect(target).attrs.unlocked_at.history.has_changes():
+        _wake_for_unlock(connection, target)
+
+
+def schedule_unqueued(now: datetime | None = None) -> int:
+    """Make HELD orders with no next_escrow_eval_at due now. Returns how many were queued.
+
+    An index probe on ix_orders_escrow_status_next_eval (NULLs included), so
+    it is cheap when there is nothing to do.
+    """
+    try:
+        res = db.session.execute(
+            update(_orders)
+            .where(_orders.c.escrow_status == "HELD", _orders.c.next_escrow_eval_at.is_(None))
+            .values(next_escrow_eval_at=now or datetime.utcnow())
+        )
+        db.session.commit()
+        return int(res.rowcount or 0)
+    except Exception:
+        db.session.rollback()
+        return 0
+
+
+def claim_due(token: str, *, limit: int, now: datetime | None = None) -> list[tuple[int, datetime]]:
+    """Take up to `limit` due HELD orders for one worker. Returns [(order_id, claimed_until)].
+
+    Claiming pushes next_escrow_eval_at out by LEASE_SECONDS: other workers
+    stop seeing the order as due, and if this worker dies mid-order it comes
+    back on its own once the lease lapses. `SELECT ... FOR UPDATE SKIP LOCKED`
+    on Postgres, then a guarded UPDATE tagged with the token; on SQLite (no
+    SKIP LOCKED) the guarded UPDATE alone decides which worker wins a row.
+    """
+    now = now or datetime.utcnow()
+    until = now + timedelta(seconds=LEASE_SECONDS)
+    try:
+        ids = db.session.scalars(
+            select(Order.id)
+            .where(Order.escrow_status == "HELD", Order.next_escrow_eval_at <= now)
+            .order_by(Order.next_escrow_eval_at.asc(), Order.id.asc())
+            .limit(int(limit))
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            db.session.rollback()
+            return []
+        db.session.execute(
+            update(Order)
+            .where(Order.id.in_(ids), Order.escrow_status == "HELD", Order.next_escrow_eval_at <= now)
+            .values(next_escrow_eval_at=until, escrow_claimed_by=token)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return []
+    won = db.session.scalars(
+        select(Order.id).where(Order.id.in_(ids), Order.escrow_claimed_by == token, Order.next_escrow_eval_at == until)
+    ).all()
+    return [(int(i), until) for i in sorted(won)]
+
+
+def park_until(order: Order, now: datetime) -> datetime:
+    """When to look at an order again after a pass that left it HELD (always later than now)."""
+    outcome = (order.inspection_outcome or "NONE").upper()
+    cond = (order.release_condition or "INSPECTION_PASS").upper()
+    recheck = now + timedelta(hours=RECHECK_HOURS)
+    if outcome == "PASS" and cond == "TIMEOUT":
+        held_at = order.escrow_held_at or order.created_at
+        if held_at:
+            release_at = held_at + timedelta(hours=int(order.release_timeout_hours or 48))
+            return min(release_at, recheck) if release_at > now else retry_at(now)
+    return recheck
+
+
+def retry_at(now: datetime) -> datetime:
+    return now + timedelta(minutes=RETRY_MINUTES)
+
+
+def reschedule(rows: list[dict]) -> None:
+    """Apply [{"b_id", "b_seen", "b_next"}] (claimed_until as b_seen) in one executemany.
+
+    Each row only moves if next_escrow_eval_at is still the claim's lease, so
+    a wake-up that landed meanwhile is not overwritten. No commit.
+    """
+    if rows:
+        db.session.execute(_RESCHEDULE, rows)
@@ -0,0 +1,212 @@
+"""Upload pipeline for listing/shortlet photos.
+
+- Originals are stored by content hash: <upload_dir>/<h[:2]>/<h>.<ext>, so a
+  re-uploaded photo collapses onto the existing file.
+- Fixed-size variants (JPEG thumbnail + WebP thumbnail/medium) are rendered
+  off the request path by a small thread pool into <upload_dir>/variants/.
+- Content-addressed files never change, so they are served with long-lived
+  immutable cache headers (send_from_directory already handles Range/304).
+
+Pillow is optional: without it uploads still work, variant URLs fall back to
+the original file.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import send_from_directory
+
+
+# name -> (max edge px, Pillow format, file extension)
+VARIANTS = {
+    "thumb": (320, "JPEG", "jpg"),
+    "thumb_webp": (320, "WEBP", "webp"),
+    "medium_webp": (1080, "WEBP", "webp"),
+}
+
+VARIANTS_SUBDIR = "variants"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_CHUNK = 64 * 1024
+
+_HASHED_RE = re.compile(r"^(?P<prefix>/api/(?:uploads|shortlet_uploads))/(?P<shard>[0-9a-f]{2})/(?P<digest>[0-9a-f]{64})\.(?P<ext>[a-z0-9]{2,5})$")
+_HASHED_FILE_RE = re.compile(r"^(?:[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]{2,5}|variants/[0-9a-f]{64}_[a-z_]+\.[a-z0-9]{2,5})$")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_inflight: set[str] = set()
+_inflight_lock = threading.Lock()
+
+
+def _workers() -> int:
+    try:
+        return max(1, int((os.getenv("IMAGE_WORKERS") or "2").strip()))
+    except Exception:
+        return 2
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="image-variants")
+        return _executor
+
+
+def store_upload(file_storage, upload_dir: str, url_prefix: str, *, default_ext: str = "jpg") -> str:
+    """Stream an upload to disk under its sha256 and return the relative URL path to store."""
+    original = (getattr(file_storage, "filename", "") or "").strip()
+    ext = original.rsplit(".", 1)[-1].lower() if "." in original else default_ext
+    if ext == "jpeg":
+        ext = "jpg"
+    if not re.fullmatch(r"[a-z0-9]{2,5}", ext):
+        ext = default_ext
+
+    os.makedirs(upload_dir, exist_ok=True)
+    h = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=upload_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            stream = file_storage.stream
+            while True:
+                chunk = stream.read(_CHUNK)
+                if not chunk:
+                    break
+                h.update(chunk)
+                out.write(chunk)
+        digest = h.hexdigest()
+        shard_dir = os.path.join(upload_dir, digest[:2])
+        os.makedirs(shard_dir, exist_ok=True)
+        final_path = os.path.join(shard_dir, f"{digest}.{ext}")
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+        raise
+
+    schedule_variants(final_path, upload_dir)
+    return f"{url_prefix.rstrip('/')}/{digest[:2]}/{digest}.{ext}"
+
+
+def _variant_path(upload_dir: str, digest: str, name: str) -> str:
+    _, _, ext = VARIANTS[name]
+    return os.path.join(upload_dir, VARIANTS_SUBDIR, f"{digest}_{name}.{ext}")
+
+
+def generate_variants(original_path: str, upload_dir: str) -> bool:
+    """Render every missing variant for one original. Returns False when Pillow is unavailable."""
+    try:
+        from PIL import Image, ImageOps
+    except Exception:
+        return False
+
+    digest = os.path.basename(original_path).split(".", 1)[0]
+    os.makedirs(os.path.join(upload_dir, VARIANTS_SUBDIR), exist_ok=True)
+    with Image.open(original_path) as src:
+        src = ImageOps.exif_transpose(src)
+        for name, (edge, fmt, _ext) in VARIANTS.items():
+            dest = _variant_path(upload_dir, digest, name)
+            if os.path.exists(dest):
+                continue
+            img = src.copy()
+            img.thumbnail((edge, edge))
+            if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            fd, tmp = tempfile.mkstemp(prefix=".variant-", dir=os.path.dirname(dest))
+            os.close(fd)
+            try:
+                img.save(tmp, format=fmt, quality=80, optimize=True)
+                os.replace(tmp, dest)
+            except Exception:
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+                raise
+    return True
+
+
+def _run_variants(original_path: str, upload_dir: str) -> None:
+    try:
+        generate_variants(original_path, upload_dir)
+    except Exception:
+        pass
+    finally:
+        with _inflight_lock:
+            _inflight.discard(original_path)
+
+
+def schedule_variants(original_path: str, upload_dir: str) -> None:
+    with _inflight_lock:
+        if original_path in _inflight:
+            return
+        _inflight.add(original_path)
+    try:
+        _get_executor().submit(_run_variants, original_path, upload_dir)
+    except Exception:
+        with _inflight_lock:
+            _inflight.discard(original_path)
+
+
+def variant_urls(stored_path: str | None, base_url: str | None = None) -> dict:
+    """Variant URLs for a content-addressed image path; {} for legacy/external images."""
+    m = _HASHED_RE.match((stored_path or "").strip())
+    if not m:
+        return {}
+    root = (base_url or "").rstrip("/")
+    out = {}
+    for name, (_edge, _fmt, ext) in VARIANTS.items():
+        out[name] = f"{root}{m.group('prefix')}/{VARIANTS_SUBDIR}/{m.group('digest')}_{name}.{ext}"
+    return out
+
+
+def serve_upload(upload_dir: str, filename: str):
+    """send_from_directory + immutable caching for content-addressed files.
+
+    A variant that has not been rendered yet is produced on demand; if that
+    is not possible the original is served with a short cache lifetime.
+    """
+    name = (filename or "").strip()
+    if not _HASHED_FILE_RE.match(name):
+        return send_from_directory(upload_dir, name)
+
+    if name.startswith(f"{VARIANTS_SUBDIR}/") and not os.path.exists(os.path.join(upload_dir, name)):
+        base = name[len(VARIANTS_SUBDIR) + 1:]
+        digest, _, rest = base.partition("_")
+        original = _find_original(upload_dir, digest)
+        if original is None:
+            return send_from_directory(upload_dir, name)  # 404
+        try:
+            generate_variants(original, upload_dir)
+        except Exception:
+            pass
+        if not os.path.exists(os.path.join(upload_dir, name)):
+            resp = send_from_directory(upload_dir, os.path.relpath(original, upload_dir).replace(os.sep, "/"))
+            resp.headers["Cache-Control"] = "public, max-age=60"
+            return resp
+
+    resp = send_from_directory(upload_dir, name, max_age=31536000)
+    resp.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return resp
+
+
+def _find_original(upload_dir: str, digest: str) -> str | None:
+    shard_dir = os.path.join(upload_dir, digest[:2])
+    try:
+        for fn in os.listdir(shard_dir):
+            if fn.startswith(digest + "."):
+                return os.path.join(shard_dir, fn)
+    except Exception:
+        return None
+    return None
@@ -0,0 +1,349 @@
+"""Bulk listing import (CSV / JSONL) for merchants onboarding large catalogues.
+
+The request body is spooled to a temp file in chunks and then read back one
+row at a time, so memory stays flat regardless of file size. Rows are handled
+in batches:
+  - validate + price every row (pricing callback from the market segment),
+  - check the owner's listing cap once per batch,
+  - one multi-row INSERT ... RETURNING per batch, committed per batch.
+
+Bulk inserts bypass the Listing mapper events, so each batch also writes the
+geohash, FTS rows, location rollup and cache generation itself.
+
+Small files run inline; larger ones run on a worker thread and the caller
+polls the BackgroundJob by id.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import BackgroundJob, Listing
+from app.utils.geo import geohash_or_none
+from app.utils.listing_caps import active_declutter_count, listing_limit_for_role
+from app.utils.listing_search import index_rows
+from app.utils.location_counts import record_inserted
+from app.utils.response_cache import LISTINGS_SCOPE, bump_generation
+
+
+JOB_KIND = "listing_import"
+
+FORMATS = ("csv", "jsonl")
+
+_CHUNK = 64 * 1024
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+BATCH_SIZE = _env_int("LISTING_IMPORT_BATCH", 200)
+MAX_ROWS = _env_int("LISTING_IMPORT_MAX_ROWS", 10000)
+# Bodies up to this size are imported inline and answered with full results.
+SYNC_MAX_BYTES = _env_int("LISTING_IMPORT_SYNC_BYTES", 256 * 1024)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="listing-import")
+        return _executor
+
+
+def detect_format(explicit: str | None, content_type: str | None, filename: str | None) -> str | None:
+    fmt = (explicit or "").strip().lower()
+    if fmt in ("ndjson", "jsonlines"):
+        fmt = "jsonl"
+    if fmt in FORMATS:
+        return fmt
+    ct = (content_type or "").split(";", 1)[0].strip().lower()
+    if ct in ("text/csv", "application/csv"):
+        return "csv"
+    if ct in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines", "application/ndjson"):
+        return "jsonl"
+    name = (filename or "").strip().lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return None
+
+
+def spool(stream) -> tuple[str, int]:
+    """Copy a request/file stream to a temp file. Returns (path, size_bytes)."""
+    fd, path = tempfile.mkstemp(prefix="listing-import-", suffix=".tmp")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                out.write(chunk)
+    except Exception:
+        discard_spool(path)
+        raise
+    return path, size
+
+
+def discard_spool(path: str) -> None:
+    try:
+        os.remove(path)
+    except Exception:
+        pass
+
+
+def iter_rows(path: str, fmt: str):
+    """Yield (row_number, dict | None, parse_error | None) lazily from the spooled file."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as fh:
+        if fmt == "csv":
+            reader = csv.DictReader(fh)
+            for n, row in enumerate(reader, start=1):
+                yield n, {(k or "").strip().lower(): v for k, v in row.items() if k}, None
+            return
+        n = 0
+        for line in fh:
+            if not line.strip():
+                continue
+            n += 1
+            try:
+                row = json.loads(line)
+            except Exception:
+                yield n, None, "invalid JSON"
+                continue
+            if not isinstance(row, dict):
+                yield n, None, "row must be a JSON object"
+                continue
+            yield n, row, None
+
+
+def _text(raw, field: str, max_len: int) -> str:
+    s = str(raw).strip() if raw is not None else ""
+    if len(s) > max_len:
+        raise ValueError(f"{field} longer than {max_len} characters")
+    return s
+
+
+def _coord(raw, field: str, lo: float, hi: float) -> float | None:
+    if raw is None or str(raw).strip() == "":
+        return None
+    try:
+        v = float(raw)
+    except Exception:
+        raise ValueError(f"{field} must be a number")
+    if not (lo <= v <= hi):
+        raise ValueError(f"{field} out of range")
+    return v
+
+
+def validate_row(row: dict) -> dict:
+    """Normalized Listing column values for one row. Raises ValueError with a client-facing message."""
+    title = _text(row.get("title"), "title", 120)
+    if not title:
+        raise ValueError("title is required")
+
+    raw_price = row.get("price")
+    try:
+        price = float(raw_price) if raw_price is not None and str(raw_price).strip() != "" else 0.0
+    except Exception:
+        raise ValueError("price must be a number")
+    if price < 0:
+        raise ValueError("price must be >= 0")
+
+    latitude = _coord(row.get("latitude"), "latitude", -90.0, 90.0)
+    longitude = _coord(row.get("longitude"), "longitude", -180.0, 180.0)
+
+    image = row.get("image_path") or row.get("image") or ""
+    return {
+        "title": title,
+        "description": _text(row.get("description"), "description", 20000),
+        "state": _text(row.get("state"), "state", 64),
+        "city": _text(row.get("city"), "city", 64),
+        "locality": _text(row.get("locality"), "locality", 64),
+        "latitude": latitude,
+        "longitude": longitude,
+        "price": price,
+        "image_path": _text(image, "image_path", 512),
+    }
+
+
+def create_job(owner_id: int, *, total: int = 0) -> BackgroundJob:
+    job = BackgroundJob(kind=JOB_KIND, owner_id=int(owner_id), status="queued", total=int(total))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+class _Importer:
+
+    def __init__(self, job_id: int, *, owner_id: int, account_role: str, seller_role: str, apply_pricing):
+        self.job_id = int(job_id)
+        self.owner_id = int(owner_id)
+        self.account_role = account_role
+        self.seller_role = seller_role
+        self.apply_pricing = apply_pricing
+        self.limit = listing_limit_for_role(account_role)
+        self.results: list[dict] = []
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def _fail(self, n: int, message: str) -> None:
+        self.results.append({"row": n, "ok": False, "error": message})
+        self.failed += 1
+
+    def _mapping(self, values: dict, now: datetime) -> dict:
+        listing = Listing(owner_id=self.owner_id, **values)
+        self.apply_pricing(listing, base_price=values["price"], seller_role=self.seller_role)
+        return {
+            "owner_id": self.owner_id,
+            "title": values["title"],
+            "description": values["description"],
+            "state": values["state"],
+            "city": values["city"],
+            "locality": values["locality"],
+            "latitude": values["latitude"],
+            "longitude": values["longitude"],
+            "geohash": geohash_or_none(values["latitude"], values["longitude"]),
+            "price": float(listing.price or 0.0),
+            "base_price": float(listing.base_price or 0.0),
+            "platform_fee": float(listing.platform_fee or 0.0),
+            "final_price": float(listing.final_price or 0.0),
+            "image_path": values["image_path"],
+            "is_active": True,
+            "created_at": now,
+        }
+
+    def flush(self, batch: list[tuple[int, dict | None, str | None]]) -> None:
+        if not batch:
+            return
+        valid = []
+        for n, row, err in batch:
+            if err:
+                self._fail(n, err)
+                continue
+            try:
+                valid.append((n, validate_row(row)))
+            except ValueError as e:
+                self._fail(n, str(e))
+
+        # One cap check per batch instead of one per row.
+        if valid and self.limit is not None:
+            remaining = max(0, int(self.limit) - active_declutter_count(self.owner_id))
+            for n, _values in valid[remaining:]:
+                self._fail(n, f"Listing limit exceeded for role {self.account_role}")
+            valid = valid[:remaining]
+
+        if valid:
+            now = datetime.utcnow()
+            mappings = [self._mapping(values, now) for _n, values in valid]
+            try:
+                ids = db.session.scalars(
+                    insert(Listing).returning(Listing.id, sort_by_parameter_order=True),
+                    mappings,
+                ).all()
+                conn = db.session.connection()
+                index_rows(conn, [(i, m["title"], m["description"]) for i, m in zip(ids, mappings)])
+                record_inserted(conn, [(True, m["state"], m["city"]) for m in mappings])
+                bump_generation(conn, LISTINGS_SCOPE)
+                self._progress(len(batch), extra_ok=len(ids))
+                db.session.commit()
+                for (n, _values), new_id in zip(valid, ids):
+                    self.results.append({"row": n, "ok": True, "id": int(new_id)})
+                self.succeeded += len(ids)
+                self.processed += len(batch)
+                return
+            except Exception as e:
+                db.session.rollback()
+                for n, _values in valid:
+                    self._fail(n, f"insert failed: {str(e)[:160]}")
+
+        self._progress(len(batch))
+        db.session.commit()
+        self.processed += len(batch)
+
+    def _progress(self, batch_len: int, *, extra_ok: int = 0) -> None:
+        job = db.session.get(BackgroundJob, self.job_id)
+        if job is None:
+            return
+        job.processed = self.processed + batch_len
+        job.succeeded = self.succeeded + extra_ok
+        job.failed = self.failed
+
+    def run(self, rows) -> None:
+        job = db.session.get(BackgroundJob, self.job_id)
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        batch = []
+        for n, row, err in rows:
+            if n > MAX_ROWS:
+                self._fail(n, f"row limit exceeded (max {MAX_ROWS} rows per import)")
+                break
+            batch.append((n, row, err))
+            if len(batch) >= BATCH_SIZE:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+
+        self.results.sort(key=lambda r: r["row"])
+        job = db.session.get(BackgroundJob, self.job_id)
+        job.total = self.processed
+        job.processed = self.processed
+        job.succeeded = self.succeeded
+        job.failed = self.failed
+        job.results_json = json.dumps(self.results, separators=(",", ":"))
+        job.status = "succeeded"
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def run_import(job_id: int, path: str, fmt: str, *, owner_id: int, account_role: str, seller_role: str, apply_pricing) -> None:
+    """Import every row of the spooled file into listings, recording progress on the job. Removes the file."""
+    importer = _Importer(job_id, owner_id=owner_id, account_role=account_role, seller_role=seller_role, apply_pricing=apply_pricing)
+    try:
+        importer.run(iter_rows(path, fmt))
+    except Exception as e:
+        db.session.rollback()
+        try:
+            job = db.session.get(BackgroundJob, int(job_id))
+            if job is not None:
+                importer.results.sort(key=lambda r: r["row"])
+                job.results_json = json.dumps(importer.results, separators=(",", ":"))
+                job.status = "failed"
+                job.error = str(e)[:240]
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+    finally:
+        discard_spool(path)
+
+
+def _run_in_app(app, *args, **kwargs) -> None:
+    with app.app_context():
+        try:
+            run_import(*args, **kwargs)
+        finally:
+            db.session.remove()
+
+
+def submit_import(app, job_id: int, path: str, fmt: str, **kwargs) -> None:
+    _get_executor().submit(_run_in_app, app, job_id, path, fmt, **kwargs)
@@ -0,0 +1,230 @@
+"""Full-text search over listing title/description.
+
+Backends:
+  - sqlite:   FTS5 virtual table `listings_fts` (rowid = listings.id), kept in
+              sync by the Listing mapper events below.
+  - postgres: generated `listings.search_vector` tsvector column + GIN index
+              (maintained by the database itself).
+  - fallback: the old ILIKE filter, newest first; also used when the FTS
+              table / search_vector column has not been created yet.
+
+Results are ranked by text relevance blended with recency, and every query
+token is prefix-matched so search-as-you-type works.
+"""
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, event, func, inspect as sa_inspect, literal_column, or_, text
+
+from app.extensions import db
+from app.models import Listing
+
+
+FTS_TABLE = "listings_fts"
+
+# Relevance is divided by (1 + age_days / RECENCY_HALF_DAYS).
+RECENCY_HALF_DAYS = 30.0
+
+MAX_QUERY_TOKENS = 8
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Kept out of db.metadata so create_all() never builds a plain table for it.
+_fts_metadata = MetaData()
+listings_fts = Table(
+    FTS_TABLE,
+    _fts_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("title", Text),
+    Column("description", Text),
+)
+
+_FTS_READY: bool | None = None
+_PG_VECTOR_READY: bool | None = None
+
+
+def _dialect(bind=None) -> str:
+    try:
+        return (bind or db.engine).dialect.name
+    except Exception:
+        return ""
+
+
+def tokens(q: str) -> list[str]:
+    return [t.lower() for t in _TOKEN_RE.findall(q or "")][:MAX_QUERY_TOKENS]
+
+
+def _fts5_match(toks: list[str]) -> str:
+    # Quoted tokens cannot smuggle FTS operators; trailing * = prefix match.
+    return " ".join(f'"{t}"*' for t in toks)
+
+
+def _pg_tsquery(toks: list[str]) -> str:
+    return " & ".join(f"{t}:*" for t in toks)
+
+
+def _fts_table_exists(conn) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"),
+        {"n": FTS_TABLE},
+    ).first()
+    return row is not None
+
+
+def fts_ready(conn=None) -> bool:
+    global _FTS_READY
+    if _FTS_READY is not None:
+        return _FTS_READY
+    try:
+        if conn is None:
+            with db.engine.connect() as c:
+                _FTS_READY = _fts_table_exists(c)
+        else:
+            _FTS_READY = _fts_table_exists(conn)
+    except Exception:
+        _FTS_READY = False
+    return _FTS_READY
+
+
+def pg_vector_ready() -> bool:
+    """Whether listings.search_vector exists (reflected once per process)."""
+    global _PG_VECTOR_READY
+    if _PG_VECTOR_READY is not None:
+        return _PG_VECTOR_READY
+    try:
+        cols = sa_inspect(db.engine).get_columns(Listing.__tablename__)
+        _PG_VECTOR_READY = any(c["name"] == "search_vector" for c in cols)
+    except Exception:
+        _PG_VECTOR_READY = False
+    return _PG_VECTOR_READY
+
+
+def backend_name() -> str:
+    d = _dialect()
+    if d == "sqlite":
+        return "sqlite_fts5" if fts_ready() else "like"
+    if d == "postgresql":
+        return "postgres" if pg_vector_ready() else "like"
+    return "like"
+
+
+def ensure_search_index() -> None:
+    """Create and backfill the SQLite FTS table if it is missing (dev DBs built via create_all)."""
+    global _FTS_READY
+    if _dialect() != "sqlite":
+        return
+    try:
+        with db.engine.begin() as conn:
+            if _fts_table_exists(conn):
+                _FTS_READY = True
+                return
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "title, description, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            ))
+            conn.execute(text(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+                "SELECT id, COALESCE(title, ''), COALESCE(description, '') FROM listings"
+            ))
+        _FTS_READY = True
+    except Exception:
+        _FTS_READY = False
+
+
+def rebuild_search_index() -> int:
+    """Clear and repopulate the SQLite FTS rows from listings. Returns rows indexed."""
+    if _dialect() != "sqlite" or not fts_ready():
+        return 0
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        res = conn.execute(text(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+            "SELECT id, COALESCE(title, ''), COALESCE(description, '') FROM listings"
+        ))
+        return int(res.rowcount or 0)
+
+
+def index_rows(conn, rows) -> None:
+    """Upsert (id, title, description) tuples into the FTS table on the given connection.
+
+    Used by write paths that bypass the ORM (bulk inserts); ORM writes are synced by events.
+    """
+    if _dialect(conn) != "sqlite" or not fts_ready(conn):
+        return
+    rows = list(rows)
+    if not rows:
+        return
+    conn.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": int(r[0])} for r in rows])
+    conn.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (:id, :title, :description)"),
+        [{"id": int(r[0]), "title": r[1] or "", "description": r[2] or ""} for r in rows],
+    )
+
+
+def apply_search(q, search_q: str, *, ranked: bool = True):
+    """Filter a Listing query by full-text match.
+
+    Returns (query, ranked_flag). When ranked_flag is True the query is already
+    ordered by blended relevance/recency; otherwise the caller orders it.
+    """
+    toks = tokens(search_q)
+    if not toks:
+        return q, False
+
+    backend = backend_name()
+    if backend == "sqlite_fts5":
+        q = q.join(listings_fts, listings_fts.c.rowid == Listing.id)
+        q = q.filter(text(f"{FTS_TABLE} MATCH :fts_match")).params(fts_match=_fts5_match(toks))
+        if not ranked:
+            return q, False
+        # bm25() is negative; more negative = more relevant.
+        relevance = -func.bm25(literal_column(FTS_TABLE))
+        age_days = func.julianday("now") - func.julianday(Listing.created_at)
+        score = relevance / (1.0 + func.max(age_days, 0.0) / RECENCY_HALF_DAYS)
+        return q.order_by(score.desc(), Listing.id.desc()), True
+
+    if backend == "postgres":
+        tsq = func.to_tsquery("simple", _pg_tsquery(toks))
+        vec = literal_column("listings.search_vector")
+        q = q.filter(vec.op("@@")(tsq))
+        if not ranked:
+            return q, False
+        relevance = func.ts_rank_cd(vec, tsq)
+        age_days = func.date_part("epoch", func.now() - Listing.created_at) / 86400.0
+        score = relevance / (1.0 + func.greatest(age_days, 0.0) / RECENCY_HALF_DAYS)
+        return q.order_by(score.desc(), Listing.id.desc()), True
+
+    like = f"%{search_q.strip()}%"
+    return q.filter(or_(Listing.title.ilike(like), Listing.description.ilike(like))), False
+
+
+# ---------------------------
+# SQLite FTS sync on ORM writes
+# ---------------------------
+
+@event.listens_for(Listing, "after_insert")
+def _fts_after_insert(mapper, connection, target):
+    if _dialect(connection) != "sqlite" or not fts_ready(connection):
+        return
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (:id, :title, :description)"),
+        {"id": int(target.id), "title": target.title or "", "description": target.description or ""},
+    )
+
+
+@event.listens_for(Listing, "after_update")
+def _fts_after_update(mapper, connection, target):
+    if _dialect(connection) != "sqlite" or not fts_ready(connection):
+        return
+    state = sa_inspect(target)
+    if not (state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes()):
+        return
+    index_rows(connection, [(target.id, target.title, target.description)])
+
+
+@event.listens_for(Listing, "after_delete")
+def _fts_after_delete(mapper, connection, target):
+    if _dialect(connection) != "sqlite" or not fts_ready(connection):
+        return
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": int(target.id)})
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import event, inspect as sa_inspect, text
+
+from app.extensions import db
+from app.models import Listing, ListingLocationCount
+
+
+_UPSERT_SQL = text("""
+    INSERT INTO listing_location_counts (state, city, count, updated_at)
+    VALUES (:state, :city, :delta, :now)
+    ON CONFLICT (state, city)
+    DO UPDATE SET count = listing_location_counts.count + excluded.count,
+                  updated_at = excluded.updated_at
+""")
+
+
+def _key(state, city) -> tuple[str, str] | None:
+    s = (state or "").strip()
+    if not s:
+        return None
+    return s[:64], (city or "").strip()[:64]
+
+
+def _counts(active, state, city) -> tuple[str, str] | None:
+    """Rollup key for a listing, or None when it is not counted (inactive / no state)."""
+    if active is False:
+        return None
+    return _key(state, city)
+
+
+def _bump(connection, key: tuple[str, str] | None, delta: int) -> None:
+    if key is None or not delta:
+        return
+    connection.execute(_UPSERT_SQL, {"state": key[0], "city": key[1], "delta": int(delta), "now": datetime.utcnow()})
+
+
+def _previous(state, attr: str):
+    hist = state.attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    return getattr(state.object, attr)
+
+
+@event.listens_for(Listing, "after_insert")
+def _rollup_after_insert(mapper, connection, target):
+    _bump(connection, _counts(getattr(target, "is_active", True), target.state, target.city), +1)
+
+
+@event.listens_for(Listing, "after_update")
+def _rollup_after_update(mapper, connection, target):
+    st = sa_inspect(target)
+    if not any(st.attrs[a].history.has_changes() for a in ("is_active", "state", "city")):
+        return
+    old = _counts(_previous(st, "is_active"), _previous(st, "state"), _previous(st, "city"))
+    new = _counts(getattr(target, "is_active", True), target.state, target.city)
+    if old == new:
+        return
+    _bump(connection, old, -1)
+    _bump(connection, new, +1)
+
+
+@event.listens_for(Listing, "after_delete")
+def _rollup_after_delete(mapper, connection, target):
+    _bump(connection, _counts(getattr(target, "is_active", True), target.state, target.city), -1)
+
+
+def record_inserted(connection, rows) -> None:
+    """Apply rollup increments for (is_active, state, city) tuples written outside the ORM (bulk inserts)."""
+    deltas: dict[tuple[str, str], int] = {}
+    for active, state, city in rows:
+        key = _counts(active, state, city)
+        if key is not None:
+            deltas[key] = deltas.get(key, 0) + 1
+    for key, delta in deltas.items():
+        _bump(connection, key, delta)
+
+
+def top_locations(limit: int | None = None) -> list[dict]:
+    q = (
+        ListingLocationCount.query
+        .filter(ListingLocationCount.count > 0)
+        .order_by(ListingLocationCount.count.desc(), ListingLocationCount.id.asc())
+    )
+    if limit:
+        q = q.limit(int(limit))
+    return [r.to_dict() for r in q.all()]
+
+
+def rebuild_location_counts() -> dict:
+    """Recompute the rollup from listings in one GROUP BY and replace the table contents."""
+    rows = db.session.execute(text("""
+        SELECT TRIM(state) AS s, TRIM(COALESCE(city, '')) AS c, COUNT(*) AS n
+        FROM listings
+        WHERE state IS NOT NULL AND TRIM(state) != '' AND COALESCE(is_active, :active) = :active
+        GROUP BY TRIM(state), TRIM(COALESCE(city, ''))
+    """), {"active": True}).fetchall()
+    now = datetime.utcnow()
+    try:
+        ListingLocationCount.query.delete()
+        db.session.bulk_insert_mappings(ListingLocationCount, [
+            {"state": (r[0] or "")[:64], "city": (r[1] or "")[:64], "count": int(r[2] or 0), "updated_at": now}
+            for r in rows
+        ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {"ok": True, "locations": len(rows), "listings": int(sum(int(r[2] or 0) for r in rows))}
@@ -0,0 +1,210 @@
+"""Chunked, resumable maintenance jobs (backfills / data repairs).
+
+A task is a function registered with @maintenance_task that receives one
+primary-key-ordered chunk of rows and returns the changes it made (or would
+make, in dry-run mode) as a list of small dicts. The runner:
+
+  - walks the table in `id > checkpoint ORDER BY id LIMIT chunk` windows,
+  - commits each chunk together with the job's new checkpoint, so a crash
+    loses at most one chunk and a restart continues where it stopped,
+  - rolls the chunk back instead of committing it when dry_run is set,
+  - expunges the session between chunks so memory stays flat.
+
+Progress lives on a BackgroundJob row; a "running" job whose heartbeat
+(updated_at) is older than STALE_SECONDS is treated as orphaned and is
+picked up again by the next start_job() for the same task.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import BackgroundJob
+
+
+KIND_PREFIX = "maintenance:"
+
+# Changes reported back on the job (dry-run previews and audit samples).
+MAX_SAMPLES = 50
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+DEFAULT_CHUNK_SIZE = _env_int("MAINTENANCE_CHUNK_SIZE", 500)
+STALE_SECONDS = _env_int("MAINTENANCE_STALE_SECONDS", 120)
+
+_TASKS: dict[str, dict] = {}
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def maintenance_task(name: str, *, model, chunk_size: int | None = None):
+    """Register fn(rows, *, dry_run) -> list[dict] as a chunked task over model's primary key."""
+    def deco(fn):
+        _TASKS[name] = {"fn": fn, "model": model, "chunk_size": int(chunk_size or DEFAULT_CHUNK_SIZE)}
+        return fn
+    return deco
+
+
+def task_names() -> list[str]:
+    return sorted(_TASKS)
+
+
+def _kind(name: str) -> str:
+    return f"{KIND_PREFIX}{name}"
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="maintenance")
+        return _executor
+
+
+def _is_stale(job: BackgroundJob, now: datetime) -> bool:
+    beat = job.updated_at or job.started_at or job.created_at
+    return beat is None or (now - beat) > timedelta(seconds=STALE_SECONDS)
+
+
+def start_job(name: str, *, dry_run: bool = False, owner_id: int | None = None) -> tuple[BackgroundJob, bool]:
+    """Create the job row, or reuse an unfinished one for the same task/mode.
+
+    Returns (job, should_run). should_run is False when a live worker is
+    already processing that job.
+    """
+    if name not in _TASKS:
+        raise KeyError(name)
+    now = datetime.utcnow()
+    pending = (
+        BackgroundJob.query
+        .filter(BackgroundJob.kind == _kind(name), BackgroundJob.status.in_(("queued", "running")))
+        .order_by(BackgroundJob.id.desc())
+        .all()
+    )
+    for job in pending:
+        if bool(job.params().get("dry_run")) != bool(dry_run):
+            continue
+        if job.status == "running" and not _is_stale(job, now):
+            return job, False
+        job.status = "queued"
+        job.updated_at = now
+        db.session.commit()
+        return job, True
+
+    job = BackgroundJob(
+        kind=_kind(name),
+        owner_id=int(owner_id) if owner_id is not None else None,
+        status="queued",
+        params_json=json.dumps({"task": name, "dry_run": bool(dry_run)}, separators=(",", ":")),
+        updated_at=now,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job, True
+
+
+def run_job(job_id: int) -> BackgroundJob | None:
+    """Process a maintenance job from its checkpoint to the end of the table."""
+    job = db.session.get(BackgroundJob, int(job_id))
+    if job is None:
+        return None
+    name = job.params().get("task") or (job.kind or "")[len(KIND_PREFIX):]
+    spec = _TASKS.get(name)
+    if spec is None:
+        job.status = "failed"
+        job.error = f"unknown task {name!r}"
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job
+
+    model = spec["model"]
+    fn = spec["fn"]
+    chunk_size = spec["chunk_size"]
+    dry_run = bool(job.params().get("dry_run"))
+    pk = model.__mapper__.primary_key[0]
+
+    try:
+        job.status = "running"
+        job.started_at = job.started_at or datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+        if not job.total:
+            job.total = int(model.query.count())
+        db.session.commit()
+
+        samples = job.results()
+        last_id = int(job.checkpoint or 0)
+        while True:
+            rows = model.query.filter(pk > last_id).order_by(pk.asc()).limit(chunk_size).all()
+            if not rows:
+                break
+            changes = list(fn(rows, dry_run=dry_run) or [])
+            last_id = int(getattr(rows[-1], pk.key))
+            n_rows = len(rows)
+            if dry_run:
+                db.session.rollback()
+
+            job = db.session.get(BackgroundJob, int(job_id))
+            job.checkpoint = str(last_id)
+            job.processed = int(job.processed or 0) + n_rows
+            job.succeeded = int(job.succeeded or 0) + len(changes)
+            if len(samples) < MAX_SAMPLES and changes:
+                samples.extend(changes[: MAX_SAMPLES - len(samples)])
+                job.results_json = json.dumps(samples, separators=(",", ":"), default=str)
+            job.updated_at = datetime.utcnow()
+            db.session.commit()
+            # Keep the identity map from growing across chunks.
+            db.session.expunge_all()
+
+        job = db.session.get(BackgroundJob, int(job_id))
+        job.status = "succeeded"
+        job.finished_at = datetime.utcnow()
+        job.updated_at = job.finished_at
+        db.session.commit()
+        return job
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(BackgroundJob, int(job_id))
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)[:240]
+            job.updated_at = datetime.utcnow()
+            job.finished_at = job.updated_at
+            db.session.commit()
+        return job
+
+
+def resume_job(job_id: int) -> BackgroundJob | None:
+    """Re-queue a failed job so run_job continues from its checkpoint."""
+    job = db.session.get(BackgroundJob, int(job_id))
+    if job is None or not (job.kind or "").startswith(KIND_PREFIX):
+        return None
+    if job.status == "failed" or (job.status == "running" and _is_stale(job, datetime.utcnow())):
+        job.status = "queued"
+        job.error = None
+        job.finished_at = None
+        job.updated_at = datetime.utcnow()
+        db.session.commit()
+    return job
+
+
+def _run_in_app(app, job_id: int) -> None:
+    with app.app_context():
+        try:
+            run_job(job_id)
+        finally:
+            db.session.remove()
+
+
+def submit_job(app, job_id: int) -> None:
+    _get_executor().submit(_run_in_app, app, int(job_id))
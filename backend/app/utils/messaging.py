@@ -6,8 +6,9 @@ from app.extensions import db
 from app.models import NotificationQueue
 
 
-def _enqueue(channel: str, to: str, message: str, reference: str = "") -> dict:
-    q = NotificationQueue(
+def build_notification(channel: str, to: str, message: str, reference: str = "") -> NotificationQueue:
+    """Unsaved queue row, for callers that add it inside their own transaction."""
+    return NotificationQueue(
         channel=channel,
         to=(to or "").strip(),
         message=message,
@@ -17,6 +18,10 @@ def _enqueue(channel: str, to: str, message: str, reference: str = "") -> dict:
         max_attempts=5,
         next_attempt_at=datetime.utcnow(),
     )
+
+
+def _enqueue(channel: str, to: str, message: str, reference: str = "") -> dict:
+    q = build_notification(channel, to, message, reference)
     db.session.add(q)
     db.session.commit()
     return {"ok": True, "id": int(q.id)}
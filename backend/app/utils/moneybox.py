@@ -166,7 +166,8 @@ def maybe_award_bonus(acct: MoneyBoxAccount) -> float:
     return bonus
 
 
-def autosave_from_commission(*, user_id: int, amount: float, kind: str, reference: str) -> float:
+def autosave_from_commission(*, user_id: int, amount: float, kind: str, reference: str, commit: bool = True) -> float:
+    # commit=False: the sweep joins the caller's transaction (batch ledger postings).
     try:
         amt = float(amount or 0.0)
     except Exception:
@@ -181,7 +182,13 @@ def autosave_from_commission(*, user_id: int, amount: float, kind: str, referenc
     if not _is_allowed_role(u):
         return 0.0
 
-    acct = get_or_create_account(int(user_id))
+    if commit:
+        acct = get_or_create_account(int(user_id))
+    else:
+        # a new account never has autosave on
+        acct = MoneyBoxAccount.query.filter_by(user_id=int(user_id)).first()
+        if not acct:
+            return 0.0
     if not bool(acct.autosave_enabled) or float(acct.autosave_percent or 0.0) <= 0.0:
         return 0.0
 
@@ -211,6 +218,9 @@ def autosave_from_commission(*, user_id: int, amount: float, kind: str, referenc
     acct.updated_at = _now()
     record_ledger(acct, "AUTOSAVE", sweep, reference=reference, meta={"kind": kind, "percent": percent}, idempotency_key=idem_key)
 
+    if not commit:
+        db.session.add(acct)
+        return float(sweep)
     try:
         db.session.add(acct)
         db.session.commit()
@@ -0,0 +1,84 @@
+"""Shared query/response shape for per-user order lists (buyer, merchant, driver).
+
+Lists are newest first on (owner column, created_at, id) indexes, with
+?status= (comma-separated) filtered in SQL. ?limit= / ?cursor= return the
+paged envelope {"ok", "items", "count", "limit", "next_cursor"}; without
+either, the bare list of the newest LEGACY_LIST_LIMIT rows that clients
+already read.
+
+Rows are Order.to_summary_dict(): only Order.SUMMARY_COLUMNS are loaded,
+and listing titles come from one IN (...) query per page. ?view=full gives
+the full to_dict() rows instead.
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from app.extensions import db
+from app.models import Listing, Order
+from app.utils.pagination import keyset_page, parse_limit, wants_page
+
+
+ORDER_LIST_MAX_PAGE_SIZE = 100
+LEGACY_LIST_LIMIT = 200
+
+
+def parse_statuses(args) -> list[str]:
+    raw = (args.get("status") or "").strip().lower()
+    return sorted({s.strip() for s in raw.split(",") if s.strip()})
+
+
+def filter_statuses(q, statuses: list[str]):
+    if not statuses:
+        return q
+    if len(statuses) == 1:
+        return q.filter(Order.status == statuses[0])
+    return q.filter(Order.status.in_(statuses))
+
+
+def summary_only(q):
+    """Load just the columns to_summary_dict() reads."""
+    return q.options(load_only(*(getattr(Order, c) for c in Order.SUMMARY_COLUMNS)))
+
+
+def listing_titles(orders) -> dict[int, str]:
+    ids = sorted({int(o.listing_id) for o in orders if o.listing_id})
+    if not ids:
+        return {}
+    return {
+        int(i): title or ""
+        for i, title in db.session.execute(select(Listing.id, Listing.title).where(Listing.id.in_(ids)))
+    }
+
+
+def full_rows(orders) -> list[dict]:
+    return [o.to_dict() for o in orders]
+
+
+def summaries(orders) -> list[dict]:
+    titles = listing_titles(orders)
+    return [o.to_summary_dict(listing_title=titles.get(int(o.listing_id or 0), "")) for o in orders]
+
+
+def envelope(items: list, limit: int, next_cursor: str | None) -> dict:
+    return {"ok": True, "items": items, "count": len(items), "limit": limit, "next_cursor": next_cursor}
+
+
+def order_list(q, args) -> tuple[object, int]:
+    """Run an owner-filtered Order query for a list endpoint. Returns (body, status) for jsonify."""
+    q = filter_statuses(q, parse_statuses(args))
+    if (args.get("view") or "").strip().lower() == "full":
+        serialize = full_rows
+    else:
+        q = summary_only(q)
+        serialize = summaries
+    if not wants_page(args):
+        rows = q.order_by(Order.created_at.desc(), Order.id.desc()).limit(LEGACY_LIST_LIMIT).all()
+        return serialize(rows), 200
+    limit = parse_limit(args.get("limit"), maximum=ORDER_LIST_MAX_PAGE_SIZE)
+    try:
+        rows, next_cursor = keyset_page(q, Order.created_at, Order.id, cursor_raw=args.get("cursor"), limit=limit)
+    except ValueError:
+        return {"message": "Invalid cursor"}, 400
+    return envelope(serialize(rows), limit, next_cursor), 200
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+
+def parse_limit(raw, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    try:
+        limit = int(str(raw).strip()) if raw is not None and str(raw).strip() != "" else int(default)
+    except Exception:
+        limit = int(default)
+    if limit <= 0:
+        limit = int(default)
+    if limit > int(maximum):
+        limit = int(maximum)
+    return limit
+
+
+def wants_all(args) -> bool:
+    """Explicit opt-in for the legacy unpaginated response (?all=1)."""
+    raw = (args.get("all") or "").strip().lower()
+    return raw in ("1", "true", "yes")
+
+
+def wants_page(args) -> bool:
+    """Paged envelope requested (?limit= or ?cursor=); list endpoints that predate
+    paging keep their bare-list response otherwise."""
+    return args.get("cursor") is not None or args.get("limit") is not None
+
+
+def encode_cursor(created_at: datetime | None, row_id: int) -> str:
+    payload = {"c": created_at.isoformat() if created_at else None, "i": int(row_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(raw: str | None) -> tuple[datetime | None, int] | None:
+    """Returns (created_at, id) or None when the cursor is missing/invalid."""
+    s = (raw or "").strip()
+    if not s:
+        return None
+    try:
+        padded = s + "=" * (-len(s) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        row_id = int(payload.get("i"))
+        c = payload.get("c")
+        created_at = datetime.fromisoformat(c) if c else None
+        return created_at, row_id
+    except Exception:
+        return None
+
+
+def apply_keyset_desc(q, created_col, id_col, cursor: tuple[datetime | None, int] | None):
+    """Newest-first keyset: rows strictly after the cursor in (created_at DESC, id DESC) order."""
+    if cursor is not None:
+        created_at, row_id = cursor
+        if created_at is None:
+            q = q.filter(id_col < int(row_id))
+        else:
+            q = q.filter(or_(
+                created_col < created_at,
+                and_(created_col == created_at, id_col < int(row_id)),
+            ))
+    return q.order_by(created_col.desc(), id_col.desc())
+
+
+def keyset_page(q, created_col, id_col, *, cursor_raw: str | None, limit: int):
+    """Fetch one page. Returns (rows, next_cursor). Raises ValueError on a malformed cursor."""
+    cursor = decode_cursor(cursor_raw)
+    if (cursor_raw or "").strip() and cursor is None:
+        raise ValueError("invalid cursor")
+    q = apply_keyset_desc(q, created_col, id_col, cursor)
+    rows = q.limit(int(limit) + 1).all()
+    next_cursor = None
+    if len(rows) > int(limit):
+        rows = rows[: int(limit)]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key, None), int(getattr(last, id_col.key)))
+    return rows, next_cursor
+
+
+def keyset_merge_page(queries, created_col, id_col, *, cursor_raw: str | None, limit: int):
+    """keyset_page() over the union of disjoint queries, each read on its own index.
+
+    Every query fetches at most limit + 1 rows past the cursor; the newest
+    `limit` of the merged rows form the page. Raises ValueError on a malformed cursor.
+    """
+    cursor = decode_cursor(cursor_raw)
+    if (cursor_raw or "").strip() and cursor is None:
+        raise ValueError("invalid cursor")
+    rows = []
+    for q in queries:
+        rows.extend(apply_keyset_desc(q, created_col, id_col, cursor).limit(int(limit) + 1).all())
+    rows.sort(key=lambda r: (getattr(r, created_col.key, None) or datetime.min, int(getattr(r, id_col.key))), reverse=True)
+    next_cursor = None
+    if len(rows) > int(limit):
+        rows = rows[: int(limit)]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key, None), int(getattr(last, id_col.key)))
+    return rows, next_cursor
+
+
+def encode_distance_cursor(distance_km: float, row_id: int) -> str:
+    raw = json.dumps({"d": float(distance_km), "i": int(row_id)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_distance_cursor(raw: str | None) -> tuple[float, int] | None:
+    """Returns (distance_km, id) for nearest-first pages, or None when missing/invalid."""
+    s = (raw or "").strip()
+    if not s:
+        return None
+    try:
+        padded = s + "=" * (-len(s) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return float(payload.get("d")), int(payload.get("i"))
+    except Exception:
+        return None
+
+
+def encode_offset_cursor(offset: int) -> str:
+    raw = json.dumps({"o": int(offset)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(raw: str | None) -> int | None:
+    """Offset cursor for relevance-ranked results (no stable keyset there)."""
+    s = (raw or "").strip()
+    if not s:
+        return None
+    try:
+        padded = s + "=" * (-len(s) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        offset = int(payload.get("o"))
+        return offset if offset >= 0 else None
+    except Exception:
+        return None
+
+
+def offset_page(q, *, cursor_raw: str | None, limit: int):
+    """Fetch one page of an already-ordered query. Raises ValueError on a malformed cursor."""
+    offset = decode_offset_cursor(cursor_raw)
+    if (cursor_raw or "").strip() and offset is None:
+        raise ValueError("invalid cursor")
+    offset = offset or 0
+    rows = q.offset(offset).limit(int(limit) + 1).all()
+    next_cursor = None
+    if len(rows) > int(limit):
+        rows = rows[: int(limit)]
+        next_cursor = encode_offset_cursor(offset + int(limit))
+    return rows, next_cursor
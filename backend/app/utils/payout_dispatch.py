@@ -0,0 +1,415 @@
+"""Concurrent payout dispatch for the autopilot.
+
+A batch of payouts goes through these phases:
+
+  0. claim (caller's thread, DB): a guarded UPDATE moves the rows to
+     "processing"; only rows this run moved are sent, so the scheduler and
+     the admin endpoints never send the same payout twice. A run that dies
+     mid-batch leaves its rows "processing"; they become claimable again
+     after CLAIM_LEASE_SECONDS and are re-sent under the same reference
+     (PO-<id>); the provider refuses the duplicate and the transfer is
+     looked up by reference instead (see "unknown" below);
+  1. prepare (caller's thread, DB): look up every recipient in one query
+     and freeze what the provider call needs into a plain PreparedPayout;
+  2. send (thread pool, no DB): provider transfers run concurrently over the
+     shared keep-alive session in paystack_client, capped at DISPATCH_WORKERS
+     in flight and paced per provider by PAYOUT_RATE_LIMIT_<PROVIDER> (req/s).
+     In bulk mode (PAYOUT_TRANSFER_MODE=bulk, the default) Paystack payouts
+     go out as /transfer/bulk calls of up to BULK_SIZE items; items the bulk
+     response does not mention (or every item, when the call as a whole
+     failed) are retried as single transfers with the same reference, so the
+     provider refuses anything that did go through. Items the provider
+     rejected are failed, not retried.
+     A timeout, a 5xx or a "duplicate reference" reply does not say whether
+     the money went out, so the outcome is "unknown" and the transfer is
+     looked up by reference (GET /transfer/verify): found and accepted is
+     paid, found and failed/reversed is failed, anything else stays unknown;
+  3. apply (caller's thread, DB): each payout's outcome is committed on its
+     own, so one bad row never rolls back the others. A transfer the provider
+     rejected or reports failed marks the payout "failed" with the provider's
+     reference and error, and releases its reservation. An unknown outcome
+     leaves the payout "processing" (provider_error says why) with its
+     reservation held; it is re-claimed after CLAIM_LEASE_SECONDS and checked
+     again. Only payouts with no provider set up (no recipient, or no
+     credentials for the provider) are simulated.
+
+Worker threads never touch the SQLAlchemy session.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from app.extensions import db
+from app.models import PayoutRecipient, PayoutRequest
+from app.utils.paystack_client import initiate_bulk_transfer, initiate_transfer, is_configured, verify_transfer
+from app.utils.wallets import post_txn, release_reserved
+
+
+DISPATCHABLE = ("requested", "approved")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+DISPATCH_WORKERS = _env_int("PAYOUT_DISPATCH_WORKERS", 8)
+CLAIM_LEASE_SECONDS = _env_int("PAYOUT_CLAIM_LEASE_SECONDS", 900)
+
+# Requests per second per provider; 0 disables pacing.
+DEFAULT_RATE_LIMIT = _env_float("PAYOUT_RATE_LIMIT", 10.0)
+
+# "bulk" or "single". Only providers in BULK_PROVIDERS have a bulk endpoint.
+TRANSFER_MODE = (os.getenv("PAYOUT_TRANSFER_MODE") or "bulk").strip().lower()
+BULK_SIZE = _env_int("PAYOUT_BULK_SIZE", 100)
+BULK_PROVIDERS = ("paystack",)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix="payout-dispatch")
+        return _executor
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate_per_sec: float):
+        self.interval = (1.0 / rate_per_sec) if rate_per_sec > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+_limiters: dict[str, _RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter(provider: str) -> _RateLimiter:
+    key = (provider or "").strip().lower()
+    with _limiters_lock:
+        lim = _limiters.get(key)
+        if lim is None:
+            lim = _RateLimiter(_env_float(f"PAYOUT_RATE_LIMIT_{key.upper()}", DEFAULT_RATE_LIMIT))
+            _limiters[key] = lim
+        return lim
+
+
+def claimable(statuses=DISPATCHABLE, *, now: datetime | None = None):
+    """Filter for payouts a run may claim: `statuses`, or "processing" with a lapsed claim."""
+    stale = (now or datetime.utcnow()) - timedelta(seconds=CLAIM_LEASE_SECONDS)
+    return or_(
+        PayoutRequest.status.in_(tuple(statuses)),
+        and_(PayoutRequest.status == "processing", PayoutRequest.updated_at < stale),
+    )
+
+
+def claim(ids) -> set[int]:
+    """Move claimable payouts among `ids` to "processing". Returns the ids this call won."""
+    ids = sorted({int(i) for i in ids})
+    if not ids:
+        return set()
+    now = datetime.utcnow()
+    try:
+        db.session.execute(
+            update(PayoutRequest)
+            .where(PayoutRequest.id.in_(ids), claimable(now=now))
+            .values(status="processing", updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return set()
+    return set(db.session.scalars(
+        select(PayoutRequest.id).where(
+            PayoutRequest.id.in_(ids), PayoutRequest.status == "processing", PayoutRequest.updated_at == now
+        )
+    ))
+
+
+@dataclass
+class PreparedPayout:
+    payout_id: int
+    user_id: int
+    amount: float
+    provider: str | None
+    recipient_code: str | None
+    reference: str
+
+
+def prepare(rows: list[PayoutRequest]) -> list[PreparedPayout]:
+    """Snapshot what the provider call needs for claimed payouts."""
+    if not rows:
+        return []
+    user_ids = {int(p.user_id) for p in rows}
+    recipients = {
+        int(r.user_id): r
+        for r in PayoutRecipient.query.filter(PayoutRecipient.user_id.in_(user_ids)).all()
+    }
+    out = []
+    for p in rows:
+        rec = recipients.get(int(p.user_id))
+        out.append(PreparedPayout(
+            payout_id=int(p.id),
+            user_id=int(p.user_id),
+            amount=float(p.amount or 0.0),
+            provider=(rec.provider or "paystack") if rec else None,
+            recipient_code=rec.recipient_code if rec else None,
+            # Deterministic, so a re-send after a crash is deduped by the provider.
+            reference=f"PO-{int(p.id)}",
+        ))
+    return out
+
+
+def _simulated(item: PreparedPayout) -> dict:
+    # Demo/dev stand-in, only for payouts with no provider set up (see _has_provider).
+    return {"ok": True, "provider": "SIM", "reference": f"SIM-{item.payout_id}"}
+
+
+def _has_provider(item: PreparedPayout) -> bool:
+    return item.provider == "paystack" and bool(item.recipient_code) and is_configured()
+
+
+def _failed(item: PreparedPayout, error) -> dict:
+    return {"ok": False, "provider": item.provider or "", "reference": item.reference, "error": str(error or "transfer failed")[:240]}
+
+
+def _unknown(item: PreparedPayout, error) -> dict:
+    out = _failed(item, error)
+    out["unknown"] = True
+    return out
+
+
+def _resolve(item: PreparedPayout, error) -> dict:
+    """Look up a transfer whose send was ambiguous. No DB access."""
+    try:
+        rate_limiter("paystack").acquire()
+        res = verify_transfer(item.reference)
+    except Exception as e:
+        return _unknown(item, f"{error}; lookup: {e}")
+    if res.get("ok") and res.get("accepted"):
+        return {"ok": True, "provider": "paystack", "reference": item.reference}
+    if res.get("ok") and res.get("failed"):
+        return _failed(item, f"transfer {res.get('status')}")
+    return _unknown(item, f"{error}; lookup: {res.get('status') or res.get('error') or 'no result'}")
+
+
+def send_one(item: PreparedPayout) -> dict:
+    """Provider transfer for one payout (simulated when no provider is set up). No DB access."""
+    if not _has_provider(item):
+        return _simulated(item)
+    try:
+        rate_limiter("paystack").acquire()
+        res = initiate_transfer(item.amount, item.recipient_code, item.reference)
+    except Exception as e:
+        return _resolve(item, e)
+    if res.get("ok"):
+        return {"ok": True, "provider": "paystack", "reference": res.get("reference", item.reference)}
+    if res.get("unknown"):
+        return _resolve(item, res.get("error"))
+    return _failed(item, res.get("error"))
+
+
+def send_bulk(items: list[PreparedPayout]) -> tuple[dict[int, dict], list[PreparedPayout]]:
+    """One bulk transfer call. Returns (per-item outcomes, items to retry singly). No DB access.
+
+    Items the response accepted or rejected get their outcome; items it does
+    not mention, or all of them when the call failed, are retried singly
+    (a duplicate reply there means the bulk call did go out, see send_one).
+    Items in a state that is neither accepted nor failed are looked up.
+    """
+    try:
+        rate_limiter("paystack").acquire()
+        res = initiate_bulk_transfer([
+            {"amount_ngn": it.amount, "recipient_code": it.recipient_code, "reference": it.reference}
+            for it in items
+        ])
+    except Exception as e:
+        res = {"ok": False, "error": str(e)}
+    if not res.get("ok"):
+        return {}, list(items)
+    results = res.get("results") or {}
+    done, retry = {}, []
+    for it in items:
+        r = results.get(it.reference)
+        if r is None:
+            retry.append(it)
+        elif r.get("ok"):
+            done[it.payout_id] = {"ok": True, "provider": "paystack", "reference": it.reference}
+        elif r.get("unknown"):
+            done[it.payout_id] = _resolve(it, f"transfer {r.get('status') or 'state unknown'}")
+        else:
+            done[it.payout_id] = _failed(it, f"transfer {r.get('status') or 'failed'}")
+    return done, retry
+
+
+def _bulk_eligible(item: PreparedPayout) -> bool:
+    return TRANSFER_MODE == "bulk" and item.provider in BULK_PROVIDERS and _has_provider(item)
+
+
+def _collect(futures: dict, out: dict) -> None:
+    for pid, fut in futures.items():
+        try:
+            out[pid] = fut.result()
+        except Exception as e:
+            # The send may have happened before the worker died.
+            out[pid] = {"ok": False, "unknown": True, "error": str(e)[:240]}
+
+
+def send_all(items: list[PreparedPayout], stats: dict | None = None) -> dict[int, dict]:
+    """Send every item (bulk where possible, else single) on the pool. Returns {payout_id: outcome}.
+
+    `stats`, when given, receives bulk_calls / single_calls / bulk_fallbacks counts.
+    """
+    stats = stats if stats is not None else {}
+    for k in ("bulk_calls", "single_calls", "bulk_fallbacks"):
+        stats.setdefault(k, 0)
+    if not items:
+        return {}
+
+    bulk = [it for it in items if _bulk_eligible(it)]
+    if len(bulk) < 2:
+        bulk = []
+    bulk_ids = {it.payout_id for it in bulk}
+    single = [it for it in items if it.payout_id not in bulk_ids]
+    chunks = [bulk[i:i + BULK_SIZE] for i in range(0, len(bulk), BULK_SIZE)]
+
+    out: dict[int, dict] = {}
+    if DISPATCH_WORKERS <= 1 or len(chunks) + len(single) == 1:
+        retry = []
+        for chunk in chunks:
+            done, again = send_bulk(chunk)
+            out.update(done)
+            retry.extend(again)
+        for it in single + retry:
+            out[it.payout_id] = send_one(it)
+    else:
+        pool = _get_executor()
+        bulk_futs = [pool.submit(send_bulk, chunk) for chunk in chunks]
+        single_futs = {it.payout_id: pool.submit(send_one, it) for it in single}
+        retry = []
+        for chunk, fut in zip(chunks, bulk_futs):
+            try:
+                done, again = fut.result()
+            except Exception:
+                done, again = {}, list(chunk)
+            out.update(done)
+            retry.extend(again)
+        single_futs.update({it.payout_id: pool.submit(send_one, it) for it in retry})
+        _collect(single_futs, out)
+
+    stats["bulk_calls"] += len(chunks)
+    stats["bulk_fallbacks"] += len(retry)
+    stats["single_calls"] += len([it for it in single + retry if _has_provider(it)])
+    return out
+
+
+def apply_outcome(item: PreparedPayout, outcome: dict, *, on_paid=None) -> str:
+    """Commit one payout's result. Returns "paid", "failed", "unknown" or "skipped".
+
+    on_paid(payout), if given, runs after the ledger debit (e.g. fee postings).
+    """
+    try:
+        p = db.session.get(PayoutRequest, item.payout_id)
+        if p is None or p.status != "processing":
+            return "skipped"
+
+        now = datetime.utcnow()
+        if not outcome.get("ok"):
+            unknown = bool(outcome.get("unknown"))
+            error = str(outcome.get("error") or "transfer failed")
+            p.provider = outcome.get("provider") or item.provider or p.provider
+            p.provider_reference = outcome.get("reference") or item.reference
+            # Unknown: keep "processing" (and the reservation) so a later run
+            # re-claims it once the lease lapses and looks it up again.
+            p.status = "processing" if unknown else "failed"
+            p.provider_error = (f"unconfirmed: {error}" if unknown else error)[:240]
+            p.updated_at = now
+            db.session.add(p)
+            db.session.commit()
+            if unknown:
+                return "unknown"
+            try:
+                release_reserved(item.user_id, item.amount)
+            except Exception:
+                pass
+            return "failed"
+
+        # Consume reserved funds (was reserved at request time)
+        try:
+            release_reserved(item.user_id, item.amount)
+        except Exception:
+            pass
+
+        p.provider = outcome.get("provider", "SIM")
+        p.provider_reference = outcome.get("reference", "")
+        p.provider_error = None
+        p.status = "paid"
+        p.updated_at = now
+        db.session.add(p)
+        # The transfer went out: record it before touching the ledger so a
+        # ledger failure can never make the next run send it again.
+        db.session.commit()
+
+        # Ledger: debit wallet balance to reflect payout (idempotent per payout)
+        post_txn(
+            user_id=item.user_id,
+            direction="debit",
+            amount=item.amount,
+            kind="payout",
+            reference=f"payout:{item.payout_id}",
+            note="Payout paid",
+        )
+        if on_paid is not None:
+            try:
+                on_paid(p)
+            except Exception:
+                db.session.rollback()
+        return "paid"
+    except Exception:
+        db.session.rollback()
+        return "failed"
+
+
+def dispatch(rows: list[PayoutRequest], *, on_paid=None) -> dict:
+    """Claim, send and settle `rows`. Rows another run has claimed are counted as skipped."""
+    won = claim(int(p.id) for p in rows)
+    items = prepare([p for p in rows if int(p.id) in won])
+    counts = {"processed": len(items), "paid": 0, "failed": 0, "unknown": 0, "skipped": len(rows) - len(items)}
+    outcomes = send_all(items, counts)
+    for it in items:
+        outcome = outcomes.get(it.payout_id) or {"ok": False, "unknown": True, "error": "no outcome"}
+        counts[apply_outcome(it, outcome, on_paid=on_paid)] += 1
+    return counts
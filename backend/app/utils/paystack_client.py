@@ -3,13 +3,159 @@ from __future__ import annotations
 import hmac
 import hashlib
 import os
+import threading
+import time
+from collections import deque
+
 import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_BASE_URL = "https://api.paystack.co"
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
 
 
 def _secret() -> str:
     return os.getenv("PAYSTACK_SECRET_KEY", "").strip()
 
 
+def is_configured() -> bool:
+    return bool(_secret())
+
+
+def _base_url() -> str:
+    # Overridable so tests/benchmarks can point at a local stand-in server.
+    return (os.getenv("PAYSTACK_BASE_URL") or DEFAULT_BASE_URL).strip().rstrip("/")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except Exception:
+        return default
+
+
+def _timeout() -> tuple[float, float]:
+    """(connect, read) seconds."""
+    return _env_float("PAYSTACK_CONNECT_TIMEOUT", 5.0), _env_float("PAYSTACK_TIMEOUT", 20.0)
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session; its pool is sized for the payout dispatcher's concurrency."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool = max(1, int(_env_float("PAYSTACK_POOL_SIZE", 16)))
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def reset_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            try:
+                _session.close()
+            except Exception:
+                pass
+        _session = None
+
+
+class _LatencyWindow:
+    """Rolling window of recent call latencies (ms) per operation."""
+
+    def __init__(self, maxlen: int = 2048):
+        self.maxlen = int(maxlen)
+        self._data: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, op: str, ms: float) -> None:
+        with self._lock:
+            q = self._data.get(op)
+            if q is None:
+                q = deque(maxlen=self.maxlen)
+                self._data[op] = q
+            q.append(float(ms))
+
+    def stats(self) -> dict:
+        with self._lock:
+            snap = {op: sorted(q) for op, q in self._data.items()}
+        out = {}
+        for op, vals in snap.items():
+            if not vals:
+                continue
+            out[op] = {
+                "count": len(vals),
+                "p50_ms": round(_percentile(vals, 50), 1),
+                "p95_ms": round(_percentile(vals, 95), 1),
+                "max_ms": round(vals[-1], 1),
+            }
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _percentile(sorted_vals: list[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * (float(pct) / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+_latency = _LatencyWindow()
+
+
+def latency_stats() -> dict:
+    """p50/p95/max provider latency per operation over the recent window."""
+    return _latency.stats()
+
+
+def reset_latency_stats() -> None:
+    _latency.clear()
+
+
+def _post(path: str, payload: dict, *, op: str) -> tuple[int, dict]:
+    headers = {"Authorization": f"Bearer {_secret()}", "Content-Type": "application/json"}
+    t0 = time.perf_counter()
+    try:
+        r = get_session().post(f"{_base_url()}{path}", headers=headers, json=payload, timeout=_timeout())
+        j = r.json() if r.content else {}
+        return r.status_code, (j if isinstance(j, dict) else {})
+    finally:
+        _latency.add(op, (time.perf_counter() - t0) * 1000.0)
+
+
+def _get(path: str, *, op: str) -> tuple[int, dict]:
+    headers = {"Authorization": f"Bearer {_secret()}"}
+    t0 = time.perf_counter()
+    try:
+        r = get_session().get(f"{_base_url()}{path}", headers=headers, timeout=_timeout())
+        j = r.json() if r.content else {}
+        return r.status_code, (j if isinstance(j, dict) else {})
+    finally:
+        _latency.add(op, (time.perf_counter() - t0) * 1000.0)
+
+
+def _is_duplicate(status: int, message: str) -> bool:
+    msg = (message or "").lower()
+    return status == 409 or "duplicate" in msg or "already exist" in msg
+
+
+def _unsure(status: int, j: dict) -> bool:
+    """True when a failed transfer call may still have gone out (5xx, or the reference was already used)."""
+    return status >= 500 or _is_duplicate(status, str(j.get("message") or ""))
+
+
 def verify_signature(raw_body: bytes, signature_header: str | None) -> bool:
     secret = _secret()
     if not secret or not signature_header:
@@ -22,18 +168,15 @@ def initialize_transaction(email: str, amount_ngn: float, reference: str, callba
     secret = _secret()
     if not secret:
         return {"ok": False, "error": "PAYSTACK_SECRET_KEY not set"}
-    url = "https://api.paystack.co/transaction/initialize"
-    headers = {"Authorization": f"Bearer {secret}", "Content-Type": "application/json"}
     payload = {"email": email, "amount": int(round(float(amount_ngn) * 100)), "reference": reference}
     if callback_url:
         payload["callback_url"] = callback_url
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=20)
-        j = r.json() if r.content else {}
-        if 200 <= r.status_code < 300 and j.get("status") is True:
+        status, j = _post("/transaction/initialize", payload, op="transaction_initialize")
+        if 200 <= status < 300 and j.get("status") is True:
             data = j.get("data") or {}
             return {"ok": True, "authorization_url": data.get("authorization_url", ""), "reference": data.get("reference", reference)}
-        return {"ok": False, "error": j.get("message") or f"HTTP {r.status_code}"}
+        return {"ok": False, "error": j.get("message") or f"HTTP {status}"}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -42,15 +185,85 @@ def initiate_transfer(amount_ngn: float, recipient_code: str, reference: str) ->
     secret = _secret()
     if not secret:
         return {"ok": False, "error": "PAYSTACK_SECRET_KEY not set"}
-    url = "https://api.paystack.co/transfer"
-    headers = {"Authorization": f"Bearer {secret}", "Content-Type": "application/json"}
     payload = {"source": "balance", "amount": int(round(float(amount_ngn) * 100)), "recipient": recipient_code, "reference": reference}
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=20)
-        j = r.json() if r.content else {}
-        if 200 <= r.status_code < 300 and j.get("status") is True:
+        status, j = _post("/transfer", payload, op="transfer")
+        if 200 <= status < 300 and j.get("status") is True:
             data = j.get("data") or {}
             return {"ok": True, "transfer_code": data.get("transfer_code", ""), "reference": reference}
-        return {"ok": False, "error": j.get("message") or f"HTTP {r.status_code}"}
+        return {"ok": False, "error": j.get("message") or f"HTTP {status}", "unknown": _unsure(status, j)}
     except Exception as e:
-        return {"ok": False, "error": str(e)}
+        # Timeouts included: the request may have reached Paystack.
+        return {"ok": False, "error": str(e), "unknown": True}
+
+
+# Per-item states Paystack reports for transfers it accepted (queued or done).
+_ACCEPTED_TRANSFER_STATES = ("success", "pending", "received", "queued", "otp", "processing")
+# States that mean the money did not (or no longer) go out.
+_FAILED_TRANSFER_STATES = ("failed", "reversed", "rejected", "abandoned", "blocked")
+
+
+def verify_transfer(reference: str) -> dict:
+    """GET /transfer/verify/<reference>: what Paystack knows about a transfer.
+
+    Returns {"ok": True, "status", "accepted", "failed", "transfer_code"} when
+    Paystack has the transfer, or {"ok": False, "error", "found"} when it does
+    not ("found": False) or the lookup itself failed.
+    """
+    secret = _secret()
+    if not secret:
+        return {"ok": False, "error": "PAYSTACK_SECRET_KEY not set", "found": None}
+    try:
+        status, j = _get(f"/transfer/verify/{reference}", op="transfer_verify")
+        if 200 <= status < 300 and j.get("status") is True:
+            data = j.get("data") or {}
+            state = str(data.get("status") or "").strip().lower()
+            return {
+                "ok": True,
+                "status": state,
+                "accepted": state in _ACCEPTED_TRANSFER_STATES,
+                "failed": state in _FAILED_TRANSFER_STATES,
+                "transfer_code": data.get("transfer_code", ""),
+            }
+        return {"ok": False, "error": j.get("message") or f"HTTP {status}", "found": False if status == 404 else None}
+    except Exception as e:
+        return {"ok": False, "error": str(e), "found": None}
+
+
+def initiate_bulk_transfer(transfers: list[dict]) -> dict:
+    """One POST /transfer/bulk for [{"amount_ngn", "recipient_code", "reference"}, ...].
+
+    Returns {"ok": True, "results": {reference: {"ok", "unknown", "transfer_code", "status"}}}
+    (references missing from the response are absent from results), or
+    {"ok": False, "error", "unknown"} when the call as a whole failed;
+    "unknown" marks failures where transfers may still have gone out.
+    """
+    secret = _secret()
+    if not secret:
+        return {"ok": False, "error": "PAYSTACK_SECRET_KEY not set"}
+    payload = {
+        "currency": "NGN",
+        "source": "balance",
+        "transfers": [
+            {"amount": int(round(float(t["amount_ngn"]) * 100)), "recipient": t["recipient_code"], "reference": t["reference"]}
+            for t in transfers
+        ],
+    }
+    try:
+        status, j = _post("/transfer/bulk", payload, op="transfer_bulk")
+        if not (200 <= status < 300 and j.get("status") is True):
+            return {"ok": False, "error": j.get("message") or f"HTTP {status}", "unknown": _unsure(status, j)}
+        results = {}
+        for row in j.get("data") or []:
+            if not isinstance(row, dict) or not row.get("reference"):
+                continue
+            state = str(row.get("status") or "").strip().lower()
+            results[str(row["reference"])] = {
+                "ok": state in _ACCEPTED_TRANSFER_STATES,
+                "unknown": state not in _ACCEPTED_TRANSFER_STATES and state not in _FAILED_TRANSFER_STATES,
+                "transfer_code": row.get("transfer_code", ""),
+                "status": state,
+            }
+        return {"ok": True, "results": results}
+    except Exception as e:
+        return {"ok": False, "error": str(e), "unknown": True}
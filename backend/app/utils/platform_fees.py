@@ -0,0 +1,106 @@
+"""Sharded accumulator for platform-wallet credits.
+
+Every settled order credits the platform wallet (fees, commissions). Posting
+those straight into wallets.balance makes the platform row the hottest lock
+in the database. Instead, post_txn(..., deferred=True) still writes the
+WalletTxn ledger row, but adds the amount to one of SHARDS rows in
+platform_fee_shards picked at random; rollup() periodically moves the shard
+totals into the wallet balance in one short transaction.
+
+Between roll-ups: ledger == wallets.balance + pending_by_wallet().
+"""
+from __future__ import annotations
+
+import os
+import random
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import PlatformFeeShard, Wallet
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+SHARDS = _env_int("PLATFORM_FEE_SHARDS", 16)
+
+# wallet ids whose shard rows are known to exist (per process)
+_ready: set[int] = set()
+
+
+def ensure_shards(wallet_id: int) -> None:
+    """Create the wallet's shard rows once, so postings only ever UPDATE them. Commits."""
+    wallet_id = int(wallet_id)
+    if wallet_id in _ready:
+        return
+    try:
+        have = set(db.session.scalars(select(PlatformFeeShard.shard).where(PlatformFeeShard.wallet_id == wallet_id)).all())
+        missing = [k for k in range(SHARDS) if k not in have]
+        if missing:
+            db.session.add_all([PlatformFeeShard(wallet_id=wallet_id, shard=k, pending_amount=0.0) for k in missing])
+            db.session.commit()
+        _ready.add(wallet_id)
+    except IntegrityError:
+        # another process created them first
+        db.session.rollback()
+        _ready.add(wallet_id)
+    except Exception:
+        db.session.rollback()
+
+
+def add_to_shard(wallet_id: int, amount: float) -> bool:
+    """Add amount to a random shard in the caller's transaction. False if no shard row matched."""
+    res = db.session.execute(
+        update(PlatformFeeShard)
+        .where(PlatformFeeShard.wallet_id == int(wallet_id), PlatformFeeShard.shard == random.randrange(SHARDS))
+        .values(pending_amount=PlatformFeeShard.pending_amount + float(amount), updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return bool(res.rowcount)
+
+
+def pending_by_wallet(wallet_ids: list[int] | None = None) -> dict[int, float]:
+    q = select(PlatformFeeShard.wallet_id, func.sum(PlatformFeeShard.pending_amount)).group_by(PlatformFeeShard.wallet_id)
+    if wallet_ids is not None:
+        q = q.where(PlatformFeeShard.wallet_id.in_([int(w) for w in wallet_ids]))
+    return {int(wid): float(total or 0.0) for wid, total in db.session.execute(q)}
+
+
+def rollup() -> dict:
+    """Move every shard's pending amount into its wallet balance (one transaction)."""
+    now = datetime.utcnow()
+    try:
+        rows = db.session.execute(
+            select(PlatformFeeShard.id, PlatformFeeShard.wallet_id, PlatformFeeShard.pending_amount)
+            .where(PlatformFeeShard.pending_amount != 0)
+            .with_for_update()
+        ).all()
+        totals: dict[int, float] = {}
+        for sid, wid, amount in rows:
+            # Subtract what was read, not reset to 0: credits landing meanwhile stay pending.
+            db.session.execute(
+                update(PlatformFeeShard)
+                .where(PlatformFeeShard.id == sid)
+                .values(pending_amount=PlatformFeeShard.pending_amount - float(amount), updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            totals[int(wid)] = totals.get(int(wid), 0.0) + float(amount)
+        for wid, total in totals.items():
+            db.session.execute(
+                update(Wallet)
+                .where(Wallet.id == wid)
+                .values(balance=Wallet.balance + total, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return {"ok": False, "shards": 0, "wallets": 0, "amount": 0.0, "error": "rollup_failed"}
+    return {"ok": True, "shards": len(rows), "wallets": len(totals), "amount": round(sum(totals.values()), 2)}
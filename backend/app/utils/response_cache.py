@@ -0,0 +1,147 @@
+"""Conditional-GET + serialized-page cache for public listing reads.
+
+Each cached response is keyed by (path, normalized query string, host,
+generation). The generation is a DB counter per scope that every Listing /
+Shortlet write bumps inside the writing transaction, so all workers see a new
+key as soon as the write commits and stale pages simply age out of the LRU.
+
+ETags are strong: a hash of the exact response bytes.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, make_response, request
+from sqlalchemy import event, text
+
+from app.extensions import db
+from app.models import CacheGeneration, Listing, Shortlet
+
+
+LISTINGS_SCOPE = "listings"
+SHORTLETS_SCOPE = "shortlets"
+
+_BUMP_SQL = text("""
+    INSERT INTO cache_generations (name, value, updated_at)
+    VALUES (:name, 1, :now)
+    ON CONFLICT (name)
+    DO UPDATE SET value = cache_generations.value + 1, updated_at = excluded.updated_at
+""")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except Exception:
+        return int(default)
+
+
+CACHE_MAX_ENTRIES = _env_int("LISTINGS_CACHE_SIZE", 512)
+CACHE_MAX_AGE_SECONDS = _env_int("LISTINGS_CACHE_MAX_AGE", 15)
+
+
+class _LRU:
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, int(max_entries))
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_pages = _LRU(CACHE_MAX_ENTRIES)
+
+
+def current_generation(*scopes: str) -> tuple[int, ...]:
+    rows = dict(
+        db.session.query(CacheGeneration.name, CacheGeneration.value)
+        .filter(CacheGeneration.name.in_(scopes))
+        .all()
+    )
+    return tuple(int(rows.get(s) or 0) for s in scopes)
+
+
+def bump_generation(connection, scope: str) -> None:
+    connection.execute(_BUMP_SQL, {"name": scope, "now": datetime.utcnow()})
+
+
+def _normalized_args() -> tuple:
+    items = []
+    for k in sorted(request.args.keys()):
+        vals = [v.strip() for v in request.args.getlist(k) if (v or "").strip() != ""]
+        if vals:
+            items.append((k, tuple(vals)))
+    return tuple(items)
+
+
+def cached_public_get(*scopes: str):
+    """Serve a public GET from the page cache with a strong ETag, 304s and Cache-Control.
+
+    Only 200 responses are cached; errors pass straight through.
+    """
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                gen = current_generation(*scopes)
+            except Exception:
+                db.session.rollback()
+                return fn(*args, **kwargs)
+
+            key = (request.path, _normalized_args(), request.host_url, gen)
+            hit = _pages.get(key)
+            if hit is None:
+                resp = make_response(fn(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+                body = resp.get_data()
+                etag = hashlib.sha256(body).hexdigest()[:40]
+                hit = (body, resp.mimetype, etag)
+                _pages.put(key, hit)
+
+            body, mimetype, etag = hit
+            cache_control = f"public, max-age={CACHE_MAX_AGE_SECONDS}, must-revalidate"
+            if request.if_none_match.contains(etag):
+                resp = Response(status=304)
+            else:
+                resp = Response(body, status=200, mimetype=mimetype)
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = cache_control
+            return resp
+        return wrapper
+    return deco
+
+
+@event.listens_for(Listing, "after_insert")
+@event.listens_for(Listing, "after_update")
+@event.listens_for(Listing, "after_delete")
+def _bump_listings(mapper, connection, target):
+    bump_generation(connection, LISTINGS_SCOPE)
+
+
+@event.listens_for(Shortlet, "after_insert")
+@event.listens_for(Shortlet, "after_update")
+@event.listens_for(Shortlet, "after_delete")
+def _bump_shortlets(mapper, connection, target):
+    bump_generation(connection, SHORTLETS_SCOPE)
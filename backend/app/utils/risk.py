@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 
 from app.extensions import db
 from app.models import WalletTxn, User
+from app.utils import risk_counters
 
 
 def payout_limit_for_user(u: User) -> float:
@@ -16,21 +17,12 @@ def payout_limit_for_user(u: User) -> float:
     return 1_000_000.0
 
 
-def paid_out_today(user_id: int) -> float:
-    now = datetime.utcnow()
-    start = datetime(now.year, now.month, now.day)
-    rows = (
-        WalletTxn.query
-        .filter(WalletTxn.user_id == int(user_id))
-        .filter(WalletTxn.kind == "payout")
-        .filter(WalletTxn.direction == "debit")
-        .filter(WalletTxn.created_at >= start)
-        .all()
-    )
-    return float(sum([float(r.amount or 0.0) for r in rows]) or 0.0)
+def paid_out_today(user_id: int, snap: dict | None = None) -> float:
+    snap = snap if snap is not None else risk_counters.snapshot(int(user_id))
+    return float(snap["paid_out_today"] or 0.0)
 
 
-def can_request_payout(u: User, amount: float) -> tuple[bool, str]:
+def can_request_payout(u: User, amount: float, snap: dict | None = None) -> tuple[bool, str]:
     try:
         amt = float(amount or 0.0)
     except Exception:
@@ -38,21 +30,26 @@ def can_request_payout(u: User, amount: float) -> tuple[bool, str]:
     if amt <= 0:
         return False, "Invalid amount"
     limit = payout_limit_for_user(u)
-    used = paid_out_today(int(u.id))
+    used = paid_out_today(int(u.id), snap)
     if used + amt > limit:
         return False, f"Payout limit reached for today (tier {int(getattr(u,'kyc_tier',0) or 0)})"
     return True, ""
 
 
-def txn_velocity_ok(user_id: int, window_minutes: int = 10, max_txns: int = 25) -> tuple[bool, str]:
-    since = datetime.utcnow() - timedelta(minutes=window_minutes)
-    cnt = (
-        db.session.query(db.func.count(WalletTxn.id))
-        .filter(WalletTxn.user_id == int(user_id))
-        .filter(WalletTxn.created_at >= since)
-        .scalar()
-    )
-    cnt = int(cnt or 0)
+def txn_velocity_ok(user_id: int, window_minutes: int = 10, max_txns: int = 25, snap: dict | None = None) -> tuple[bool, str]:
+    if int(window_minutes) == risk_counters.VELOCITY_WINDOW_MINUTES:
+        snap = snap if snap is not None else risk_counters.snapshot(int(user_id))
+        cnt = int(snap["window_txns"] or 0)
+    else:
+        # Not the counters' window: count the ledger (ix_wallet_txns_user_id_created_at).
+        since = datetime.utcnow() - timedelta(minutes=window_minutes)
+        cnt = (
+            db.session.query(db.func.count(WalletTxn.id))
+            .filter(WalletTxn.user_id == int(user_id))
+            .filter(WalletTxn.created_at >= since)
+            .scalar()
+        )
+        cnt = int(cnt or 0)
     if cnt > max_txns:
         return False, "High activity detected; try again shortly"
     return True, ""
@@ -60,17 +57,26 @@ def txn_velocity_ok(user_id: int, window_minutes: int = 10, max_txns: int = 25)
 
 PAYOUT_COOLDOWN_MINUTES = 30
 
-def payout_cooldown_ok(user_id: int) -> tuple[bool, str]:
-    from datetime import datetime, timedelta
-    from app.models import PayoutRequest
-    row = (
-        PayoutRequest.query
-        .filter(PayoutRequest.user_id == int(user_id))
-        .order_by(PayoutRequest.created_at.desc())
-        .first()
-    )
-    if not row:
+def payout_cooldown_ok(user_id: int, snap: dict | None = None) -> tuple[bool, str]:
+    snap = snap if snap is not None else risk_counters.snapshot(int(user_id))
+    last = snap["last_payout_request_at"]
+    if not last:
         return True, ""
-    if datetime.utcnow() - row.created_at < timedelta(minutes=PAYOUT_COOLDOWN_MINUTES):
+    if datetime.utcnow() - last < timedelta(minutes=PAYOUT_COOLDOWN_MINUTES):
         return False, f"Please wait {PAYOUT_COOLDOWN_MINUTES} minutes between payout requests"
     return True, ""
+
+
+def payout_request_checks(u: User, amount: float) -> tuple[bool, str, int]:
+    """Daily limit, velocity and cooldown for a new payout request, from one counter read.
+
+    Returns (ok, message, http status).
+    """
+    snap = risk_counters.snapshot(int(u.id))
+    ok, msg = can_request_payout(u, amount, snap)
+    if not ok:
+        return False, msg, 400
+    for ok, msg in (txn_velocity_ok(int(u.id), snap=snap), payout_cooldown_ok(int(u.id), snap)):
+        if not ok:
+            return False, msg, 429
+    return True, "", 200
@@ -0,0 +1,257 @@
+"""Per-user daily rollups that back the payout risk checks.
+
+risk_daily_counters holds one row per (user, UTC day): txn count, payout
+debit total/count, a tumbling velocity window and the last payout request
+time. Rows are bumped with a single upsert inside the transaction that
+writes the ledger (wallets.post_txns_batch) or the payout request, so the
+checks in app.utils.risk read at most two primary-key rows (today and
+yesterday, for windows that straddle midnight) instead of the raw ledger.
+
+The velocity window is tumbling, not sliding: it starts at the first txn
+after the previous window expired, so a burst across a window boundary can
+count up to twice the window's txns before it is caught.
+
+Maintenance tasks (`flask maintenance run <task>`):
+  - risk-counters-backfill  rebuilds the last BACKFILL_DAYS days from
+    wallet_txns / payout_requests (the migration that creates the table
+    seeds those days; run this to repair drift);
+  - risk-counters-check     reports counters that disagree with the ledger,
+    without writing anything.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, DateTime, bindparam, case, delete, func, insert, select, text
+
+from app.extensions import db
+from app.models import PayoutRequest, RiskDailyCounter, User, WalletTxn
+from app.utils.maintenance import maintenance_task
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+VELOCITY_WINDOW_MINUTES = _env_int("RISK_VELOCITY_WINDOW_MINUTES", 10)
+BACKFILL_DAYS = _env_int("RISK_BACKFILL_DAYS", 7)
+
+PAYOUT_KIND = "payout"
+
+
+_UPSERT_SQL = text("""
+    INSERT INTO risk_daily_counters (
+        user_id, day, txn_count, payout_total, payout_count,
+        window_start, window_count, last_txn_at, last_payout_request_at, updated_at
+    )
+    VALUES (:user_id, :day, :txns, :payout_total, :payouts, :now, :txns, :last_txn_at, :request_at, :now)
+    ON CONFLICT (user_id, day)
+    DO UPDATE SET txn_count = risk_daily_counters.txn_count + excluded.txn_count,
+                  payout_total = risk_daily_counters.payout_total + excluded.payout_total,
+                  payout_count = risk_daily_counters.payout_count + excluded.payout_count,
+                  window_count = CASE WHEN risk_daily_counters.window_start >= :cutoff
+                                      THEN risk_daily_counters.window_count + excluded.window_count
+                                      ELSE excluded.window_count END,
+                  window_start = CASE WHEN risk_daily_counters.window_start >= :cutoff
+                                      THEN risk_daily_counters.window_start
+                                      ELSE excluded.window_start END,
+                  last_txn_at = COALESCE(excluded.last_txn_at, risk_daily_counters.last_txn_at),
+                  last_payout_request_at = COALESCE(excluded.last_payout_request_at, risk_daily_counters.last_payout_request_at),
+                  updated_at = excluded.updated_at
+""").bindparams(
+    bindparam("day", type_=Date()),
+    bindparam("now", type_=DateTime()),
+    bindparam("cutoff", type_=DateTime()),
+    bindparam("last_txn_at", type_=DateTime()),
+    bindparam("request_at", type_=DateTime()),
+)
+
+
+def record(
+    user_id: int,
+    *,
+    txns: int = 0,
+    payout_total: float = 0.0,
+    payouts: int = 0,
+    payout_request: bool = False,
+    now: datetime | None = None,
+) -> None:
+    """Bump today's counters for one user. Runs in the caller's transaction (no commit)."""
+    now = now or datetime.utcnow()
+    db.session.execute(_UPSERT_SQL, {
+        "user_id": int(user_id),
+        "day": now.date(),
+        "txns": int(txns),
+        "payout_total": float(payout_total or 0.0),
+        "payouts": int(payouts),
+        "now": now,
+        "cutoff": now - timedelta(minutes=VELOCITY_WINDOW_MINUTES),
+        "last_txn_at": now if txns else None,
+        "request_at": now if payout_request else None,
+    })
+
+
+def record_ledger(txns) -> None:
+    """Bump counters for freshly flushed WalletTxn rows, one upsert per user."""
+    per_user: dict[int, list] = {}
+    for t in txns:
+        c = per_user.setdefault(int(t.user_id), [0, 0.0, 0])
+        c[0] += 1
+        if t.kind == PAYOUT_KIND and t.direction == "debit":
+            c[1] += float(t.amount or 0.0)
+            c[2] += 1
+    now = datetime.utcnow()
+    for uid in sorted(per_user):
+        n, total, payouts = per_user[uid]
+        record(uid, txns=n, payout_total=total, payouts=payouts, now=now)
+
+
+def snapshot(user_id: int, now: datetime | None = None) -> dict:
+    """What the payout checks need, from today's and yesterday's counter rows."""
+    now = now or datetime.utcnow()
+    today = now.date()
+    cutoff = now - timedelta(minutes=VELOCITY_WINDOW_MINUTES)
+    out = {"paid_out_today": 0.0, "window_txns": 0, "last_payout_request_at": None}
+    rows = db.session.execute(
+        select(
+            RiskDailyCounter.day,
+            RiskDailyCounter.payout_total,
+            RiskDailyCounter.window_start,
+            RiskDailyCounter.window_count,
+            RiskDailyCounter.last_payout_request_at,
+        ).where(RiskDailyCounter.user_id == int(user_id), RiskDailyCounter.day >= today - timedelta(days=1))
+    ).all()
+    for day, payout_total, window_start, window_count, requested_at in rows:
+        if day == today:
+            out["paid_out_today"] = float(payout_total or 0.0)
+        if window_start is not None and window_start >= cutoff:
+            out["window_txns"] += int(window_count or 0)
+        if requested_at is not None and (out["last_payout_request_at"] is None or requested_at > out["last_payout_request_at"]):
+            out["last_payout_request_at"] = requested_at
+    return out
+
+
+# ---------------------------
+# Backfill / consistency check
+# ---------------------------
+
+# The velocity window is not compared: a tumbling window has no exact ledger equivalent.
+_COMPARED = ("txn_count", "payout_total", "payout_count", "last_payout_request_at")
+
+
+def _as_date(v) -> date:
+    # func.date() comes back as a string on SQLite and a date on Postgres.
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+
+def _from_ledger(user_ids: list[int], since: date, now: datetime) -> dict[tuple[int, date], dict]:
+    """(user_id, day) -> counter values recomputed from wallet_txns and payout_requests."""
+    start = datetime(since.year, since.month, since.day)
+    cutoff = now - timedelta(minutes=VELOCITY_WINDOW_MINUTES)
+    is_payout = (WalletTxn.kind == PAYOUT_KIND) & (WalletTxn.direction == "debit")
+    in_window = WalletTxn.created_at >= cutoff
+    day = func.date(WalletTxn.created_at)
+    out: dict[tuple[int, date], dict] = {}
+
+    def row(uid, d) -> dict:
+        return out.setdefault((int(uid), _as_date(d)), {
+            "txn_count": 0, "payout_total": 0.0, "payout_count": 0,
+            "window_start": None, "window_count": 0, "last_txn_at": None, "last_payout_request_at": None,
+        })
+
+    for uid, d, n, total, payouts, window_start, window_count, last_at in db.session.execute(
+        select(
+            WalletTxn.user_id,
+            day,
+            func.count(WalletTxn.id),
+            func.sum(case((is_payout, WalletTxn.amount), else_=0.0)),
+            func.sum(case((is_payout, 1), else_=0)),
+            func.min(case((in_window, WalletTxn.created_at), else_=None)),
+            func.sum(case((in_window, 1), else_=0)),
+            func.max(WalletTxn.created_at),
+        )
+        .where(WalletTxn.user_id.in_(user_ids), WalletTxn.created_at >= start, WalletTxn.created_at <= now)
+        .group_by(WalletTxn.user_id, day)
+    ):
+        r = row(uid, d)
+        r.update(
+            txn_count=int(n or 0),
+            payout_total=round(float(total or 0.0), 2),
+            payout_count=int(payouts or 0),
+            window_count=int(window_count or 0),
+            last_txn_at=last_at,
+        )
+        if window_start is not None:
+            # min() over a CASE loses the column type on SQLite.
+            r["window_start"] = window_start if isinstance(window_start, datetime) else datetime.fromisoformat(str(window_start))
+
+    request_day = func.date(PayoutRequest.created_at)
+    for uid, d, last_at in db.session.execute(
+        select(PayoutRequest.user_id, request_day, func.max(PayoutRequest.created_at))
+        .where(PayoutRequest.user_id.in_(user_ids), PayoutRequest.created_at >= start, PayoutRequest.created_at <= now)
+        .group_by(PayoutRequest.user_id, request_day)
+    ):
+        row(uid, d)["last_payout_request_at"] = last_at
+    return out
+
+
+def _stored(user_ids: list[int], since: date) -> dict[tuple[int, date], dict]:
+    return {
+        (int(c.user_id), c.day): {k: getattr(c, k) for k in _COMPARED}
+        for c in RiskDailyCounter.query.filter(RiskDailyCounter.user_id.in_(user_ids), RiskDailyCounter.day >= since).all()
+    }
+
+
+def _differences(expected: dict, stored: dict) -> list[dict]:
+    out = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key) or {}
+        have = stored.get(key) or {}
+        for field in _COMPARED:
+            w, h = want.get(field), have.get(field)
+            if field == "payout_total":
+                same = abs(float(w or 0.0) - float(h or 0.0)) <= 0.01
+            elif field == "last_payout_request_at":
+                same = w == h
+            else:
+                same = int(w or 0) == int(h or 0)
+            if not same:
+                out.append({"user_id": key[0], "day": key[1].isoformat(), "field": field, "counter": h, "ledger": w})
+    return out
+
+
+@maintenance_task("risk-counters-backfill", model=User)
+def _backfill_chunk(rows, *, dry_run: bool = False):
+    """Rebuild the last BACKFILL_DAYS of counters for these users from the raw ledger."""
+    now = datetime.utcnow()
+    since = now.date() - timedelta(days=BACKFILL_DAYS - 1)
+    user_ids = [int(u.id) for u in rows]
+    expected = _from_ledger(user_ids, since, now)
+    changes = _differences(expected, _stored(user_ids, since))
+    if changes and not dry_run:
+        db.session.execute(
+            delete(RiskDailyCounter).where(RiskDailyCounter.user_id.in_(user_ids), RiskDailyCounter.day >= since)
+        )
+        if expected:
+            db.session.execute(insert(RiskDailyCounter), [
+                {"user_id": uid, "day": d, "updated_at": now, **values}
+                for (uid, d), values in sorted(expected.items())
+            ])
+    return changes
+
+
+@maintenance_task("risk-counters-check", model=User)
+def _check_chunk(rows, *, dry_run: bool = False):
+    """Counters that disagree with the ledger for these users (read-only).
+
+    A txn committed between the two reads can show up as a one-off mismatch;
+    a re-run tells those apart from real drift.
+    """
+    now = datetime.utcnow()
+    since = now.date() - timedelta(days=BACKFILL_DAYS - 1)
+    user_ids = [int(u.id) for u in rows]
+    return _differences(_from_ledger(user_ids, since, now), _stored(user_ids, since))
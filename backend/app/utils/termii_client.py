@@ -1,10 +1,47 @@
 from __future__ import annotations
 
 import os
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
 
 TERMII_BASE = "https://api.ng.termii.com/api"
 
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _base_url() -> str:
+    # Overridable so tests/benchmarks can point at a local stand-in server.
+    return (os.getenv("TERMII_BASE_URL") or TERMII_BASE).strip().rstrip("/")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except Exception:
+        return default
+
+
+def request_timeout() -> tuple[float, float]:
+    """(connect, read) timeout for one Termii call."""
+    return (_env_float("TERMII_CONNECT_TIMEOUT", 5.0), _env_float("TERMII_TIMEOUT", 10.0))
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session shared by the notification worker's send threads."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool = max(1, int(_env_float("TERMII_POOL_SIZE", 16)))
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
 
 def send_termii_message(*, channel: str, to: str, message: str) -> tuple[bool, str]:
     """Send SMS or WhatsApp via Termii.
@@ -34,7 +71,7 @@ def send_termii_message(*, channel: str, to: str, message: str) -> tuple[bool, s
     }
 
     try:
-        r = requests.post(f"{TERMII_BASE}/sms/send", json=payload, timeout=10)
+        r = get_session().post(f"{_base_url()}/sms/send", json=payload, timeout=request_timeout())
         if 200 <= r.status_code < 300:
             return True, "sent"
         return False, f"termii_http_{r.status_code}"
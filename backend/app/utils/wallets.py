@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 
 from app.extensions import db
 from app.models import Wallet, WalletTxn
+from sqlalchemy import case, insert, or_, select, update
 from sqlalchemy.exc import IntegrityError
 
 
@@ -24,6 +26,222 @@ def get_or_create_wallet(user_id: int) -> Wallet:
         raise
 
 
+def credit_balance(wallet_id: int, amount: float) -> bool:
+    """balance = balance + :amt in the database, never a Python read-modify-write. Caller commits."""
+    res = db.session.execute(
+        update(Wallet)
+        .where(Wallet.id == int(wallet_id))
+        .values(balance=Wallet.balance + float(amount), updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return bool(res.rowcount)
+
+
+def debit_balance(wallet_id: int, amount: float) -> bool:
+    """Guarded debit: applies only if available (balance - reserved) still covers it. Caller commits."""
+    res = db.session.execute(
+        update(Wallet)
+        .where(Wallet.id == int(wallet_id), Wallet.balance - Wallet.reserved_balance >= float(amount))
+        .values(balance=Wallet.balance - float(amount), updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return bool(res.rowcount)
+
+
+@dataclass
+class Leg:
+    """One posting for post_txns_batch(); fields as in post_txn()."""
+    user_id: int
+    direction: str
+    amount: float
+    kind: str
+    reference: str
+    note: str = ""
+    idempotency_key: str | None = None
+    deferred: bool = False
+
+    @property
+    def key(self) -> str:
+        return (self.idempotency_key or f"{int(self.user_id)}:{self.kind}:{self.direction}:{self.reference}")[:160]
+
+
+@dataclass
+class LegResult:
+    leg: Leg
+    # posted | duplicate (already in the ledger) | skipped (amount <= 0) | insufficient_funds | failed
+    status: str = "skipped"
+    txn: WalletTxn | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("posted", "duplicate", "skipped")
+
+
+def _insert_ignore(model, *conflict_columns):
+    name = db.session.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=list(conflict_columns))
+
+
+def _wallet_ids(user_ids) -> dict[int, int]:
+    """user_id -> wallet id, creating missing wallets in one INSERT (no commit)."""
+    wanted = {int(u) for u in user_ids}
+    found = {int(u): int(w) for u, w in db.session.execute(select(Wallet.user_id, Wallet.id).where(Wallet.user_id.in_(wanted)))}
+    missing = sorted(wanted - set(found))
+    if missing:
+        now = datetime.utcnow()
+        db.session.execute(
+            _insert_ignore(Wallet, "user_id"),
+            [{"user_id": u, "balance": 0.0, "reserved_balance": 0.0, "currency": "NGN", "created_at": now, "updated_at": now} for u in missing],
+        )
+        found.update({int(u): int(w) for u, w in db.session.execute(select(Wallet.user_id, Wallet.id).where(Wallet.user_id.in_(missing)))})
+    return found
+
+
+def _existing_txns(legs: list[Leg]) -> dict[str, WalletTxn]:
+    """Already-posted txns for these legs, by leg key, in one query.
+
+    Matches on idempotency_key, or on (user, kind, reference, direction) for
+    rows posted without one.
+    """
+    refs = {leg.reference for leg in legs if leg.reference}
+    cond = WalletTxn.idempotency_key.in_({leg.key for leg in legs})
+    if refs:
+        cond = or_(cond, WalletTxn.reference.in_(refs))
+    by_key: dict[str, WalletTxn] = {}
+    by_natural: dict[tuple, WalletTxn] = {}
+    for t in WalletTxn.query.filter(cond).all():
+        if t.idempotency_key:
+            by_key[t.idempotency_key] = t
+        by_natural.setdefault((int(t.user_id), t.kind, t.reference, t.direction), t)
+    out = {}
+    for leg in legs:
+        t = by_key.get(leg.key) or by_natural.get((int(leg.user_id), leg.kind, leg.reference, leg.direction))
+        if t is not None:
+            out[leg.key] = t
+    return out
+
+
+def post_txns_batch(legs) -> list[LegResult]:
+    """Post several ledger legs atomically, with one commit. Returns one LegResult per leg.
+
+    Idempotency for every leg is resolved in one query and missing wallets are
+    created in one INSERT. The txn rows, the balance changes (one UPDATE per
+    wallet, net of its legs, in wallet id order) and the users' risk counters
+    go in the same transaction as anything the caller already has pending in
+    the session (e.g. the order's new escrow_status). If a wallet's net debit is not covered by
+    available funds, nothing is posted.
+    """
+    from app.utils import platform_fees, risk_counters
+    from app.utils.moneybox import ELIGIBLE_COMMISSION_KINDS, autosave_from_commission
+
+    results = [LegResult(leg) for leg in legs]
+    if not results:
+        return results
+    todo: list[LegResult] = []
+    first: dict[str, LegResult] = {}
+    repeats: list[tuple[LegResult, LegResult]] = []
+    fallback: set[int] = set()
+    try:
+        existing = _existing_txns([r.leg for r in results])
+        for r in results:
+            leg = r.leg
+            if leg.key in existing:
+                r.status, r.txn = "duplicate", existing[leg.key]
+            elif leg.key in first:
+                r.status = "duplicate"
+                repeats.append((r, first[leg.key]))
+            elif float(leg.amount or 0.0) > 0:
+                first[leg.key] = r
+                todo.append(r)
+        if not todo:
+            db.session.commit()
+            return results
+
+        wallets = _wallet_ids(r.leg.user_id for r in todo)
+        credits: dict[int, float] = {}
+        deferred: dict[int, float] = {}
+        debits: dict[int, float] = {}
+        for r in todo:
+            leg = r.leg
+            wid = wallets[int(leg.user_id)]
+            amt = float(leg.amount)
+            if leg.direction == "credit" and leg.reference and leg.kind in ELIGIBLE_COMMISSION_KINDS:
+                # Autosave is best-effort: a failed sweep rolls back to its
+                # SAVEPOINT and the leg posts in full.
+                try:
+                    with db.session.begin_nested():
+                        sweep = autosave_from_commission(user_id=int(leg.user_id), amount=amt, kind=str(leg.kind), reference=str(leg.reference), commit=False)
+                except Exception:
+                    sweep = 0.0
+                if sweep and sweep > 0:
+                    amt = max(0.0, amt - float(sweep))
+            r.txn = WalletTxn(
+                wallet_id=wid,
+                user_id=int(leg.user_id),
+                direction=leg.direction,
+                amount=amt,
+                kind=leg.kind,
+                reference=leg.reference,
+                idempotency_key=leg.key,
+                note=(leg.note or "")[:240],
+            )
+            db.session.add(r.txn)
+            if leg.direction == "credit":
+                bucket = deferred if leg.deferred else credits
+                bucket[wid] = bucket.get(wid, 0.0) + amt
+            elif leg.direction == "debit":
+                debits[wid] = debits.get(wid, 0.0) + amt
+
+        # The txn inserts claim the idempotency keys before any wallet row is locked.
+        db.session.flush()
+        short = set()
+        for wid in sorted(set(credits) | set(debits)):
+            net = credits.get(wid, 0.0) - debits.get(wid, 0.0)
+            if net > 0:
+                credit_balance(wid, net)
+            elif net < 0 and not debit_balance(wid, -net):
+                short.add(wid)
+        if short:
+            db.session.rollback()
+            for r in todo:
+                short_leg = r.leg.direction == "debit" and wallets[int(r.leg.user_id)] in short
+                r.status, r.txn = ("insufficient_funds" if short_leg else "failed"), None
+            return results
+        risk_counters.record_ledger(r.txn for r in todo)
+        for wid in sorted(deferred):
+            if not platform_fees.add_to_shard(wid, deferred[wid]):
+                credit_balance(wid, deferred[wid])
+                fallback.add(wid)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # A concurrent writer may have posted some of these legs first.
+        try:
+            existing = _existing_txns([r.leg for r in todo]) if todo else {}
+        except Exception:
+            existing = {}
+        for r in todo:
+            r.txn = existing.get(r.leg.key)
+            r.status = "duplicate" if r.txn is not None else "failed"
+        for r, src in repeats:
+            r.txn = src.txn
+        return results
+
+    for r in todo:
+        r.status = "posted"
+    for r, src in repeats:
+        r.txn = src.txn
+    for wid in fallback:
+        platform_fees.ensure_shards(wid)
+    return results
+
+
 def post_txn(
     *,
     user_id: int,
@@ -33,64 +251,26 @@ def post_txn(
     reference: str,
     note: str,
     idempotency_key: str | None = None,
+    deferred: bool = False,
 ) -> WalletTxn | None:
-    """Idempotent wallet posting: one txn per idempotency_key (or per user/kind/reference/direction)."""
-    w = get_or_create_wallet(user_id)
-    key = (idempotency_key or f"{int(user_id)}:{kind}:{direction}:{reference}")[:160]
-    existing = WalletTxn.query.filter_by(idempotency_key=key).first()
-    if not existing:
-        existing = WalletTxn.query.filter_by(user_id=user_id, kind=kind, reference=reference, direction=direction).first()
-    if existing:
-        return existing
-
-    amt = float(amount or 0.0)
-    if amt <= 0:
-        return None
-
-    if direction == "credit" and reference:
-        try:
-            from app.utils.moneybox import autosave_from_commission
-            sweep = autosave_from_commission(user_id=int(user_id), amount=float(amt), kind=str(kind), reference=str(reference))
-            if sweep and sweep > 0:
-                amt = max(0.0, float(amt) - float(sweep))
-        except Exception:
-            pass
+    """Idempotent wallet posting: one txn per idempotency_key (or per user/kind/reference/direction).
 
-    txn = WalletTxn(
-        wallet_id=w.id,
-        user_id=user_id,
+    The balance changes with a single atomic UPDATE in the same transaction as
+    the txn row; a debit that available funds no longer cover posts nothing.
+    deferred=True (credits only) adds to the wallet's fee shards instead of
+    the wallet row, for hot wallets (see app.utils.platform_fees).
+    """
+    res = post_txns_batch([Leg(
+        user_id=int(user_id),
         direction=direction,
-        amount=amt,
+        amount=amount,
         kind=kind,
         reference=reference,
-        idempotency_key=key,
-        note=(note or "")[:240],
-    )
-
-    if direction == "credit":
-        w.balance = float(w.balance or 0.0) + amt
-    elif direction == "debit":
-        # Enforce non-negative and respect reserved balance.
-        current = float(w.balance or 0.0)
-        reserved = float(getattr(w, "reserved_balance", 0.0) or 0.0)
-        available = current - reserved
-        if amt > available:
-            # Insufficient available funds: do not create txn.
-            return None
-        w.balance = current - amt
-    w.updated_at = datetime.utcnow()
-
-    try:
-        db.session.add(txn)
-        db.session.add(w)
-        db.session.commit()
-        return txn
-    except Exception:
-        db.session.rollback()
-        existing = WalletTxn.query.filter_by(idempotency_key=key).first()
-        if existing:
-            return existing
-        return None
+        note=note,
+        idempotency_key=idempotency_key,
+        deferred=deferred,
+    )])[0]
+    return res.txn if res.status in ("posted", "duplicate") else None
 
 
 def reserve_funds(user_id: int, amount: float) -> bool:
@@ -103,13 +283,14 @@ def reserve_funds(user_id: int, amount: float) -> bool:
     if amt <= 0:
         return False
     try:
-        available = float(w.balance or 0.0) - float(getattr(w, "reserved_balance", 0.0) or 0.0)
-        if available < amt:
-            return False
-        w.reserved_balance = float(getattr(w, "reserved_balance", 0.0) or 0.0) + amt
-        db.session.add(w)
+        res = db.session.execute(
+            update(Wallet)
+            .where(Wallet.id == int(w.id), Wallet.balance - Wallet.reserved_balance >= amt)
+            .values(reserved_balance=Wallet.reserved_balance + amt, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
-        return True
+        return bool(res.rowcount)
     except Exception:
         db.session.rollback()
         return False
@@ -125,9 +306,15 @@ def release_reserved(user_id: int, amount: float) -> bool:
     if amt <= 0:
         return False
     try:
-        rb = float(getattr(w, "reserved_balance", 0.0) or 0.0)
-        w.reserved_balance = max(0.0, rb - amt)
-        db.session.add(w)
+        db.session.execute(
+            update(Wallet)
+            .where(Wallet.id == int(w.id))
+            .values(
+                reserved_balance=case((Wallet.reserved_balance > amt, Wallet.reserved_balance - amt), else_=0.0),
+                updated_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
         return True
     except Exception:
@@ -0,0 +1,142 @@
+"""Driver matching: per-order queries (previous autopilot loop) vs the batched matcher.
+
+Run from backend/:
+    python -m bench.bench_driver_matching [ORDERS] [DRIVERS]     (default: 1000 5000)
+
+Seeds an in-memory SQLite database with drivers spread over a few states,
+cities and localities, and paid orders on listings in the same places, then
+times one tick of each approach and reports how offers were spread.
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+
+PLACES = {
+    "lagos": {"ikeja": ["alausa", "opebi", "allen"], "lekki": ["phase 1", "ajah", "chevron"], "yaba": ["sabo", "akoka"]},
+    "abuja": {"garki": ["area 1", "area 11"], "wuse": ["zone 4", "zone 6"]},
+    "oyo": {"ibadan": ["bodija", "dugbe", "mokola"]},
+    "rivers": {"port harcourt": ["gra", "rumuola"]},
+}
+
+
+def _place(rnd: random.Random) -> tuple[str, str, str]:
+    state = rnd.choice(list(PLACES))
+    city = rnd.choice(list(PLACES[state]))
+    return state, city, rnd.choice(PLACES[state][city])
+
+
+def _seed(db, n_orders: int, n_drivers: int, seed: int = 11) -> None:
+    from sqlalchemy import insert
+
+    from app.models import DriverProfile, Listing, Order, User
+
+    rnd = random.Random(seed)
+    db.session.execute(insert(User), [
+        {"name": "buyer", "email": "buyer@bench.local", "role": "buyer", "password_hash": "x"},
+        {"name": "merchant", "email": "merchant@bench.local", "role": "merchant", "password_hash": "x"},
+    ])
+    db.session.execute(insert(User), [
+        {"name": f"driver{i}", "email": f"driver{i}@bench.local", "role": "driver", "password_hash": "x", "is_available": True}
+        for i in range(n_drivers)
+    ])
+    driver_ids = [r[0] for r in db.session.query(User.id).filter(User.role == "driver").all()]
+    profiles = []
+    for uid in driver_ids:
+        state, city, locality = _place(rnd)
+        # A tenth of drivers never filled in their location.
+        if rnd.random() < 0.1:
+            state = city = locality = None
+        profiles.append({"user_id": uid, "state": state, "city": city, "locality": locality, "is_active": True, "phone": f"080{uid:08d}"})
+    db.session.execute(insert(DriverProfile), profiles)
+
+    listings = []
+    for i in range(n_orders):
+        state, city, locality = _place(rnd)
+        listings.append({"title": f"item {i}", "state": state, "city": city, "locality": locality, "owner_id": 2})
+    db.session.execute(insert(Listing), listings)
+    listing_ids = [r[0] for r in db.session.query(Listing.id).order_by(Listing.id).all()]
+    db.session.execute(insert(Order), [
+        {"buyer_id": 1, "merchant_id": 2, "listing_id": lid, "amount": 1000.0, "status": "paid"}
+        for lid in listing_ids
+    ])
+    db.session.commit()
+
+
+def _legacy_tick(db, max_items: int) -> int:
+    # The pre-batching autopilot.auto_assign_drivers loop (one User query + commit per order).
+    from app.models import DriverJobOffer, Order, User
+
+    assigned = 0
+    rows = (
+        Order.query
+        .filter(Order.driver_id.is_(None))
+        .filter(Order.status.in_(["created", "paid"]))
+        .order_by(Order.created_at.asc())
+        .limit(max_items)
+        .all()
+    )
+    for o in rows:
+        q = User.query.filter(User.role == "driver").filter(User.is_available == True)  # noqa: E712
+        driver = q.order_by(User.id.asc()).first()
+        if not driver:
+            continue
+        db.session.add(DriverJobOffer(order_id=int(o.id), driver_id=int(driver.id), status="offered"))
+        db.session.add(o)
+        db.session.commit()
+        assigned += 1
+    return assigned
+
+
+def _spread(db) -> str:
+    from app.models import DriverJobOffer
+
+    per_driver = Counter(r[0] for r in db.session.query(DriverJobOffer.driver_id).all())
+    if not per_driver:
+        return "no offers"
+    return f"drivers used={len(per_driver)} max offers/driver={max(per_driver.values())}"
+
+
+def main(argv=None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n_orders = int(argv[0]) if argv else 1000
+    n_drivers = int(argv[1]) if len(argv) > 1 else 5000
+
+    from app import create_app
+    from app.extensions import db
+    from app.utils import driver_matching
+
+    app = create_app()
+    print(f"{n_orders} pending orders x {n_drivers} drivers")
+    with app.app_context():
+        db.create_all()
+        _seed(db, n_orders, n_drivers)
+
+        t0 = time.perf_counter()
+        n = _legacy_tick(db, n_orders)
+        legacy = time.perf_counter() - t0
+        print(f"  legacy   {legacy * 1000:9.0f} ms  offered={n:<5d} {_spread(db)}")
+
+        db.session.execute(db.text("DELETE FROM driver_job_offers"))
+        db.session.commit()
+
+        orders = driver_matching.load_pending_orders(n_orders)
+        drivers = driver_matching.load_candidates()
+        t0 = time.perf_counter()
+        driver_matching.match(orders, drivers)
+        in_memory = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        res = driver_matching.run_tick(n_orders)
+        batched = time.perf_counter() - t0
+        print(f"  batched  {batched * 1000:9.0f} ms  offered={res['offered']:<5d} {_spread(db)}  by_tier={res['by_tier']}  x{legacy / batched:.1f}")
+        print(f"           (in-memory match() alone: {in_memory * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Escrow settlement: per-order lookups vs one SettlementBatch per chunk.
+
+Run from backend/:
+    python -m bench.bench_escrow_prefetch [ORDERS]     (default: 200)
+
+Seeds two identical sets of ORDERS due HELD orders (inspection passed and
+unlocked, each with its own merchant, merchant profile and listing; every
+third merchant top-tier), then claims and settles each set as one chunk:
+first with the previous per-order lookups (unlock, seller role, top-tier
+flag, listing, and the platform user resolved on every call), then with
+SettlementBatch.prefetch(). Reports SQL statements per order and wall time.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+
+def _seed(db, n: int, first_user: int) -> None:
+    from sqlalchemy import insert
+
+    from app.models import EscrowUnlock, Listing, MerchantProfile, Order, User
+
+    now = datetime.utcnow()
+    merchants = list(range(first_user, first_user + n))
+    db.session.execute(insert(User), [
+        {"id": uid, "name": f"m{uid}", "email": f"m{uid}@bench.local", "role": "merchant", "password_hash": "x"}
+        for uid in merchants
+    ])
+    db.session.execute(insert(MerchantProfile), [
+        {"user_id": uid, "is_top_tier": uid % 3 == 0} for uid in merchants
+    ])
+    db.session.execute(insert(Listing), [
+        {"id": uid, "user_id": uid, "title": f"item {uid}", "price": 1030.0, "base_price": 1000.0,
+         "platform_fee": 30.0, "final_price": 1030.0}
+        for uid in merchants
+    ])
+    db.session.execute(insert(Order), [
+        {"id": uid, "buyer_id": 1, "merchant_id": uid, "listing_id": uid, "amount": 1030.0, "status": "paid",
+         "escrow_status": "HELD", "escrow_hold_amount": 1030.0, "escrow_held_at": now,
+         "inspection_outcome": "PASS", "release_condition": "INSPECTION_PASS",
+         "next_escrow_eval_at": now - timedelta(minutes=1), "created_at": now, "updated_at": now}
+        for uid in merchants
+    ])
+    db.session.execute(insert(EscrowUnlock), [
+        {"order_id": uid, "step": "inspection_inspector", "unlocked_at": now} for uid in merchants
+    ])
+    db.session.commit()
+
+
+def main(argv=None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n = int(argv[0]) if argv else 200
+
+    from sqlalchemy import event
+
+    from app import create_app
+    from app.extensions import db
+    from app.jobs import escrow_runner
+    from app.models import User
+    from app.utils import escrow_queue
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(id=1, name="buyer", email="buyer@bench.local", role="buyer", password_hash="x"),
+            User(id=2, name="admin", email="admin@bench.local", role="admin", password_hash="x"),
+        ])
+        db.session.commit()
+
+        statements = {"n": 0}
+
+        def count(*_args, **_kw):
+            statements["n"] += 1
+
+        engine = db.engine
+        for label, prefetch, first_user in (("per-order lookups", False, 1000), ("SettlementBatch", True, 1000 + n)):
+            _seed(db, n, first_user)
+            claimed = escrow_queue.claim_due(f"bench-{label}", limit=n)
+            event.listen(engine, "before_cursor_execute", count)
+            statements["n"] = 0
+            t0 = time.perf_counter()
+            batch = escrow_runner.SettlementBatch.prefetch(i for i, _ in claimed) if prefetch else None
+            outcomes = []
+            for order_id, claimed_until in claimed:
+                if not prefetch:
+                    escrow_runner._platform_user_id_cache = None
+                outcomes.append(escrow_runner.settle_order(order_id, claimed_until, worker="bench", batch=batch))
+            seconds = time.perf_counter() - t0
+            event.remove(engine, "before_cursor_execute", count)
+            released = sum(1 for r in outcomes if r["outcome"] == "released")
+            print(
+                f"  {label:<18s} {len(claimed)} orders  {statements['n'] / max(1, len(claimed)):5.1f} statements/order"
+                f"  {seconds * 1000:7.0f} ms  released {released}"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
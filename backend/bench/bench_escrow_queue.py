@@ -0,0 +1,113 @@
+"""Escrow automation: first-500-HELD rescans (previous runner) vs the due-time queue.
+
+Run from backend/:
+    python -m bench.bench_escrow_queue [PARKED ...]     (default: 1000 10000 100000)
+
+For each size, the database holds that many parked HELD orders (inspection
+passed, waiting on the inspector unlock, next look a day away) plus 50 newer
+orders whose TIMEOUT has elapsed. Times one run of each approach: the
+previous loop reads the first 500 HELD orders by id (all parked, so the due
+ones are never reached), the queue reads and settles only the due ones;
+then a queue run with nothing due.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+DUE = 50
+
+
+def _order(buyer: int, merchant: int, now: datetime, *, due: bool) -> dict:
+    row = {
+        "buyer_id": buyer, "merchant_id": merchant, "amount": 1030.0, "status": "paid",
+        "escrow_status": "HELD", "escrow_hold_amount": 1030.0, "inspection_outcome": "PASS",
+        "created_at": now, "updated_at": now,
+    }
+    if due:
+        row.update(release_condition="TIMEOUT", escrow_held_at=now - timedelta(days=5), next_escrow_eval_at=now - timedelta(minutes=1))
+    else:
+        row.update(release_condition="INSPECTION_PASS", escrow_held_at=now, next_escrow_eval_at=now + timedelta(days=1))
+    return row
+
+
+def _grow(db, parked_now: int, parked_target: int) -> None:
+    from sqlalchemy import insert
+
+    from app.models import Order
+
+    now = datetime.utcnow()
+    rows = [_order(1, 2, now, due=False) for _ in range(parked_target - parked_now)]
+    for i in range(0, len(rows), 50000):
+        db.session.execute(insert(Order), rows[i:i + 50000])
+    db.session.execute(insert(Order), [_order(1, 2, now, due=True) for _ in range(DUE)])
+    db.session.commit()
+
+
+def _legacy_run(limit: int = 500) -> int:
+    # The previous run_escrow_automation scan: first `limit` HELD orders by id,
+    # each re-evaluated (unlock lookup for the INSPECTION_PASS ones).
+    from app.jobs import escrow_runner
+    from app.models import Order
+
+    released = 0
+    for o in Order.query.filter_by(escrow_status="HELD").order_by(Order.id.asc()).limit(limit).all():
+        cond = (o.release_condition or "").upper()
+        if cond == "INSPECTION_PASS":
+            if not escrow_runner._inspection_unlock_ready(int(o.id)):
+                continue
+        if cond == "TIMEOUT":
+            released += 1
+    return released
+
+
+def main(argv=None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    sizes = [int(a) for a in argv] or [1000, 10000, 100000]
+
+    from app import create_app
+    from app.extensions import db
+    from app.jobs.escrow_runner import run_escrow_automation
+    from app.models import User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(name="buyer", email="buyer@bench.local", role="buyer", password_hash="x"),
+            User(name="merchant", email="merchant@bench.local", role="merchant", password_hash="x"),
+            User(name="admin", email="admin@bench.local", role="admin", password_hash="x"),
+        ])
+        db.session.commit()
+
+        parked = 0
+        for size in sizes:
+            _grow(db, parked, size)
+            parked = size
+
+            t0 = time.perf_counter()
+            reached = _legacy_run()
+            legacy = time.perf_counter() - t0
+            db.session.expunge_all()
+
+            t0 = time.perf_counter()
+            res = run_escrow_automation()
+            queued = time.perf_counter() - t0
+            db.session.expunge_all()
+
+            t0 = time.perf_counter()
+            run_escrow_automation()
+            idle = time.perf_counter() - t0
+            print(
+                f"  parked={size:<7d} legacy {legacy * 1000:6.0f} ms (due reached {reached}/{DUE})"
+                f"   queue {queued * 1000:6.0f} ms (released {res['released']}/{DUE})"
+                f"   queue, nothing due {idle * 1000:6.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Micro-benchmark: scalar haversine loop vs the batched kernels in app.utils.geo.
+
+Run from backend/:
+    python -m bench.bench_geo [N ...]      (default: 10000 100000)
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from app.utils import geo
+
+
+ORIGIN = (6.5244, 3.3792)  # Lagos
+
+
+def _points(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    lats = [4.0 + rnd.random() * 9.0 for _ in range(n)]
+    lngs = [2.7 + rnd.random() * 12.0 for _ in range(n)]
+    return lats, lngs
+
+
+def _best_of(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n: int) -> None:
+    lats, lngs = _points(n)
+    lat0, lng0 = ORIGIN
+
+    def scalar():
+        return [geo.haversine_km(lat0, lng0, la, ln) for la, ln in zip(lats, lngs)]
+
+    def batched():
+        return geo.haversine_many(lat0, lng0, lats, lngs)
+
+    ref = scalar()
+    got = batched()
+    err = max(abs(float(a) - b) for a, b in zip(got, ref))
+
+    t_scalar = _best_of(scalar)
+    t_batched = _best_of(batched)
+    print(
+        f"one-to-N  n={n:>7}  scalar={t_scalar * 1000:8.2f}ms  "
+        f"batched={t_batched * 1000:8.2f}ms  speedup={t_scalar / t_batched:6.1f}x  max_err={err:.2e}km"
+    )
+
+    # N x M: a 100-stop route against a slice of the points (keeps the matrix modest).
+    m = min(n, 10000)
+    path_lats, path_lngs = _points(100, seed=11)
+    sub_lats, sub_lngs = lats[:m], lngs[:m]
+
+    def scalar_matrix():
+        return [
+            [geo.haversine_km(pa, pb, la, ln) for la, ln in zip(sub_lats, sub_lngs)]
+            for pa, pb in zip(path_lats, path_lngs)
+        ]
+
+    def batched_matrix():
+        return geo.haversine_matrix(path_lats, path_lngs, sub_lats, sub_lngs)
+
+    t_scalar = _best_of(scalar_matrix, repeat=2)
+    t_batched = _best_of(batched_matrix, repeat=2)
+    print(
+        f"N x M     {100}x{m:<7} scalar={t_scalar * 1000:8.2f}ms  "
+        f"batched={t_batched * 1000:8.2f}ms  speedup={t_scalar / t_batched:6.1f}x"
+    )
+
+
+def main(argv: list[str]) -> int:
+    sizes = [int(a) for a in argv] or [10000, 100000]
+    print(f"numpy={'yes' if geo.has_numpy() else 'no (pure-Python fallback)'}")
+    for n in sizes:
+        run(n)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,98 @@
+"""Merchant order list: the previous limit(200) list vs keyset pages.
+
+Run from backend/:
+    python -m bench.bench_order_lists [ORDERS]     (default: 50000)
+
+Seeds one merchant with ORDERS orders (plus as many for other merchants),
+then times GET /api/merchant/orders through the test client: the bare list
+(newest 200, what every call used to return) as summary rows and as full
+?view=full rows, the first keyset page (?limit=30), a page deep in the list
+(cursor at the middle) and a ?status= filtered first page.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+STATUSES = ("paid", "merchant_accepted", "driver_assigned", "delivered", "completed", "cancelled")
+
+
+def _seed(db, n: int) -> None:
+    from sqlalchemy import insert
+
+    from app.models import Order, User
+
+    db.session.execute(insert(User), [
+        {"id": i, "name": f"u{i}", "email": f"u{i}@bench.local", "role": "merchant" if i > 1 else "buyer", "password_hash": "x"}
+        for i in range(1, 12)
+    ])
+    base = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    for i in range(2 * n):
+        merchant = 2 if i % 2 == 0 else 3 + i % 9
+        batch.append({
+            "buyer_id": 1, "merchant_id": merchant, "amount": 1000.0, "status": STATUSES[i % len(STATUSES)],
+            "created_at": base + timedelta(seconds=i * 60), "updated_at": base,
+        })
+        if len(batch) == 50000:
+            db.session.execute(insert(Order), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Order), batch)
+    db.session.commit()
+
+
+def _time(client, url: str, headers: dict, runs: int = 20):
+    best = None
+    body = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        r = client.get(url, headers=headers)
+        seconds = time.perf_counter() - t0
+        assert r.status_code == 200, r.get_data(as_text=True)
+        body = r.get_json()
+        best = seconds if best is None else min(best, seconds)
+    return best, body
+
+
+def main(argv=None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n = int(argv[0]) if argv else 50000
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Order
+    from app.utils.jwt_utils import create_token
+    from app.utils.pagination import encode_cursor
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        _seed(db, n)
+        headers = {"Authorization": f"Bearer {create_token(2)}"}
+        client = app.test_client()
+        mid = (
+            Order.query.filter(Order.merchant_id == 2)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .offset(n // 2).first()
+        )
+        cursor = encode_cursor(mid.created_at, int(mid.id))
+        print(f"merchant with {n} orders ({2 * n} total)")
+        for label, url in (
+            ("bare list (newest 200)", "/api/merchant/orders"),
+            ("bare list, view=full", "/api/merchant/orders?view=full"),
+            ("first page, limit=30", "/api/merchant/orders?limit=30"),
+            ("middle page, limit=30", f"/api/merchant/orders?limit=30&cursor={cursor}"),
+            ("status=completed, limit=30", "/api/merchant/orders?limit=30&status=completed"),
+        ):
+            seconds, body = _time(client, url, headers)
+            count = len(body) if isinstance(body, list) else body["count"]
+            print(f"  {label:<28s} {seconds * 1000:7.1f} ms  rows {count}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Payout dispatch: sequential vs concurrent vs bulk provider calls against the fake Paystack server.
+
+Run from backend/:
+    python -m bench.bench_payouts [N] [--latency-ms 150] [--workers 8] [--item-fail-rate 0.0]
+
+Seeds N approved payouts (each with a Paystack recipient) in an in-memory
+SQLite database, runs autopilot.process_payouts with single transfers on one
+worker, single transfers on --workers, and bulk transfers on --workers, and
+prints wall time, provider round trips and the provider p50/p95.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+os.environ.setdefault("PAYSTACK_SECRET_KEY", "sk_test_bench")
+os.environ.setdefault("PAYOUT_RATE_LIMIT", "0")
+
+from bench.fake_paystack import FakePaystack  # noqa: E402
+
+
+def _seed(db, n: int) -> None:
+    from app.models import PayoutRecipient, PayoutRequest, User, Wallet
+
+    users = [User(email=f"payee{i}@bench.local", name=f"payee{i}", role="merchant", password_hash="x") for i in range(n)]
+    db.session.add_all(users)
+    db.session.flush()
+    for u in users:
+        db.session.add(Wallet(user_id=u.id, balance=10000.0, reserved_balance=0.0))
+        db.session.add(PayoutRecipient(user_id=u.id, provider="paystack", recipient_code=f"RCP_{u.id}"))
+        db.session.add(PayoutRequest(user_id=u.id, amount=500.0, net_amount=500.0, status="approved"))
+    db.session.commit()
+
+
+def _run(app, n: int, workers: int, mode: str) -> dict:
+    from app.extensions import db
+    from app.utils import autopilot, payout_dispatch, paystack_client
+
+    payout_dispatch.DISPATCH_WORKERS = workers
+    payout_dispatch.TRANSFER_MODE = mode
+    payout_dispatch._executor = None
+    paystack_client.reset_latency_stats()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        _seed(db, n)
+        t0 = time.perf_counter()
+        res = autopilot.process_payouts(max_items=n)
+        elapsed = time.perf_counter() - t0
+        db.session.remove()
+    res["seconds"] = elapsed
+    return res
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("n", nargs="?", type=int, default=30)
+    ap.add_argument("--latency-ms", type=float, default=150.0)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--item-fail-rate", type=float, default=0.0)
+    args = ap.parse_args(argv)
+
+    fake = FakePaystack(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 3, item_fail_rate=args.item_fail_rate).start()
+    os.environ["PAYSTACK_BASE_URL"] = fake.base_url
+    try:
+        from app import create_app
+
+        app = create_app()
+        print(f"{args.n} payouts, provider latency ~{args.latency_ms:.0f}ms")
+        base = None
+        for workers, mode in ((1, "single"), (args.workers, "single"), (args.workers, "bulk")):
+            fake.reset()
+            res = _run(app, args.n, workers, mode)
+            lats = res.get("provider_latency") or {}
+            lat = lats.get("transfer_bulk" if mode == "bulk" else "transfer") or {}
+            base = base or res["seconds"]
+            print(
+                f"  {mode:<6s} workers={workers:<3d} {res['seconds'] * 1000:8.0f} ms  paid={res['paid']:<5d} failed={res['failed']:<3d} unknown={res.get('unknown', 0):<3d}"
+                f" calls={sum(fake.calls.values()):<5d} fallbacks={res.get('bulk_fallbacks', 0):<4d}"
+                f" p50={lat.get('p50_ms', 0):6.1f}ms p95={lat.get('p95_ms', 0):6.1f}ms x{base / res['seconds']:.1f}"
+            )
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
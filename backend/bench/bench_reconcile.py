@@ -0,0 +1,128 @@
+"""Wallet reconciliation: per-wallet SUM queries vs set-based checkpointed passes.
+
+Run from backend/:
+    python -m bench.bench_reconcile [WALLETS] [TXNS_PER_WALLET]     (default: 20000 5)
+
+Seeds wallets with balanced ledgers (and a few deliberate mismatches),
+then times: the previous per-wallet loop (two aggregate queries per
+wallet), a first set-based pass (no checkpoints yet), and a second pass
+after 1% of wallets got a new txn (checkpointed). Prints the projected
+time for a million wallets for each.
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+BAD_EVERY = 997
+
+
+def _seed(db, n_wallets: int, per_wallet: int, seed: int = 5) -> None:
+    from sqlalchemy import insert
+
+    from app.models import User, Wallet, WalletTxn
+
+    rnd = random.Random(seed)
+    old = datetime.utcnow() - timedelta(days=2)
+    db.session.execute(insert(User), [
+        {"name": f"u{i}", "email": f"u{i}@bench.local", "role": "buyer", "password_hash": "x"} for i in range(n_wallets)
+    ])
+    wallets, txns = [], []
+    for uid in range(1, n_wallets + 1):
+        total = 0.0
+        for k in range(per_wallet):
+            amt = float(rnd.randint(1, 500))
+            direction = "debit" if (k % 3 == 2 and total > amt) else "credit"
+            total += amt if direction == "credit" else -amt
+            txns.append({
+                "wallet_id": uid, "user_id": uid, "direction": direction, "amount": amt, "kind": "bench",
+                "reference": f"b{uid}:{k}", "idempotency_key": f"b{uid}:{k}", "created_at": old,
+            })
+        if uid % BAD_EVERY == 0:
+            total += 1.0
+        wallets.append({"id": uid, "user_id": uid, "balance": total, "reserved_balance": 0.0, "currency": "NGN"})
+    db.session.execute(insert(Wallet), wallets)
+    for i in range(0, len(txns), 50000):
+        db.session.execute(insert(WalletTxn), txns[i:i + 50000])
+    db.session.commit()
+
+
+def _legacy(db, n_wallets: int) -> int:
+    # The previous reconcile_wallets loop: two SUMs per wallet.
+    from sqlalchemy import func
+
+    from app.models import Wallet, WalletTxn
+
+    bad = 0
+    for w in Wallet.query.order_by(Wallet.id.asc()).limit(n_wallets).all():
+        credits = db.session.query(func.coalesce(func.sum(WalletTxn.amount), 0.0)).filter(
+            WalletTxn.wallet_id == int(w.id), WalletTxn.direction == "credit").scalar() or 0.0
+        debits = db.session.query(func.coalesce(func.sum(WalletTxn.amount), 0.0)).filter(
+            WalletTxn.wallet_id == int(w.id), WalletTxn.direction == "debit").scalar() or 0.0
+        if abs(float(credits) - float(debits) - float(w.balance or 0.0)) > 0.01:
+            bad += 1
+    return bad
+
+
+def _touch(db, n_wallets: int) -> None:
+    """One more settled credit on 1% of wallets, balance kept in step."""
+    from sqlalchemy import insert, update
+
+    from app.models import Wallet, WalletTxn
+
+    old = datetime.utcnow() - timedelta(hours=1)
+    ids = list(range(1, n_wallets + 1, 100))
+    db.session.execute(insert(WalletTxn), [
+        {"wallet_id": w, "user_id": w, "direction": "credit", "amount": 10.0, "kind": "bench",
+         "reference": f"t{w}", "idempotency_key": f"t{w}", "created_at": old}
+        for w in ids
+    ])
+    db.session.execute(update(Wallet).where(Wallet.id.in_(ids)).values(balance=Wallet.balance + 10.0))
+    db.session.commit()
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n_wallets = int(argv[0]) if argv else 20000
+    per_wallet = int(argv[1]) if len(argv) > 1 else 5
+
+    from app import create_app
+    from app.extensions import db
+    from app.jobs.wallet_reconciler import reconcile_wallets
+
+    app = create_app()
+    expected = n_wallets // BAD_EVERY
+    print(f"{n_wallets} wallets x {per_wallet} txns, {expected} seeded mismatches")
+    with app.app_context():
+        db.create_all()
+        _seed(db, n_wallets, per_wallet)
+
+        def report(label: str, secs: float, found: int) -> None:
+            per_million = secs * (1_000_000 / n_wallets)
+            print(f"  {label:<22s} {secs * 1000:8.0f} ms  anomalies={found:<4d} ~{per_million / 60:5.1f} min per 1M wallets")
+
+        t0 = time.perf_counter()
+        found = _legacy(db, n_wallets)
+        report("per-wallet SUMs", time.perf_counter() - t0, found)
+
+        t0 = time.perf_counter()
+        res = reconcile_wallets()
+        report("set-based, first pass", time.perf_counter() - t0, res["anomalies"])
+        first = res
+
+        _touch(db, n_wallets)
+        t0 = time.perf_counter()
+        res = reconcile_wallets()
+        report("checkpointed pass", time.perf_counter() - t0, res["anomalies"])
+    ok = found == expected and first["anomalies"] == expected and res["anomalies"] == expected
+    print(f"  checkpoints written={first['checkpoints']} advanced={res['checkpoints']}  {'PASS' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
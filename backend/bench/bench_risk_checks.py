@@ -0,0 +1,121 @@
+"""Payout risk checks: ledger queries (previous risk.py) vs risk_daily_counters.
+
+Run from backend/:
+    python -m bench.bench_risk_checks [USERS] [TXNS_PER_USER]     (default: 500 400)
+
+Seeds users whose ledgers are spread over the last three days (a third of
+the txns are payout debits), then times the three payout checks for every
+user: the previous implementation (load today's payout rows, count the
+velocity window, fetch the latest payout request), the counter backfill,
+and the counter-backed checks (one two-row read per user).
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+
+def _seed(db, n_users: int, per_user: int, seed: int = 19) -> None:
+    from sqlalchemy import insert
+
+    from app.models import PayoutRequest, User, Wallet, WalletTxn
+
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {"name": f"u{i}", "email": f"u{i}@bench.local", "role": "merchant", "password_hash": "x"} for i in range(n_users)
+    ])
+    db.session.execute(insert(Wallet), [
+        {"id": uid, "user_id": uid, "balance": 0.0, "reserved_balance": 0.0, "currency": "NGN"} for uid in range(1, n_users + 1)
+    ])
+    txns, requests = [], []
+    for uid in range(1, n_users + 1):
+        for k in range(per_user):
+            at = now - timedelta(seconds=rnd.randint(0, 3 * 86400))
+            payout = k % 3 == 0
+            txns.append({
+                "wallet_id": uid, "user_id": uid, "direction": "debit" if payout else "credit",
+                "amount": float(rnd.randint(1, 500)), "kind": "payout" if payout else "order_sale",
+                "reference": f"b{uid}:{k}", "idempotency_key": f"b{uid}:{k}", "created_at": at,
+            })
+            if payout and k % 30 == 0:
+                requests.append({"user_id": uid, "amount": 1.0, "status": "paid", "created_at": at, "updated_at": at})
+    for i in range(0, len(txns), 50000):
+        db.session.execute(insert(WalletTxn), txns[i:i + 50000])
+    db.session.execute(insert(PayoutRequest), requests)
+    db.session.commit()
+
+
+def _legacy_checks(db, uid: int) -> tuple[float, int, datetime | None]:
+    # paid_out_today / txn_velocity_ok / payout_cooldown_ok before the counters.
+    from app.models import PayoutRequest, WalletTxn
+
+    now = datetime.utcnow()
+    rows = (
+        WalletTxn.query
+        .filter(WalletTxn.user_id == uid, WalletTxn.kind == "payout", WalletTxn.direction == "debit")
+        .filter(WalletTxn.created_at >= datetime(now.year, now.month, now.day))
+        .all()
+    )
+    paid = sum(float(r.amount or 0.0) for r in rows)
+    cnt = (
+        db.session.query(db.func.count(WalletTxn.id))
+        .filter(WalletTxn.user_id == uid, WalletTxn.created_at >= now - timedelta(minutes=10))
+        .scalar()
+    )
+    last = PayoutRequest.query.filter(PayoutRequest.user_id == uid).order_by(PayoutRequest.created_at.desc()).first()
+    return paid, int(cnt or 0), last.created_at if last else None
+
+
+def main(argv=None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n_users = int(argv[0]) if argv else 500
+    per_user = int(argv[1]) if len(argv) > 1 else 400
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+    from app.utils import risk_counters
+    from app.utils.maintenance import run_job, start_job
+
+    app = create_app()
+    print(f"{n_users} users x {per_user} txns over 3 days")
+    with app.app_context():
+        db.create_all()
+        _seed(db, n_users, per_user)
+        uids = list(range(1, n_users + 1))
+
+        t0 = time.perf_counter()
+        legacy = {uid: _legacy_checks(db, uid) for uid in uids}
+        t_legacy = time.perf_counter() - t0
+        db.session.expunge_all()
+        print(f"  legacy checks    {t_legacy * 1000:8.0f} ms  ({t_legacy * 1e6 / n_users:7.0f} us/check)")
+
+        t0 = time.perf_counter()
+        job, _ = start_job("risk-counters-backfill")
+        job = run_job(int(job.id))
+        t_backfill = time.perf_counter() - t0
+        print(f"  backfill         {t_backfill * 1000:8.0f} ms  status={job.status} changes={job.succeeded}")
+
+        t0 = time.perf_counter()
+        snaps = {uid: risk_counters.snapshot(uid) for uid in uids}
+        t_counters = time.perf_counter() - t0
+        print(f"  counter checks   {t_counters * 1000:8.0f} ms  ({t_counters * 1e6 / n_users:7.0f} us/check)  x{t_legacy / t_counters:.1f}")
+
+        wrong = sum(
+            1 for uid in uids
+            if abs(legacy[uid][0] - snaps[uid]["paid_out_today"]) > 0.01
+            or legacy[uid][2] != snaps[uid]["last_payout_request_at"]
+        )
+        job, _ = start_job("risk-counters-check")
+        job = run_job(int(job.id))
+        print(f"  paid-today/cooldown disagreements={wrong}  check mismatches={job.succeeded}  users={User.query.count()}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Escrow settlement: one post_txn (and commit) per leg vs post_txns_batch per order.
+
+Run from backend/:
+    python -m bench.bench_settlement [ORDERS]     (default: 300)
+
+Seeds HELD orders (merchant sale + platform fee, driver fee + commission,
+inspector fee + commission: 6 legs each) whose release timeout has passed,
+then settles them both ways and reports wall time, SQL statements and
+commits per order. Both runs must leave identical balances.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+
+class _Counter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def install(self, engine) -> None:
+        from sqlalchemy import event
+
+        event.listen(engine, "before_cursor_execute", self._stmt)
+        event.listen(engine, "commit", self._commit)
+
+    def _stmt(self, *args, **kwargs) -> None:
+        self.statements += 1
+
+    def _commit(self, *args, **kwargs) -> None:
+        self.commits += 1
+
+
+def _seed(db, n: int) -> None:
+    from sqlalchemy import insert
+
+    from app.models import Order, User
+
+    db.session.execute(insert(User), [
+        {"name": "admin", "email": "admin@bench.local", "role": "admin", "password_hash": "x"},
+        {"name": "buyer", "email": "buyer@bench.local", "role": "buyer", "password_hash": "x"},
+    ] + [
+        {"name": f"m{i}", "email": f"m{i}@bench.local", "role": "merchant", "password_hash": "x"} for i in range(20)
+    ] + [
+        {"name": f"d{i}", "email": f"d{i}@bench.local", "role": "driver", "password_hash": "x"} for i in range(20)
+    ] + [
+        {"name": f"i{i}", "email": f"i{i}@bench.local", "role": "inspector", "password_hash": "x"} for i in range(5)
+    ])
+    held_at = datetime.utcnow() - timedelta(days=3)
+    db.session.execute(insert(Order), [
+        {
+            "buyer_id": 2, "merchant_id": 3 + (i % 20), "driver_id": 23 + (i % 20), "inspector_id": 43 + (i % 5),
+            "amount": 1030.0, "delivery_fee": 500.0, "inspection_fee": 300.0, "status": "paid",
+            "escrow_status": "HELD", "escrow_hold_amount": 1830.0, "escrow_held_at": held_at,
+            "inspection_outcome": "PASS", "release_condition": "TIMEOUT",
+        }
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def _legacy_settle(db, order) -> None:
+    # The pre-batch flow: every leg is its own post_txn() round and commit.
+    from app.jobs import escrow_runner
+    from app.models import Listing
+    from app.utils.wallets import post_txn
+
+    ref = f"order:{int(order.id)}"
+    listing = Listing.query.get(int(order.listing_id)) if order.listing_id else None
+    legs = (
+        escrow_runner._seller_legs(order, listing, ref, float(order.amount or 0.0))
+        + escrow_runner._driver_legs(order, ref, float(order.delivery_fee or 0.0))
+        + escrow_runner._inspection_legs(order)
+    )
+    for leg in legs:
+        post_txn(
+            user_id=leg.user_id, direction=leg.direction, amount=leg.amount, kind=leg.kind,
+            reference=leg.reference, note=leg.note, deferred=leg.deferred,
+        )
+    order.escrow_status = "RELEASED"
+    order.escrow_release_at = datetime.utcnow()
+    db.session.add(order)
+    db.session.commit()
+    escrow_runner._event_once(int(order.id), "escrow_released", "Escrow released")
+
+
+def _balances(db) -> dict:
+    from sqlalchemy import select
+
+    from app.models import Wallet
+    from app.utils import platform_fees
+
+    platform_fees.rollup()
+    return {int(u): round(float(b), 2) for u, b in db.session.execute(select(Wallet.user_id, Wallet.balance))}
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n = int(argv[0]) if argv else 300
+
+    from app import create_app
+    from app.extensions import db
+    from app.jobs import escrow_runner
+    from app.models import Order
+
+    app = create_app()
+    print(f"settling {n} orders (6 legs each)")
+    results = {}
+    with app.app_context():
+        counter = _Counter()
+        counter.install(db.engine)
+        for label in ("per-leg", "batched"):
+            db.drop_all()
+            db.create_all()
+            _seed(db, n)
+            counter.statements = counter.commits = 0
+            t0 = time.perf_counter()
+            if label == "per-leg":
+                for o in Order.query.filter_by(escrow_status="HELD").order_by(Order.id.asc()).all():
+                    _legacy_settle(db, o)
+                released = n
+            else:
+                released = escrow_runner.run_escrow_automation(limit=n)["released"]
+            secs = time.perf_counter() - t0
+            results[label] = _balances(db)
+            print(
+                f"  {label:<8s} {secs * 1000:8.0f} ms  released={released:<5d}"
+                f" statements/order={counter.statements / n:6.1f} commits/order={counter.commits / n:5.1f}"
+            )
+    same = results["per-leg"] == results["batched"]
+    print(f"  balances identical: {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Wallet statement export: load-everything vs the streamed CSV body.
+
+Run from backend/:
+    python -m bench.bench_statement [TXNS]     (default: 200000)
+
+Seeds one wallet with TXNS txns (plus another wallet's noise), then builds
+the same CSV twice: from one .all() + to_dict() list (what an unstreamed
+export would do) and from wallet_statement.iter_statement(). Reports wall
+time and peak Python memory (tracemalloc) for each, and the time to the
+first chunk of the streamed body.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+
+def _seed(db, n: int) -> None:
+    from sqlalchemy import insert
+
+    from app.models import User, Wallet, WalletTxn
+
+    base = datetime.utcnow() - timedelta(days=365)
+    db.session.execute(insert(User), [
+        {"name": f"u{i}", "email": f"u{i}@bench.local", "role": "merchant", "password_hash": "x"} for i in range(2)
+    ])
+    db.session.execute(insert(Wallet), [
+        {"id": i, "user_id": i, "balance": 0.0, "reserved_balance": 0.0, "currency": "NGN"} for i in (1, 2)
+    ])
+    batch = []
+    for i in range(n + n // 4):
+        wid = 1 if i % 5 else 2
+        batch.append({
+            "wallet_id": wid, "user_id": wid, "direction": "credit" if i % 3 else "debit", "amount": float(i % 500 + 1),
+            "kind": "order_sale", "reference": f"o{i}", "idempotency_key": f"b{i}", "note": "bench",
+            "created_at": base + timedelta(seconds=i * 20),
+        })
+        if len(batch) == 50000:
+            db.session.execute(insert(WalletTxn), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(WalletTxn), batch)
+    db.session.commit()
+
+
+def _unstreamed(db) -> int:
+    from app.models import WalletTxn
+
+    rows = WalletTxn.query.filter_by(wallet_id=1).order_by(WalletTxn.created_at.asc(), WalletTxn.id.asc()).all()
+    items = [t.to_dict() for t in rows]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for x in items:
+        writer.writerow([x["id"], x["created_at"], x["direction"], x["amount"], x["kind"], x["reference"], x["note"]])
+    return len(buf.getvalue())
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, seconds, peak
+
+
+def main(argv=None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    n = int(argv[0]) if argv else 200000
+
+    from app import create_app
+    from app.extensions import db
+    from app.utils.wallet_statement import iter_statement
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        _seed(db, n)
+        n_rows = db.session.execute(db.text("SELECT count(*) FROM wallet_txns WHERE wallet_id = 1")).scalar()
+        print(f"statement of {n_rows} txns")
+
+        size, seconds, peak = _measure(lambda: _unstreamed(db))
+        db.session.expunge_all()
+        print(f"  all() + to_dict  {seconds * 1000:8.0f} ms  peak {peak / 2**20:7.1f} MiB  bytes={size}")
+
+        first = {}
+
+        def streamed() -> int:
+            total = 0
+            t0 = time.perf_counter()
+            for chunk in iter_statement(1, fmt="csv"):
+                first.setdefault("s", time.perf_counter() - t0)
+                total += len(chunk)
+            return total
+
+        size, seconds, peak = _measure(streamed)
+        print(f"  streamed         {seconds * 1000:8.0f} ms  peak {peak / 2**20:7.1f} MiB  bytes={size}  first chunk {first['s'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
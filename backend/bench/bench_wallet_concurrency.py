@@ -0,0 +1,207 @@
+"""Wallet balance updates under concurrent writers (stress test).
+
+Run from backend/:
+    python -m bench.bench_wallet_concurrency [WRITERS] [OPS_PER_WRITER]     (default: 50 20)
+
+Uses a temporary SQLite file (BENCH_DATABASE_URL to point it at Postgres
+instead) so every writer thread has its own connection. Scenarios:
+
+  legacy      read balance, add in Python, write back (the old post_txn)
+  credit      post_txn credits to one wallet
+  debit       post_txn debits totalling 2x the balance (guarded debit)
+  compat      the same through segment_wallet_engine.debit_wallet (legacy helper)
+  fees        platform-fee credits, direct vs deferred to shards + rollup()
+
+SQLite serializes every writer on one database lock, so there the fee
+scenarios only check correctness; the direct-vs-sharded timing gap (writers
+queueing on the platform wallet row) shows on Postgres.
+
+Exits non-zero if any atomic scenario loses an update, overdraws, or leaves
+ledger and balance out of step.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+_tmp = None
+if os.getenv("BENCH_DATABASE_URL"):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = os.environ["BENCH_DATABASE_URL"]
+else:
+    _tmp = tempfile.NamedTemporaryFile(prefix="wallet_bench_", suffix=".db", delete=False)
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_tmp.name}"
+
+
+def _parallel(app, writers: int, fn) -> tuple[float, int]:
+    """Run fn(writer_index) on `writers` threads released together; (seconds, errors)."""
+    from app.extensions import db
+
+    barrier = threading.Barrier(writers)
+    errors = [0]
+    lock = threading.Lock()
+
+    def body(i: int) -> None:
+        with app.app_context():
+            barrier.wait()
+            try:
+                fn(i)
+            except Exception:
+                db.session.rollback()
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=body, args=(i,)) for i in range(writers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, errors[0]
+
+
+def _user(db, email: str, role: str = "merchant") -> int:
+    from app.models import User
+
+    u = User(email=email, name=email.split("@")[0], role=role, password_hash="x")
+    db.session.add(u)
+    db.session.commit()
+    return int(u.id)
+
+
+def _state(db, user_id: int) -> tuple[float, float, int]:
+    """(balance, ledger credits - debits, txn count) for a user's wallet."""
+    from sqlalchemy import case, func
+
+    from app.models import Wallet, WalletTxn
+
+    db.session.expire_all()
+    w = Wallet.query.filter_by(user_id=user_id).first()
+    signed = case((WalletTxn.direction == "credit", WalletTxn.amount), else_=-WalletTxn.amount)
+    ledger, n = db.session.query(func.coalesce(func.sum(signed), 0.0), func.count(WalletTxn.id)).filter(WalletTxn.wallet_id == w.id).one()
+    return float(w.balance or 0.0), float(ledger or 0.0), int(n or 0)
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    writers = int(argv[0]) if argv else 50
+    ops = int(argv[1]) if len(argv) > 1 else 20
+    total = writers * ops
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Wallet
+    from app.segments.segment_wallet_engine import credit_wallet, debit_wallet
+    from app.utils import platform_fees
+    from app.utils.wallets import get_or_create_wallet, post_txn
+
+    app = create_app()
+    failed = []
+    dialect = app.config["SQLALCHEMY_DATABASE_URI"].split(":")[0]
+    print(f"{writers} writers x {ops} ops ({dialect})")
+    if dialect.startswith("sqlite"):
+        print("  note: SQLite serializes writers on one database lock, so writers never run truly in")
+        print("        parallel and timings say little about a server database;")
+        print("        set BENCH_DATABASE_URL=postgresql://... for a concurrent run")
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            legacy_uid = _user(db, "legacy@bench.local")
+            credit_uid = _user(db, "credit@bench.local")
+            debit_uid = _user(db, "debit@bench.local")
+            compat_uid = _user(db, "compat@bench.local")
+            direct_uid = _user(db, "direct@bench.local", "admin")
+            sharded_uid = _user(db, "sharded@bench.local", "admin")
+            for uid in (legacy_uid, credit_uid, debit_uid, compat_uid, direct_uid, sharded_uid):
+                get_or_create_wallet(uid)
+            post_txn(user_id=debit_uid, direction="credit", amount=float(total), kind="topup", reference="seed", note="seed")
+            credit_wallet(compat_uid, float(total), reason="seed")
+
+        # legacy: read-modify-write in Python
+        def legacy(i: int) -> None:
+            for _ in range(ops):
+                w = Wallet.query.filter_by(user_id=legacy_uid).first()
+                w.balance = float(w.balance or 0.0) + 1.0
+                db.session.commit()
+
+        secs, errs = _parallel(app, writers, legacy)
+        with app.app_context():
+            bal = float(Wallet.query.filter_by(user_id=legacy_uid).first().balance)
+        print(f"  legacy   {secs * 1000:8.0f} ms  expected={total} balance={bal:.0f} lost={total - bal:.0f} errors={errs}")
+
+        # credit: atomic UPDATE per posting
+        def credit(i: int) -> None:
+            for k in range(ops):
+                post_txn(user_id=credit_uid, direction="credit", amount=1.0, kind="topup", reference=f"c{i}:{k}", note="bench")
+
+        secs, errs = _parallel(app, writers, credit)
+        with app.app_context():
+            bal, ledger, n = _state(db, credit_uid)
+        ok = bal == total and ledger == bal and n == total
+        failed += [] if ok else ["credit"]
+        print(f"  credit   {secs * 1000:8.0f} ms  expected={total} balance={bal:.0f} ledger={ledger:.0f} txns={n} errors={errs}  {'PASS' if ok else 'FAIL'}")
+
+        # debit: twice as many debits as the balance covers; exactly `total` may succeed
+        def debit(i: int) -> None:
+            for k in range(2 * ops):
+                post_txn(user_id=debit_uid, direction="debit", amount=1.0, kind="spend", reference=f"d{i}:{k}", note="bench")
+
+        secs, errs = _parallel(app, writers, debit)
+        with app.app_context():
+            bal, ledger, n = _state(db, debit_uid)
+        ok = bal == 0.0 and ledger == 0.0 and n == total + 1
+        failed += [] if ok else ["debit"]
+        print(f"  debit    {secs * 1000:8.0f} ms  attempted={2 * total} posted={n - 1} balance={bal:.0f} ledger={ledger:.0f} errors={errs}  {'PASS' if ok else 'FAIL'}")
+
+        # compat: legacy debit_wallet helper, same 2x oversubscription; refusals count as errors
+        def compat(i: int) -> None:
+            for _ in range(2 * ops):
+                try:
+                    debit_wallet(compat_uid, 1.0, reason="bench")
+                except ValueError:
+                    pass
+
+        secs, errs = _parallel(app, writers, compat)
+        with app.app_context():
+            db.session.expire_all()
+            bal = float(Wallet.query.filter_by(user_id=compat_uid).first().balance)
+        ok = bal == 0.0 and errs == 0
+        failed += [] if ok else ["compat"]
+        print(f"  compat   {secs * 1000:8.0f} ms  attempted={2 * total} balance={bal:.0f} errors={errs}  {'PASS' if ok else 'FAIL'}")
+
+        # fees: one hot wallet, direct vs sharded
+        for label, uid, deferred in (("direct", direct_uid, False), ("sharded", sharded_uid, True)):
+            def fee(i: int, uid=uid, deferred=deferred) -> None:
+                for k in range(ops):
+                    post_txn(user_id=uid, direction="credit", amount=1.0, kind="platform_fee", reference=f"f{i}:{k}", note="bench", deferred=deferred)
+
+            secs, errs = _parallel(app, writers, fee)
+            with app.app_context():
+                rolled = platform_fees.rollup() if deferred else {}
+                bal, ledger, n = _state(db, uid)
+                pending = platform_fees.pending_by_wallet().get(int(Wallet.query.filter_by(user_id=uid).first().id), 0.0)
+            ok = bal == total and ledger == bal and n == total and pending == 0.0
+            failed += [] if ok else [label]
+            extra = f" rolled_up={rolled.get('amount', 0):.0f} from {rolled.get('shards', 0)} shards" if deferred else ""
+            print(f"  {label:<8s} {secs * 1000:8.0f} ms  expected={total} balance={bal:.0f} ledger={ledger:.0f}{extra} errors={errs}  {'PASS' if ok else 'FAIL'}")
+    finally:
+        if _tmp is not None:
+            for suffix in ("", "-journal", "-wal", "-shm"):
+                try:
+                    os.unlink(_tmp.name + suffix)
+                except OSError:
+                    pass
+
+    if failed:
+        print("FAILED: " + ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
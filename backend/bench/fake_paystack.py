@@ -0,0 +1,248 @@
+"""Local stand-in for the Paystack endpoints the backend calls.
+
+Point the client at it with PAYSTACK_BASE_URL=http://127.0.0.1:<port> (any
+PAYSTACK_SECRET_KEY value is accepted). Each request sleeps `latency_ms`
+(+ up to `jitter_ms`) and fails with probability `fail_rate`; each
+transfer (a single /transfer, or an item of a /transfer/bulk call) is
+rejected with probability `item_fail_rate`. With probability `lost_rate` a
+transfer call goes through but its reply is replaced by a 504, as when the
+client times out. A reference that was already used is refused with
+"Duplicate Transfer Reference", and GET /transfer/verify/<reference> reports
+the recorded transfer (404 when there is none). Payout dispatch can be
+exercised and benchmarked without the network.
+
+Standalone:
+    python -m bench.fake_paystack [--port 8089] [--latency-ms 150] [--fail-rate 0.0] [--item-fail-rate 0.0] [--lost-rate 0.0]
+
+In-process:
+    server = FakePaystack(latency_ms=100).start()
+    os.environ["PAYSTACK_BASE_URL"] = server.base_url
+    ...
+    server.stop()
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+
+class FakePaystack:
+
+    def __init__(self, *, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 100.0, jitter_ms: float = 0.0, fail_rate: float = 0.0, item_fail_rate: float = 0.0, lost_rate: float = 0.0, seed: int | None = None):
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.fail_rate = float(fail_rate)
+        self.item_fail_rate = float(item_fail_rate)
+        self.lost_rate = float(lost_rate)
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls: dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.transfers: list[dict] = []
+        self._by_ref: dict[str, dict] = {}
+        self._server = ThreadingHTTPServer((host, int(port)), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePaystack":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-paystack", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.transfers.clear()
+            self._by_ref.clear()
+            self.max_in_flight = 0
+
+    def _should_fail(self, rate: float | None = None) -> bool:
+        rate = self.fail_rate if rate is None else rate
+        with self._lock:
+            return rate > 0 and self._rnd.random() < rate
+
+    def _delay(self) -> float:
+        with self._lock:
+            jitter = self._rnd.random() * self.jitter_ms if self.jitter_ms > 0 else 0.0
+        return (self.latency_ms + jitter) / 1000.0
+
+    def _enter(self, path: str) -> None:
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _transfer(self, body: dict, status: str = "success") -> dict | None:
+        """Record a transfer; None when its reference was already used."""
+        ref = body.get("reference") or f"ref_{uuid4().hex[:12]}"
+        rec = {
+            "reference": ref,
+            "recipient": body.get("recipient"),
+            "amount": body.get("amount"),
+            "transfer_code": f"TRF_{uuid4().hex[:12]}",
+            "status": status,
+        }
+        with self._lock:
+            if ref in self._by_ref:
+                return None
+            self._by_ref[ref] = rec
+            self.transfers.append(rec)
+        return rec
+
+    def lookup(self, reference: str) -> dict | None:
+        with self._lock:
+            return self._by_ref.get(reference)
+
+    def handle(self, path: str, body: dict) -> tuple[int, dict]:
+        if self._should_fail():
+            return 502, {"status": False, "message": "upstream error (simulated)"}
+        if path == "/transfer":
+            if not body.get("recipient") or not body.get("amount"):
+                return 400, {"status": False, "message": "recipient and amount required"}
+            if self._should_fail(self.item_fail_rate):
+                if self._transfer(body, "failed") is None:
+                    return 400, {"status": False, "message": "Duplicate Transfer Reference"}
+                return 400, {"status": False, "message": "Transfer failed (simulated)"}
+            rec = self._transfer(body)
+            if rec is None:
+                return 400, {"status": False, "message": "Duplicate Transfer Reference"}
+            if self._should_fail(self.lost_rate):
+                return 504, {"status": False, "message": "gateway timeout (simulated)"}
+            return 200, {"status": True, "message": "Transfer has been queued", "data": rec}
+        if path == "/transfer/bulk":
+            items = body.get("transfers")
+            if not isinstance(items, list) or not items:
+                return 400, {"status": False, "message": "transfers required"}
+            if len(items) > 100:
+                return 400, {"status": False, "message": "maximum of 100 transfers per batch"}
+            refs = [t.get("reference") for t in items if isinstance(t, dict) and t.get("reference")]
+            if len(set(refs)) != len(refs) or any(self.lookup(r) for r in refs):
+                return 400, {"status": False, "message": "Duplicate Transfer Reference"}
+            data = []
+            for t in items:
+                t = t if isinstance(t, dict) else {}
+                failed = self._should_fail(self.item_fail_rate)
+                rec = self._transfer(t, "failed" if failed else "success")
+                if rec is None:
+                    rec = {"reference": t.get("reference"), "status": "failed"}
+                data.append(rec)
+            if self._should_fail(self.lost_rate):
+                return 504, {"status": False, "message": "gateway timeout (simulated)"}
+            return 200, {"status": True, "message": f"{len(data)} transfers queued.", "data": data}
+        if path == "/transaction/initialize":
+            ref = body.get("reference") or uuid4().hex[:12]
+            return 200, {"status": True, "message": "Authorization URL created", "data": {
+                "authorization_url": f"https://checkout.paystack.test/{ref}",
+                "access_code": uuid4().hex[:10],
+                "reference": ref,
+            }}
+        return 404, {"status": False, "message": f"unknown endpoint {path}"}
+
+    def handle_get(self, path: str) -> tuple[int, dict]:
+        if path.startswith("/transfer/verify/"):
+            rec = self.lookup(path[len("/transfer/verify/"):])
+            if rec is None:
+                return 404, {"status": False, "message": "Transfer not found"}
+            return 200, {"status": True, "message": "Transfer retrieved", "data": dict(rec)}
+        return 404, {"status": False, "message": f"unknown endpoint {path}"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _authorized(self) -> bool:
+                return (self.headers.get("Authorization") or "").startswith("Bearer ")
+
+            def do_POST(self):
+                path = self.path.split("?", 1)[0]
+                fake._enter(path)
+                try:
+                    n = int(self.headers.get("Content-Length") or 0)
+                    raw = self.rfile.read(n) if n else b""
+                    try:
+                        body = json.loads(raw or b"{}")
+                    except Exception:
+                        body = {}
+                    if not self._authorized():
+                        status, payload = 401, {"status": False, "message": "Invalid key"}
+                    else:
+                        time.sleep(fake._delay())
+                        status, payload = fake.handle(path, body if isinstance(body, dict) else {})
+                    self._reply(status, payload)
+                finally:
+                    fake._leave()
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                fake._enter(path)
+                try:
+                    if not self._authorized():
+                        status, payload = 401, {"status": False, "message": "Invalid key"}
+                    else:
+                        time.sleep(fake._delay())
+                        status, payload = fake.handle_get(path)
+                    self._reply(status, payload)
+                finally:
+                    fake._leave()
+
+        return Handler
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency-ms", type=float, default=150.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--item-fail-rate", type=float, default=0.0)
+    ap.add_argument("--lost-rate", type=float, default=0.0)
+    args = ap.parse_args(argv)
+    fake = FakePaystack(
+        host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        fail_rate=args.fail_rate, item_fail_rate=args.item_fail_rate, lost_rate=args.lost_rate,
+    )
+    print(f"fake paystack listening on {fake.base_url}")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
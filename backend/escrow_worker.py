@@ -0,0 +1,40 @@
+"""Escrow settlement worker entry point.
+
+    python escrow_worker.py                # ESCROW_WORKERS processes (default 2) under a supervisor
+    python escrow_worker.py --workers 4    # explicit process count
+    python escrow_worker.py --workers 1    # single in-process worker, no supervisor
+    python escrow_worker.py --once         # one batch per worker, then exit
+"""
+import logging
+import os
+import sys
+import threading
+
+from app.jobs.escrow_worker import WORKERS, run_forever, supervise
+from app.jobs.scheduler import install_signal_handlers
+
+
+def _workers(argv: list[str]) -> int:
+    if "--workers" in argv:
+        try:
+            return max(1, int(argv[argv.index("--workers") + 1]))
+        except Exception:
+            pass
+    return WORKERS
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("ESCROW_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    argv = sys.argv[1:]
+    once = "--once" in argv
+    stop = threading.Event()
+    install_signal_handlers(stop)
+    workers = _workers(argv)
+    if workers == 1:
+        from app import create_app
+        run_forever(create_app(), stop=stop, once=once)
+    else:
+        supervise(workers, stop=stop, once=once)
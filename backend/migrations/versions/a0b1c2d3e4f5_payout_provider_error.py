@@ -0,0 +1,43 @@
+"""payout_requests.provider_error
+
+Revision ID: a0b1c2d3e4f5
+Revises: f9a0b1c2d3e4
+Create Date: 2026-02-22 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a0b1c2d3e4f5'
+down_revision = 'f9a0b1c2d3e4'
+branch_labels = None
+depends_on = None
+
+
+def _columns(insp, table):
+    try:
+        return {c["name"] for c in insp.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "payout_requests" not in set(insp.get_table_names()):
+        return
+    if "provider_error" not in _columns(insp, "payout_requests"):
+        with op.batch_alter_table('payout_requests') as batch_op:
+            batch_op.add_column(sa.Column('provider_error', sa.String(length=240), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "payout_requests" not in set(insp.get_table_names()):
+        return
+    if "provider_error" in _columns(insp, "payout_requests"):
+        with op.batch_alter_table('payout_requests') as batch_op:
+            batch_op.drop_column('provider_error')
@@ -0,0 +1,40 @@
+"""listings keyset pagination indexes
+
+Revision ID: a1c2e3f4b5d6
+Revises: 004fb573e0dd
+Create Date: 2026-02-10 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c2e3f4b5d6'
+down_revision = '004fb573e0dd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "listings" not in insp.get_table_names():
+        return
+    existing = {ix["name"] for ix in insp.get_indexes("listings")}
+    if "ix_listings_active_created_id" not in existing:
+        op.create_index("ix_listings_active_created_id", "listings", ["is_active", "created_at", "id"])
+    if "ix_listings_created_id" not in existing:
+        op.create_index("ix_listings_created_id", "listings", ["created_at", "id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "listings" not in insp.get_table_names():
+        return
+    existing = {ix["name"] for ix in insp.get_indexes("listings")}
+    if "ix_listings_created_id" in existing:
+        op.drop_index("ix_listings_created_id", table_name="listings")
+    if "ix_listings_active_created_id" in existing:
+        op.drop_index("ix_listings_active_created_id", table_name="listings")
@@ -0,0 +1,49 @@
+"""wallet_reconcile_checkpoints + wallet_txns (wallet_id, id) index
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+Create Date: 2026-02-17 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4b5c6d7e8f9'
+down_revision = 'f3a4b5c6d7e8'
+branch_labels = None
+depends_on = None
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "wallet_reconcile_checkpoints" not in tables:
+        op.create_table(
+            'wallet_reconcile_checkpoints',
+            sa.Column('wallet_id', sa.Integer(), sa.ForeignKey('wallets.id'), primary_key=True),
+            sa.Column('verified_txn_id', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('verified_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('checked_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        )
+    if "wallet_txns" in tables and "ix_wallet_txns_wallet_id_id" not in _indexes(insp, "wallet_txns"):
+        op.create_index('ix_wallet_txns_wallet_id_id', 'wallet_txns', ['wallet_id', 'id'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "wallet_txns" in tables and "ix_wallet_txns_wallet_id_id" in _indexes(insp, "wallet_txns"):
+        op.drop_index('ix_wallet_txns_wallet_id_id', table_name='wallet_txns')
+    if "wallet_reconcile_checkpoints" in tables:
+        op.drop_table('wallet_reconcile_checkpoints')
@@ -0,0 +1,53 @@
+"""background_jobs checkpoint/params/heartbeat columns for resumable maintenance jobs
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-02-13 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b8c9d0e1f2'
+down_revision = 'f6a7b8c9d0e1'
+branch_labels = None
+depends_on = None
+
+
+def _columns(insp, table):
+    try:
+        return {c["name"] for c in insp.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "background_jobs" not in insp.get_table_names():
+        return
+    cols = _columns(insp, "background_jobs")
+    with op.batch_alter_table('background_jobs') as batch_op:
+        if "params_json" not in cols:
+            batch_op.add_column(sa.Column('params_json', sa.Text(), nullable=True))
+        if "checkpoint" not in cols:
+            batch_op.add_column(sa.Column('checkpoint', sa.String(length=64), nullable=True))
+        if "updated_at" not in cols:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "background_jobs" not in insp.get_table_names():
+        return
+    cols = _columns(insp, "background_jobs")
+    with op.batch_alter_table('background_jobs') as batch_op:
+        if "updated_at" in cols:
+            batch_op.drop_column('updated_at')
+        if "checkpoint" in cols:
+            batch_op.drop_column('checkpoint')
+        if "params_json" in cols:
+            batch_op.drop_column('params_json')
@@ -0,0 +1,83 @@
+"""listing coordinates + geohash columns for radius search
+
+Revision ID: b2d3f4a5c6e7
+Revises: a1c2e3f4b5d6
+Create Date: 2026-02-10 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d3f4a5c6e7'
+down_revision = 'a1c2e3f4b5d6'
+branch_labels = None
+depends_on = None
+
+
+def _backfill(bind, table: str) -> None:
+    from app.utils.geo import geohash_or_none
+
+    rows = bind.execute(sa.text(
+        f"SELECT id, latitude, longitude FROM {table} WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )).fetchall()
+    for r in rows:
+        gh = geohash_or_none(r[1], r[2])
+        if gh:
+            bind.execute(sa.text(f"UPDATE {table} SET geohash = :gh WHERE id = :id"), {"gh": gh, "id": int(r[0])})
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    if "listings" in tables:
+        cols = {c["name"] for c in insp.get_columns("listings")}
+        with op.batch_alter_table("listings") as batch_op:
+            if "latitude" not in cols:
+                batch_op.add_column(sa.Column("latitude", sa.Float(), nullable=True))
+            if "longitude" not in cols:
+                batch_op.add_column(sa.Column("longitude", sa.Float(), nullable=True))
+            if "geohash" not in cols:
+                batch_op.add_column(sa.Column("geohash", sa.String(length=12), nullable=True))
+        existing = {ix["name"] for ix in sa.inspect(bind).get_indexes("listings")}
+        if "ix_listings_geohash" not in existing:
+            op.create_index("ix_listings_geohash", "listings", ["geohash"])
+        _backfill(bind, "listings")
+
+    if "shortlets" in tables:
+        cols = {c["name"] for c in insp.get_columns("shortlets")}
+        if "geohash" not in cols:
+            with op.batch_alter_table("shortlets") as batch_op:
+                batch_op.add_column(sa.Column("geohash", sa.String(length=12), nullable=True))
+        existing = {ix["name"] for ix in sa.inspect(bind).get_indexes("shortlets")}
+        if "ix_shortlets_geohash" not in existing:
+            op.create_index("ix_shortlets_geohash", "shortlets", ["geohash"])
+        _backfill(bind, "shortlets")
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    if "shortlets" in tables:
+        existing = {ix["name"] for ix in insp.get_indexes("shortlets")}
+        if "ix_shortlets_geohash" in existing:
+            op.drop_index("ix_shortlets_geohash", table_name="shortlets")
+        cols = {c["name"] for c in insp.get_columns("shortlets")}
+        if "geohash" in cols:
+            with op.batch_alter_table("shortlets") as batch_op:
+                batch_op.drop_column("geohash")
+
+    if "listings" in tables:
+        existing = {ix["name"] for ix in insp.get_indexes("listings")}
+        if "ix_listings_geohash" in existing:
+            op.drop_index("ix_listings_geohash", table_name="listings")
+        cols = {c["name"] for c in insp.get_columns("listings")}
+        with op.batch_alter_table("listings") as batch_op:
+            for name in ("geohash", "longitude", "latitude"):
+                if name in cols:
+                    batch_op.drop_column(name)
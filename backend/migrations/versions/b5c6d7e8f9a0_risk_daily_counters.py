@@ -0,0 +1,97 @@
+"""risk_daily_counters + wallet_txns (user_id, created_at) index
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+Create Date: 2026-02-18 10:20:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5c6d7e8f9a0'
+down_revision = 'a4b5c6d7e8f9'
+branch_labels = None
+depends_on = None
+
+# Matches the RISK_BACKFILL_DAYS default used by risk-counters-backfill / -check.
+BACKFILL_DAYS = 7
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "risk_daily_counters" not in tables:
+        op.create_table(
+            'risk_daily_counters',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('txn_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('payout_total', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('payout_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('window_start', sa.DateTime(), nullable=True),
+            sa.Column('window_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_txn_at', sa.DateTime(), nullable=True),
+            sa.Column('last_payout_request_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        )
+        # Seed the recent days from the ledger so the daily limit and the
+        # cooldown see payouts made before the deploy.
+        since = datetime.combine(datetime.utcnow().date() - timedelta(days=BACKFILL_DAYS - 1), datetime.min.time())
+        if "wallet_txns" in tables:
+            op.execute(sa.text("""
+                INSERT INTO risk_daily_counters (
+                    user_id, day, txn_count, payout_total, payout_count, window_count, last_txn_at, updated_at
+                )
+                SELECT user_id, DATE(created_at), COUNT(*),
+                       SUM(CASE WHEN kind = 'payout' AND direction = 'debit' THEN amount ELSE 0 END),
+                       SUM(CASE WHEN kind = 'payout' AND direction = 'debit' THEN 1 ELSE 0 END),
+                       0, MAX(created_at), CURRENT_TIMESTAMP
+                FROM wallet_txns
+                WHERE user_id IS NOT NULL AND created_at >= :since
+                GROUP BY user_id, DATE(created_at)
+            """).bindparams(sa.bindparam("since", since, type_=sa.DateTime())))
+        if "payout_requests" in tables:
+            op.execute(sa.text("""
+                UPDATE risk_daily_counters
+                SET last_payout_request_at = (
+                    SELECT MAX(p.created_at) FROM payout_requests p
+                    WHERE p.user_id = risk_daily_counters.user_id AND DATE(p.created_at) = risk_daily_counters.day
+                )
+            """))
+            op.execute(sa.text("""
+                INSERT INTO risk_daily_counters (
+                    user_id, day, txn_count, payout_total, payout_count, window_count, last_payout_request_at, updated_at
+                )
+                SELECT p.user_id, DATE(p.created_at), 0, 0, 0, 0, MAX(p.created_at), CURRENT_TIMESTAMP
+                FROM payout_requests p
+                WHERE p.user_id IS NOT NULL AND p.created_at >= :since
+                  AND NOT EXISTS (
+                      SELECT 1 FROM risk_daily_counters c
+                      WHERE c.user_id = p.user_id AND c.day = DATE(p.created_at)
+                  )
+                GROUP BY p.user_id, DATE(p.created_at)
+            """).bindparams(sa.bindparam("since", since, type_=sa.DateTime())))
+    if "wallet_txns" in tables and "ix_wallet_txns_user_id_created_at" not in _indexes(insp, "wallet_txns"):
+        op.create_index('ix_wallet_txns_user_id_created_at', 'wallet_txns', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "wallet_txns" in tables and "ix_wallet_txns_user_id_created_at" in _indexes(insp, "wallet_txns"):
+        op.drop_index('ix_wallet_txns_user_id_created_at', table_name='wallet_txns')
+    if "risk_daily_counters" in tables:
+        op.drop_table('risk_daily_counters')
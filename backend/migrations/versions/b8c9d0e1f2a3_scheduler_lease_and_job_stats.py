@@ -0,0 +1,55 @@
+"""scheduler_leases + scheduler_job_stats for the autopilot scheduler worker
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-02-14 08:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c9d0e1f2a3'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "scheduler_leases" not in tables:
+        op.create_table(
+            'scheduler_leases',
+            sa.Column('name', sa.String(length=64), primary_key=True),
+            sa.Column('holder', sa.String(length=128), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('acquired_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+            sa.Column('renewed_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        )
+    if "scheduler_job_stats" not in tables:
+        op.create_table(
+            'scheduler_job_stats',
+            sa.Column('name', sa.String(length=64), primary_key=True),
+            sa.Column('runs', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('failures', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('total_duration_ms', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('last_status', sa.String(length=16), nullable=True),
+            sa.Column('last_started_at', sa.DateTime(), nullable=True),
+            sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+            sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+            sa.Column('last_result_json', sa.Text(), nullable=True),
+            sa.Column('last_error', sa.String(length=240), nullable=True),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "scheduler_job_stats" in tables:
+        op.drop_table('scheduler_job_stats')
+    if "scheduler_leases" in tables:
+        op.drop_table('scheduler_leases')
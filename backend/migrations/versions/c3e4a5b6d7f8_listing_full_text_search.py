@@ -0,0 +1,65 @@
+"""listing full-text search index (sqlite fts5 / postgres tsvector)
+
+Revision ID: c3e4a5b6d7f8
+Revises: b2d3f4a5c6e7
+Create Date: 2026-02-11 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e4a5b6d7f8'
+down_revision = 'b2d3f4a5c6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "listings" not in insp.get_table_names():
+        return
+
+    if bind.dialect.name == "sqlite":
+        exists = bind.execute(sa.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listings_fts'"
+        )).first()
+        if exists:
+            return
+        try:
+            op.execute(
+                "CREATE VIRTUAL TABLE listings_fts USING fts5("
+                "title, description, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite built without FTS5: search falls back to LIKE.
+            return
+        op.execute(
+            "INSERT INTO listings_fts(rowid, title, description) "
+            "SELECT id, COALESCE(title, ''), COALESCE(description, '') FROM listings"
+        )
+        return
+
+    if bind.dialect.name == "postgresql":
+        cols = {c["name"] for c in insp.get_columns("listings")}
+        if "search_vector" not in cols:
+            op.execute(
+                "ALTER TABLE listings ADD COLUMN search_vector tsvector "
+                "GENERATED ALWAYS AS (to_tsvector('simple', "
+                "coalesce(title, '') || ' ' || coalesce(description, ''))) STORED"
+            )
+        existing = {ix["name"] for ix in insp.get_indexes("listings")}
+        if "ix_listings_search_vector" not in existing:
+            op.execute("CREATE INDEX ix_listings_search_vector ON listings USING GIN (search_vector)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS listings_fts")
+        return
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_listings_search_vector")
+        op.execute("ALTER TABLE listings DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,37 @@
+"""wallet_txns (wallet_id, created_at, id) index for ledger pages / statements
+
+Revision ID: c6d7e8f9a0b1
+Revises: b5c6d7e8f9a0
+Create Date: 2026-02-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d7e8f9a0b1'
+down_revision = 'b5c6d7e8f9a0'
+branch_labels = None
+depends_on = None
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "wallet_txns" in set(insp.get_table_names()) and "ix_wallet_txns_wallet_id_created_at_id" not in _indexes(insp, "wallet_txns"):
+        op.create_index('ix_wallet_txns_wallet_id_created_at_id', 'wallet_txns', ['wallet_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "wallet_txns" in set(insp.get_table_names()) and "ix_wallet_txns_wallet_id_created_at_id" in _indexes(insp, "wallet_txns"):
+        op.drop_index('ix_wallet_txns_wallet_id_created_at_id', table_name='wallet_txns')
@@ -0,0 +1,60 @@
+"""payout_requests provider + provider_reference for dispatched transfers
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-02-15 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d0e1f2a3b4'
+down_revision = 'b8c9d0e1f2a3'
+branch_labels = None
+depends_on = None
+
+
+def _columns(insp, table):
+    try:
+        return {c["name"] for c in insp.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "payout_requests" not in insp.get_table_names():
+        return
+    cols = _columns(insp, "payout_requests")
+    with op.batch_alter_table('payout_requests') as batch_op:
+        if "provider" not in cols:
+            batch_op.add_column(sa.Column('provider', sa.String(length=32), nullable=True))
+        if "provider_reference" not in cols:
+            batch_op.add_column(sa.Column('provider_reference', sa.String(length=128), nullable=True))
+    if "ix_payout_requests_provider_reference" not in _indexes(sa.inspect(bind), "payout_requests"):
+        op.create_index('ix_payout_requests_provider_reference', 'payout_requests', ['provider_reference'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "payout_requests" not in insp.get_table_names():
+        return
+    if "ix_payout_requests_provider_reference" in _indexes(insp, "payout_requests"):
+        op.drop_index('ix_payout_requests_provider_reference', table_name='payout_requests')
+    cols = _columns(insp, "payout_requests")
+    with op.batch_alter_table('payout_requests') as batch_op:
+        if "provider_reference" in cols:
+            batch_op.drop_column('provider_reference')
+        if "provider" in cols:
+            batch_op.drop_column('provider')
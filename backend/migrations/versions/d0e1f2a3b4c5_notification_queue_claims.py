@@ -0,0 +1,69 @@
+"""notification_queue worker claim columns + (status, next_attempt_at) poll index
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-02-16 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0e1f2a3b4c5'
+down_revision = 'c9d0e1f2a3b4'
+branch_labels = None
+depends_on = None
+
+
+INDEX = "ix_notification_queue_status_next_attempt"
+
+
+def _columns(insp, table):
+    try:
+        return {c["name"] for c in insp.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "notification_queue" not in insp.get_table_names():
+        return
+    cols = _columns(insp, "notification_queue")
+    with op.batch_alter_table('notification_queue') as batch_op:
+        if "locked_by" not in cols:
+            batch_op.add_column(sa.Column('locked_by', sa.String(length=64), nullable=True))
+        if "locked_until" not in cols:
+            batch_op.add_column(sa.Column('locked_until', sa.DateTime(), nullable=True))
+    # The poll is a range scan on next_attempt_at, so queued rows need one.
+    op.execute(
+        "UPDATE notification_queue SET next_attempt_at = created_at "
+        "WHERE status = 'queued' AND next_attempt_at IS NULL"
+    )
+    if INDEX not in _indexes(sa.inspect(bind), "notification_queue"):
+        op.create_index(INDEX, 'notification_queue', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "notification_queue" not in insp.get_table_names():
+        return
+    if INDEX in _indexes(insp, "notification_queue"):
+        op.drop_index(INDEX, table_name='notification_queue')
+    op.execute("UPDATE notification_queue SET status = 'queued' WHERE status = 'sending'")
+    cols = _columns(insp, "notification_queue")
+    with op.batch_alter_table('notification_queue') as batch_op:
+        if "locked_until" in cols:
+            batch_op.drop_column('locked_until')
+        if "locked_by" in cols:
+            batch_op.drop_column('locked_by')
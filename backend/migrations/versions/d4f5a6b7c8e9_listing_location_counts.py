@@ -0,0 +1,53 @@
+"""listing_location_counts rollup table
+
+Revision ID: d4f5a6b7c8e9
+Revises: c3e4a5b6d7f8
+Create Date: 2026-02-11 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f5a6b7c8e9'
+down_revision = 'c3e4a5b6d7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "listing_location_counts" in tables:
+        return
+
+    op.create_table(
+        'listing_location_counts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('state', sa.String(length=64), nullable=False),
+        sa.Column('city', sa.String(length=64), nullable=False, server_default=''),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('state', 'city', name='uq_listing_location_counts_state_city'),
+    )
+    op.create_index('ix_listing_location_counts_count', 'listing_location_counts', ['count'])
+
+    if "listings" in tables:
+        op.execute(sa.text("""
+            INSERT INTO listing_location_counts (state, city, count, updated_at)
+            SELECT TRIM(state), TRIM(COALESCE(city, '')), COUNT(*), CURRENT_TIMESTAMP
+            FROM listings
+            WHERE state IS NOT NULL AND TRIM(state) != '' AND COALESCE(is_active, :active) = :active
+            GROUP BY TRIM(state), TRIM(COALESCE(city, ''))
+        """).bindparams(active=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "listing_location_counts" not in insp.get_table_names():
+        return
+    op.drop_index('ix_listing_location_counts_count', table_name='listing_location_counts')
+    op.drop_table('listing_location_counts')
@@ -0,0 +1,59 @@
+"""orders.next_escrow_eval_at + (escrow_status, next_escrow_eval_at) index
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+Create Date: 2026-02-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e8f9a0b1c2'
+down_revision = 'c6d7e8f9a0b1'
+branch_labels = None
+depends_on = None
+
+
+def _columns(insp, table):
+    try:
+        return {c["name"] for c in insp.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "orders" not in set(insp.get_table_names()):
+        return
+    if "next_escrow_eval_at" not in _columns(insp, "orders"):
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.add_column(sa.Column('next_escrow_eval_at', sa.DateTime(), nullable=True))
+    # Every order already HELD is due on the first run, oldest first.
+    op.execute(
+        "UPDATE orders SET next_escrow_eval_at = COALESCE(escrow_held_at, created_at) "
+        "WHERE escrow_status = 'HELD' AND next_escrow_eval_at IS NULL"
+    )
+    if "ix_orders_escrow_status_next_eval" not in _indexes(sa.inspect(bind), "orders"):
+        op.create_index('ix_orders_escrow_status_next_eval', 'orders', ['escrow_status', 'next_escrow_eval_at'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "orders" not in set(insp.get_table_names()):
+        return
+    if "ix_orders_escrow_status_next_eval" in _indexes(insp, "orders"):
+        op.drop_index('ix_orders_escrow_status_next_eval', table_name='orders')
+    if "next_escrow_eval_at" in _columns(insp, "orders"):
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.drop_column('next_escrow_eval_at')
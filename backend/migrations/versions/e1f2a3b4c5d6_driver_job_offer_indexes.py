@@ -0,0 +1,52 @@
+"""driver_job_offers indexes for the batched driver matcher
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-02-16 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd0e1f2a3b4c5'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ("ix_driver_job_offers_order_id", ["order_id"]),
+    ("ix_driver_job_offers_driver_status", ["driver_id", "status"]),
+    ("ix_driver_job_offers_status_created", ["status", "created_at"]),
+)
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "driver_job_offers" not in insp.get_table_names():
+        return
+    existing = _indexes(insp, "driver_job_offers")
+    for name, cols in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'driver_job_offers', cols, unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "driver_job_offers" not in insp.get_table_names():
+        return
+    existing = _indexes(insp, "driver_job_offers")
+    for name, _cols in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name='driver_job_offers')
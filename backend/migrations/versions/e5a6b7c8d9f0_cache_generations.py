@@ -0,0 +1,37 @@
+"""cache_generations counters for listing response caching
+
+Revision ID: e5a6b7c8d9f0
+Revises: d4f5a6b7c8e9
+Create Date: 2026-02-12 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a6b7c8d9f0'
+down_revision = 'd4f5a6b7c8e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "cache_generations" in insp.get_table_names():
+        return
+    op.create_table(
+        'cache_generations',
+        sa.Column('name', sa.String(length=32), primary_key=True),
+        sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "cache_generations" not in insp.get_table_names():
+        return
+    op.drop_table('cache_generations')
@@ -0,0 +1,60 @@
+"""escrow_settlements + orders.escrow_claimed_by
+
+Revision ID: e8f9a0b1c2d3
+Revises: d7e8f9a0b1c2
+Create Date: 2026-02-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f9a0b1c2d3'
+down_revision = 'd7e8f9a0b1c2'
+branch_labels = None
+depends_on = None
+
+
+def _columns(insp, table):
+    try:
+        return {c["name"] for c in insp.get_columns(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "orders" in tables and "escrow_claimed_by" not in _columns(insp, "orders"):
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.add_column(sa.Column('escrow_claimed_by', sa.String(length=64), nullable=True))
+    if "escrow_settlements" not in tables:
+        op.create_table(
+            'escrow_settlements',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=False),
+            sa.Column('worker', sa.String(length=64), nullable=True),
+            sa.Column('outcome', sa.String(length=16), nullable=False),
+            sa.Column('duration_ms', sa.Integer(), nullable=False),
+            sa.Column('error', sa.String(length=240), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_escrow_settlements_order_id', 'escrow_settlements', ['order_id'], unique=False)
+        op.create_index('ix_escrow_settlements_created_at', 'escrow_settlements', ['created_at'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    if "escrow_settlements" in tables:
+        op.drop_index('ix_escrow_settlements_created_at', table_name='escrow_settlements')
+        op.drop_index('ix_escrow_settlements_order_id', table_name='escrow_settlements')
+        op.drop_table('escrow_settlements')
+    if "orders" in tables and "escrow_claimed_by" in _columns(insp, "orders"):
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.drop_column('escrow_claimed_by')
@@ -0,0 +1,42 @@
+"""platform_fee_shards: sharded accumulator for platform-wallet credits
+
+Revision ID: f3a4b5c6d7e8
+Revises: e1f2a3b4c5d6
+Create Date: 2026-02-17 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a4b5c6d7e8'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "platform_fee_shards" in insp.get_table_names():
+        return
+    op.create_table(
+        'platform_fee_shards',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('wallet_id', sa.Integer(), sa.ForeignKey('wallets.id'), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('pending_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('wallet_id', 'shard', name='uq_platform_fee_shards_wallet_shard'),
+    )
+    op.create_index('ix_platform_fee_shards_wallet_id', 'platform_fee_shards', ['wallet_id'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "platform_fee_shards" not in insp.get_table_names():
+        return
+    op.drop_index('ix_platform_fee_shards_wallet_id', table_name='platform_fee_shards')
+    op.drop_table('platform_fee_shards')
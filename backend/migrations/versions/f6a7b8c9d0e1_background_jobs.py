@@ -0,0 +1,53 @@
+"""background_jobs table for pollable long-running operations (bulk listing import)
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5a6b7c8d9f0
+Create Date: 2026-02-13 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5a6b7c8d9f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "background_jobs" in insp.get_table_names():
+        return
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='queued'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('succeeded', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('results_json', sa.Text(), nullable=True),
+        sa.Column('error', sa.String(length=240), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    with op.batch_alter_table('background_jobs') as batch_op:
+        batch_op.create_index('ix_background_jobs_kind', ['kind'], unique=False)
+        batch_op.create_index('ix_background_jobs_owner_id', ['owner_id'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "background_jobs" not in insp.get_table_names():
+        return
+    with op.batch_alter_table('background_jobs') as batch_op:
+        batch_op.drop_index('ix_background_jobs_owner_id')
+        batch_op.drop_index('ix_background_jobs_kind')
+    op.drop_table('background_jobs')
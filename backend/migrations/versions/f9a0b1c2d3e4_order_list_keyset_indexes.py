@@ -0,0 +1,53 @@
+"""orders (buyer|merchant|driver|status, created_at, id) indexes for keyset lists
+
+Revision ID: f9a0b1c2d3e4
+Revises: e8f9a0b1c2d3
+Create Date: 2026-02-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9a0b1c2d3e4'
+down_revision = 'e8f9a0b1c2d3'
+branch_labels = None
+depends_on = None
+
+
+_INDEXES = (
+    ('ix_orders_buyer_id_created_at_id', ['buyer_id', 'created_at', 'id']),
+    ('ix_orders_merchant_id_created_at_id', ['merchant_id', 'created_at', 'id']),
+    ('ix_orders_driver_id_created_at_id', ['driver_id', 'created_at', 'id']),
+    ('ix_orders_status_created_at_id', ['status', 'created_at', 'id']),
+)
+
+
+def _indexes(insp, table):
+    try:
+        return {i["name"] for i in insp.get_indexes(table)}
+    except Exception:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "orders" not in set(insp.get_table_names()):
+        return
+    existing = _indexes(insp, "orders")
+    for name, cols in _INDEXES:
+        if name not in existing:
+            op.create_index(name, 'orders', cols, unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if "orders" not in set(insp.get_table_names()):
+        return
+    existing = _indexes(insp, "orders")
+    for name, _cols in reversed(_INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name='orders')
@@ -0,0 +1,25 @@
+"""Notification queue worker entry point; run as many replicas as needed.
+
+    python notification_worker.py          # loop forever
+    python notification_worker.py --once   # single batch
+"""
+import logging
+import os
+import sys
+import threading
+
+from app import create_app
+from app.jobs.notification_worker import run_forever
+from app.jobs.scheduler import install_signal_handlers
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("NOTIFY_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    stop = threading.Event()
+    install_signal_handlers(stop)
+    run_forever(app, stop=stop, once="--once" in sys.argv[1:])
@@ -0,0 +1,24 @@
+"""Autopilot scheduler worker entry point (run alongside the web process).
+
+    python scheduler.py          # loop forever (leader-elected across replicas)
+    python scheduler.py --once   # single pass, e.g. from cron
+"""
+import logging
+import os
+import sys
+import threading
+
+from app import create_app
+from app.jobs.scheduler import install_signal_handlers, run_forever
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("SCHEDULER_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    stop = threading.Event()
+    install_signal_handlers(stop)
+    run_forever(app, stop=stop, once="--once" in sys.argv[1:])